@@ -1,238 +1,227 @@
 # app.py
+import startup
+import os
 from dash import Dash, html, dcc
-import dash_bootstrap_components as dbc
-from data_loader import load_all_data
-from components import layout_home, gdp_map, gdp_trend, education_map, education_trend, employment_map, employment_trend, employment_vs_unemp, gdp_money, education_people, employment_education_correlation, education_economy_correlation, employment_economy_correlation
-
-app = Dash(__name__, external_stylesheets=["https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css"])
+from data_loader import load_all_data, dataset_version
+from catalog import Catalog
+from cache import callback_cache
+import metrics
+import data_api
+import snapshot
+import profiling
+import warmup
+import readiness
+from components import lazy_tabs, layout_home, gdp_map, gdp_trend, education_map, education_trend, employment_map, employment_trend, employment_vs_unemp, gdp_money, education_people, employment_education_correlation, education_economy_correlation, employment_economy_correlation
+startup.mark("imports")
+
+# Tab contents are rendered on demand, so their components are not in the initial layout
+app = Dash(__name__,
+    external_stylesheets=["https://cdn.jsdelivr.net/npm/bootstrap@5.3.0/dist/css/bootstrap.min.css"],
+    suppress_callback_exceptions=True)
 server = app.server
-
-dataframes = load_all_data("data")
-
-# Education-related
-early_leavers_df = dataframes.get("4_1_early_leavers.csv")
-low_achieving_math_df = dataframes.get("4_2_2_low_achieving_math.csv")
-low_achieving_df = dataframes.get("4_2_low_achieving.csv")
-early_childhood_df = dataframes.get("4_3_early_childhood.csv")
-tertiary_educational_df = dataframes.get("4_4_tertiary_educational.csv")
-digital_skills_df = dataframes.get("4_5_digital_skills.csv")
-adult_learning_df = dataframes.get("4_6_adult_learning.csv")
-
-# Employment/economy-related
-employment_rate_df = dataframes.get("8_1_employment_rate.csv")
-risk_of_poverty_df = dataframes.get("8_2_risk_of_poverty.csv")
-investment_gdp_df = dataframes.get("8_3_investment_gdp.csv")
-long_term_unemployment_df = dataframes.get("8_4_long_term_unemployment.csv")
-outside_labour_df = dataframes.get("8_5_outside_labour.csv")
-real_gdp_df = dataframes.get("8_6_real_gdp.csv")
-neet_df = dataframes.get("8_7_neet.csv")
-
-home_component = layout_home.layout
-gdp_component = gdp_map.register_gdp_component(app, 
-    investment_df=investment_gdp_df,
-    real_df=real_gdp_df
-)
-gdp_trend_component = gdp_trend.gdp_trend_component(app, 
-    investment_df=investment_gdp_df,
-    real_df=real_gdp_df
-)
-
-gdp_money_component = gdp_money.gdp_money_component(app, 
-    investment_df=investment_gdp_df,
-    real_df=real_gdp_df
-)
-
-education_component = education_map.education_component(app,
-    early_childhood_df=early_childhood_df,
-    tertiary_df=tertiary_educational_df,
-    adult_df=adult_learning_df)
-
-education_trend_component = education_trend.education_trend_component(app,
-    early_childhood_df=early_childhood_df,
-    tertiary_df=tertiary_educational_df,
-    adult_df=adult_learning_df)
-
-education_people_component = education_people.education_people_component(app,
-    early_childhood_df=early_childhood_df,
-    tertiary_df=tertiary_educational_df,
-    adult_df=adult_learning_df)
-
-
-employment_map_component = employment_map.employment_map_component(app, 
-    emp_rate_df=employment_rate_df,
-    long_term_unemp_df=long_term_unemployment_df)
-
-employment_trend_component = employment_trend.employment_trend_component(app, 
-    emp_rate_df=employment_rate_df,
-    long_term_unemp_df=long_term_unemployment_df)
-
-employ_vs_unemploy_component = employment_vs_unemp.employ_vs_unemploy(app, 
-    emp_rate_df=employment_rate_df,
-    long_term_unemp_df=long_term_unemployment_df)
-
-employment_education_corr = employment_education_correlation.employment_education_correlation(app,
-    early_childhood_df=early_childhood_df,
-    tertiary_df=tertiary_educational_df,
-    adult_df=adult_learning_df,
-    emp_rate_df=employment_rate_df,
-    long_term_unemp_df=long_term_unemployment_df)
-
-economy_education_corr = education_economy_correlation.economy_education_correlation(app,
-    early_childhood_df=early_childhood_df,
-    tertiary_df=tertiary_educational_df,
-    adult_df=adult_learning_df,
-    real_df=real_gdp_df,
-    investment_df=investment_gdp_df)
-
-economy_employment_corr = employment_economy_correlation.economy_employment_correlation(app,
-    emp_rate_df=employment_rate_df,
-    long_term_unemp_df=long_term_unemployment_df,
-    real_df=real_gdp_df,
-    investment_df=investment_gdp_df)
-
-# --- Layout ---
-# --- Layout ---
-app.layout = html.Div(
-    [
-        # Home Section
-        html.Div(
-            home_component,
-            style={
-                "backgroundColor": "#a6cbea",
-                "padding": "50px 70px",
-                "borderRadius": "18px",
-                "margin": "40px auto 20px auto",
-                "boxShadow": "0 6px 16px rgba(0, 0, 0, 0.1)",
-                "maxWidth": "1200px",
-            },
-        ),
-
-        # --- Two Main Sections ---
-        html.Div(
-            [
-                # Section 1: Basic Indicators
-                html.Div(
-                    [
-                        html.H3(
-                            "Basic Indicators",
-                            style={
-                                "textAlign": "center",
-                                "color": "#2c3e50",
-                                "marginBottom": "25px",
-                                "fontWeight": "600",
-                            },
-                        ),
-                        dbc.Tabs(
-                            [
-                                dbc.Tab(
-                                    html.Div(
-                                        [gdp_component, gdp_trend_component, gdp_money_component],
-                                        style={"padding": "25px"},
-                                    ),
-                                    label="GDP",
-                                ),
-                                dbc.Tab(
-                                    html.Div(
-                                        [education_component, education_trend_component, education_people_component],
-                                        style={"padding": "25px"},
-                                    ),
-                                    label="Education",
-                                ),
-                                dbc.Tab(
-                                    html.Div(
-                                        [employment_map_component, employment_trend_component, employ_vs_unemploy_component],
-                                        style={"padding": "25px"},
-                                    ),
-                                    label="Employment",
-                                ),
-                            ],
-                            id="tabs-basic",
-                            active_tab="tab-0",
-                            className="mb-3",
-                        ),
-                    ],
-                    style={
-                        "backgroundColor": "#f2f5f9",
-                        "padding": "40px 60px",
-                        "borderRadius": "18px",
-                        "margin": "20px auto",
-                        "boxShadow": "0 4px 12px rgba(0, 0, 0, 0.1)",
-                        "maxWidth": "1200px",
-                    },
-                ),
-
-                # Section 2: Correlations & Effects
-                html.Div(
-                    [
-                        html.H3(
-                            "Correlations Between Sectors",
-                            style={
-                                "textAlign": "center",
-                                "color": "#2c3e50",
-                                "marginBottom": "25px",
-                                "fontWeight": "600",
-                            },
-                        ),
-                        dbc.Tabs(
-                            [
-                                dbc.Tab(
-                                    html.Div([employment_education_corr], style={"padding": "25px"}),
-                                    label="Education ↔ Employment",
-                                ),
-                                dbc.Tab(
-                                    html.Div([economy_education_corr], style={"padding": "25px"}),
-                                    label="Education → Economy",
-                                ),
-                                dbc.Tab(
-                                    html.Div([economy_employment_corr], style={"padding": "25px"}),
-                                    label="Employment → Economy",
-                                ),
-                            ],
-                            id="tabs-correlations",
-                            active_tab="tab-0",
-                            className="mb-3",
-                        ),
-                    ],
-                    style={
-                        "backgroundColor": "#f2f5f9",
-                        "padding": "40px 60px",
-                        "borderRadius": "18px",
-                        "margin": "20px auto",
-                        "boxShadow": "0 4px 12px rgba(0, 0, 0, 0.1)",
-                        "maxWidth": "1200px",
-                    },
-                ),
-            ]
-        ),
-
-        # Footer
-        html.Footer(
-            [
-                html.Div("© 2025 EU Sustainability Goals Dashboard", 
-                        style={"marginBottom": "4px"}),
-                html.Div([
-                    "Data source: © European Union, Eurostat – ",
-                    html.A("https://ec.europa.eu/eurostat", 
-                        href="https://ec.europa.eu/eurostat", 
-                        target="_blank", 
-                        style={"color": "#6c757d", "textDecoration": "none"})
-                ], style={"fontSize": "13px", "color": "#6c757d"}),
-                html.Div("Data retrieved from Eurostat’s public datasets, processed and visualized by the author.",
-                        style={"fontSize": "12px", "color": "#adb5bd", "marginTop": "4px"})
-            ],
-            className="text-center text-muted py-3",
-            style={"marginTop": "50px"},
-        ),
-
-    ],
-    style={
-        "scrollBehavior": "smooth",
-        "backgroundColor": "#f8f9fa",
-        "fontFamily": "Inter, sans-serif",
-    },
-)
-
-
+metrics.instrument(app)
+profiling.enable_from_env(app)
+startup.mark("app setup")
+
+
+def build():
+    """Loads the data, builds every component and the layout, then starts warm-up."""
+    global dataframes, catalog, home_component
+    global gdp_component, gdp_trend_component, gdp_money_component
+    global education_component, education_trend_component, education_people_component
+    global employment_map_component, employment_trend_component, employ_vs_unemploy_component
+    global employment_education_corr, economy_education_corr, economy_employment_corr
+    global basic_tabs, correlation_tabs
+
+    # Read-only: each attribute access hands a component its own copy-on-write view.
+    # The panel is filled once here (fill_gaps, match_nearest) for the correlation views' "Fill gaps" option.
+    dataframes = load_all_data("data")
+    callback_cache.data_version = dataset_version("data")
+    data_api.register(server, dataframes, callback_cache.data_version)
+    # Years, countries and dropdown options of every indicator, shared by the components
+    catalog = Catalog(dataframes)
+    startup.mark("data load")
+
+    home_component = layout_home.layout
+    gdp_component = gdp_map.register_gdp_component(app, 
+        investment_df=dataframes.investment_gdp,
+        real_df=dataframes.real_gdp,
+        catalog=catalog
+    )
+    gdp_trend_component = gdp_trend.gdp_trend_component(app, 
+        investment_df=dataframes.with_regions("investment_gdp"),
+        real_df=dataframes.with_regions("real_gdp"),
+        catalog=catalog
+    )
+
+    gdp_money_component = gdp_money.gdp_money_component(app, 
+        investment_df=dataframes.investment_gdp,
+        real_df=dataframes.real_gdp,
+        catalog=catalog
+    )
+
+    education_component = education_map.education_component(app,
+        early_childhood_df=dataframes.early_childhood,
+        tertiary_df=dataframes.tertiary_educational,
+        adult_df=dataframes.adult_learning,
+        catalog=catalog)
+
+    education_trend_component = education_trend.education_trend_component(app,
+        early_childhood_df=dataframes.with_regions("early_childhood"),
+        tertiary_df=dataframes.with_regions("tertiary_educational"),
+        adult_df=dataframes.with_regions("adult_learning"),
+        catalog=catalog)
+
+    education_people_component = education_people.education_people_component(app,
+        early_childhood_df=dataframes.early_childhood,
+        tertiary_df=dataframes.tertiary_educational,
+        adult_df=dataframes.adult_learning,
+        catalog=catalog)
+
+
+    employment_map_component = employment_map.employment_map_component(app, 
+        emp_rate_df=dataframes.employment_rate,
+        long_term_unemp_df=dataframes.long_term_unemployment,
+        catalog=catalog)
+
+    employment_trend_component = employment_trend.employment_trend_component(app, 
+        emp_rate_df=dataframes.with_regions("employment_rate"),
+        long_term_unemp_df=dataframes.with_regions("long_term_unemployment"),
+        catalog=catalog)
+
+    employ_vs_unemploy_component = employment_vs_unemp.employ_vs_unemploy(app, dataframes.panel, dataframes.filled_panel, catalog)
+
+    employment_education_corr = employment_education_correlation.employment_education_correlation(app, dataframes.panel, dataframes.filled_panel, catalog)
+
+    economy_education_corr = education_economy_correlation.economy_education_correlation(app, dataframes.panel, dataframes.filled_panel, catalog)
+
+    economy_employment_corr = employment_economy_correlation.economy_employment_correlation(app, dataframes.panel, dataframes.filled_panel, catalog)
+    startup.mark("components")
+
+    # --- Tabs ---
+    basic_tabs = lazy_tabs.lazy_tabs(app, "tabs-basic", [
+        ("tab-gdp", "GDP", [gdp_component, gdp_trend_component, gdp_money_component]),
+        ("tab-education", "Education", [education_component, education_trend_component, education_people_component]),
+        ("tab-employment", "Employment", [employment_map_component, employment_trend_component, employ_vs_unemploy_component]),
+    ])
+
+    correlation_tabs = lazy_tabs.lazy_tabs(app, "tabs-correlations", [
+        ("tab-education-employment", "Education ↔ Employment", [employment_education_corr]),
+        ("tab-education-economy", "Education → Economy", [economy_education_corr]),
+        ("tab-employment-economy", "Employment → Economy", [economy_employment_corr]),
+    ])
+
+    # Static mode: dropdown callbacks answered from a prerendered bundle (see snapshot.py)
+    if os.environ.get("DASH_SNAPSHOT"):
+        snapshot.serve_static(app, os.environ["DASH_SNAPSHOT"])
+
+    # --- Layout ---
+    app.layout = html.Div(
+        [
+            # Home Section
+            html.Div(
+                home_component,
+                style={
+                    "backgroundColor": "#a6cbea",
+                    "padding": "50px 70px",
+                    "borderRadius": "18px",
+                    "margin": "40px auto 20px auto",
+                    "boxShadow": "0 6px 16px rgba(0, 0, 0, 0.1)",
+                    "maxWidth": "1200px",
+                },
+            ),
+
+            # --- Two Main Sections ---
+            html.Div(
+                [
+                    # Section 1: Basic Indicators
+                    html.Div(
+                        [
+                            html.H3(
+                                "Basic Indicators",
+                                style={
+                                    "textAlign": "center",
+                                    "color": "#2c3e50",
+                                    "marginBottom": "25px",
+                                    "fontWeight": "600",
+                                },
+                            ),
+                            basic_tabs,
+                        ],
+                        style={
+                            "backgroundColor": "#f2f5f9",
+                            "padding": "40px 60px",
+                            "borderRadius": "18px",
+                            "margin": "20px auto",
+                            "boxShadow": "0 4px 12px rgba(0, 0, 0, 0.1)",
+                            "maxWidth": "1200px",
+                        },
+                    ),
+
+                    # Section 2: Correlations & Effects
+                    html.Div(
+                        [
+                            html.H3(
+                                "Correlations Between Sectors",
+                                style={
+                                    "textAlign": "center",
+                                    "color": "#2c3e50",
+                                    "marginBottom": "25px",
+                                    "fontWeight": "600",
+                                },
+                            ),
+                            correlation_tabs,
+                        ],
+                        style={
+                            "backgroundColor": "#f2f5f9",
+                            "padding": "40px 60px",
+                            "borderRadius": "18px",
+                            "margin": "20px auto",
+                            "boxShadow": "0 4px 12px rgba(0, 0, 0, 0.1)",
+                            "maxWidth": "1200px",
+                        },
+                    ),
+                ]
+            ),
+
+            # Footer
+            html.Footer(
+                [
+                    html.Div("© 2025 EU Sustainability Goals Dashboard", 
+                            style={"marginBottom": "4px"}),
+                    html.Div([
+                        "Data source: © European Union, Eurostat – ",
+                        html.A("https://ec.europa.eu/eurostat", 
+                            href="https://ec.europa.eu/eurostat", 
+                            target="_blank", 
+                            style={"color": "#6c757d", "textDecoration": "none"})
+                    ], style={"fontSize": "13px", "color": "#6c757d"}),
+                    html.Div("Data retrieved from Eurostat’s public datasets, processed and visualized by the author.",
+                            style={"fontSize": "12px", "color": "#adb5bd", "marginTop": "4px"})
+                ],
+                className="text-center text-muted py-3",
+                style={"marginTop": "50px"},
+            ),
+
+        ],
+        style={
+            "scrollBehavior": "smooth",
+            "backgroundColor": "#f8f9fa",
+            "fontFamily": "Inter, sans-serif",
+        },
+    )
+
+
+    startup.mark("layout")
+    startup.report()
+
+    # Fill the cache with the most used figures while already serving (see warmup.py)
+    warmup.start()
+
+
+# The data is loaded and the components built in the background, started by each worker's
+# first request, so it answers /healthz from the start and /readyz once done (see readiness.py)
+readiness.start(server, build, background=os.environ.get("DASH_BACKGROUND_LOAD", "1") != "0")
 
 if __name__ == "__main__":
     app.run(debug=True)
@@ -1,46 +1,5 @@
-area_colors = {
-    # Nordics
-    "Finland": "#1f77b4",
-    "Sweden": "#1f77b4",
-    "Norway": "#1f77b4",
-    "Denmark": "#1f77b4",
-    "Iceland": "#1f77b4",
+from assets.countries import COUNTRIES
+from assets.regions import REGIONS
 
-    # British Isles
-    "United Kingdom": "#ff7f0e",
-    "Ireland": "#ff7f0e",
-
-    # Western Europe
-    "France": "#2ca02c",
-    "Belgium": "#2ca02c",
-    "Netherlands": "#2ca02c",
-    "Luxembourg": "#2ca02c",
-    "Germany": "#2ca02c",
-    "Switzerland": "#2ca02c",
-    "Austria": "#2ca02c",
-
-    # Southern Europe
-    "Portugal": "#d62728",
-    "Spain": "#d62728",
-    "Italy": "#d62728",
-    "Malta": "#d62728",
-    "Greece": "#d62728",
-    "Cyprus": "#d62728",
-
-    # Eastern Europe 
-    "Poland": "#9467bd",
-    "Czechia": "#9467bd",
-    "Slovakia": "#9467bd",
-    "Slovenia": "#9467bd",
-    "Hungary": "#9467bd",
-    "Romania": "#9467bd",
-    "Bulgaria": "#9467bd",
-    "Croatia": "#9467bd",
-    "Bosnia and Herzegovina": "#9467bd",
-    "Serbia": "#9467bd",
-    "Montenegro": "#9467bd",
-    "North Macedonia": "#9467bd",
-    "Estonia": "#9467bd",
-    "Latvia": "#9467bd",
-    "Lithuania": "#9467bd",
-}
+# Every country colored by its region
+area_colors = {name: REGIONS[region] for name, _, _, region, _ in COUNTRIES if region}
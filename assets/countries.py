@@ -0,0 +1,62 @@
+# --- Country dimension (data_loader.country_table) ---
+# Every country of the Eurostat files, as
+# (display name, ISO 3166 alpha-2, ISO 3166 alpha-3, region, line color).
+# The order decides the integer country IDs, so only ever append.
+COUNTRIES = [
+    # Nordics
+    ("Finland", "FI", "FIN", "Nordics", "#3182bd"),
+    ("Sweden", "SE", "SWE", "Nordics", "#e6550d"),
+    ("Norway", "NO", "NOR", "Nordics", "#756bb1"),
+    ("Denmark", "DK", "DNK", "Nordics", "#d62728"),
+    ("Iceland", "IS", "ISL", "Nordics", "#31a354"),
+
+    # British Isles
+    ("United Kingdom", "GB", "GBR", "British Isles", "#9ecae1"),
+    ("Ireland", "IE", "IRL", "British Isles", "#e377c2"),
+
+    # Western Europe
+    ("France", "FR", "FRA", "Western Europe", "#17becf"),
+    ("Belgium", "BE", "BEL", "Western Europe", "#1f77b4"),
+    ("Netherlands", "NL", "NLD", "Western Europe", "#dbdb8d"),
+    ("Luxembourg", "LU", "LUX", "Western Europe", "#c49c94"),
+    ("Germany", "DE", "DEU", "Western Europe", "#9467bd"),
+    ("Switzerland", "CH", "CHE", "Western Europe", "#636363"),
+    ("Austria", "AT", "AUT", "Western Europe", "#9edae5"),
+
+    # Southern Europe
+    ("Portugal", "PT", "PRT", "Southern Europe", "#637939"),
+    ("Spain", "ES", "ESP", "Southern Europe", "#bcbd22"),
+    ("Italy", "IT", "ITA", "Southern Europe", "#ffbb78"),
+    ("Malta", "MT", "MLT", "Southern Europe", "#c7c7c7"),
+    ("Greece", "GR", "GRC", "Southern Europe", "#7f7f7f"),
+    ("Cyprus", "CY", "CYP", "Southern Europe", "#98df8a"),
+
+    # Eastern Europe
+    ("Poland", "PL", "POL", "Eastern Europe", "#393b79"),
+    ("Czechia", "CZ", "CZE", "Eastern Europe", "#2ca02c"),
+    ("Slovakia", "SK", "SVK", "Eastern Europe", "#7b4173"),
+    ("Slovenia", "SI", "SVN", "Eastern Europe", "#843c39"),
+    ("Hungary", "HU", "HUN", "Eastern Europe", "#f7b6d2"),
+    ("Romania", "RO", "ROU", "Eastern Europe", "#8c6d31"),
+    ("Bulgaria", "BG", "BGR", "Eastern Europe", "#ff7f0e"),
+    ("Croatia", "HR", "HRV", "Eastern Europe", "#aec7e8"),
+    ("Bosnia and Herzegovina", "BA", "BIH", "Eastern Europe", "#fd8d3c"),
+    ("Serbia", "RS", "SRB", "Eastern Europe", "#969696"),
+    ("Montenegro", "ME", "MNE", "Eastern Europe", "#74c476"),
+    ("North Macedonia", "MK", "MKD", "Eastern Europe", "#6baed6"),
+    ("Estonia", "EE", "EST", "Eastern Europe", "#8c564b"),
+    ("Latvia", "LV", "LVA", "Eastern Europe", "#ff9896"),
+    ("Lithuania", "LT", "LTU", "Eastern Europe", "#c5b0d5"),
+
+    # No region yet
+    ("Albania", "AL", "ALB", None, None),
+    ("Liechtenstein", "LI", "LIE", None, None),
+    ("Türkiye", "TR", "TUR", None, None),
+]
+
+# EU / euro area totals of the Eurostat files (dropped at load)
+AGGREGATES = [
+    "European Union - 27 countries (from 2020)",
+    "Euro area – 20 countries (from 2023)",
+    "Euro area - 19 countries  (2015-2022)",
+]
@@ -1,46 +1,4 @@
-country_codes = {
-    # Nordics
-    "Finland": "FIN",
-    "Sweden": "SWE",
-    "Norway": "NOR",
-    "Denmark": "DNK",
-    "Iceland": "ISL",
+from assets.countries import COUNTRIES
 
-    # British Isles
-    "United Kingdom": "GBR",
-    "Ireland": "IRL",
-
-    # Western Europe
-    "France": "FRA",
-    "Belgium": "BEL",
-    "Netherlands": "NLD",
-    "Luxembourg": "LUX",
-    "Germany": "DEU",
-    "Switzerland": "CHE",
-    "Austria": "AUT",
-
-    # Southern Europe
-    "Portugal": "PRT",
-    "Spain": "ESP",
-    "Italy": "ITA",
-    "Malta": "MLT",
-    "Greece": "GRC",
-    "Cyprus": "CYP",
-
-    # Eastern Europe
-    "Poland": "POL",
-    "Czechia": "CZE",
-    "Slovakia": "SVK",
-    "Slovenia": "SVN",
-    "Hungary": "HUN",
-    "Romania": "ROU",
-    "Bulgaria": "BGR",
-    "Croatia": "HRV",
-    "Bosnia and Herzegovina": "BIH",
-    "Serbia": "SRB",
-    "Montenegro": "MNE",
-    "North Macedonia": "MKD",
-    "Estonia": "EST",
-    "Latvia": "LVA",
-    "Lithuania": "LTU"
-}
+# Display name -> ISO 3166 alpha-3
+country_codes = {name: iso3 for name, _, iso3, _, _ in COUNTRIES}
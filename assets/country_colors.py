@@ -1,37 +1,4 @@
-country_colors = {
-    "Belgium": "#1f77b4",
-    "Bulgaria": "#ff7f0e",
-    "Czechia": "#2ca02c",
-    "Denmark": "#d62728",
-    "Germany": "#9467bd",
-    "Estonia": "#8c564b",
-    "Ireland": "#e377c2",
-    "Greece": "#7f7f7f",
-    "Spain": "#bcbd22",
-    "France": "#17becf",
-    "Croatia": "#aec7e8",
-    "Italy": "#ffbb78",
-    "Cyprus": "#98df8a",
-    "Latvia": "#ff9896",
-    "Lithuania": "#c5b0d5",
-    "Luxembourg": "#c49c94",
-    "Hungary": "#f7b6d2",
-    "Malta": "#c7c7c7",
-    "Netherlands": "#dbdb8d",
-    "Austria": "#9edae5",
-    "Poland": "#393b79",
-    "Portugal": "#637939",
-    "Romania": "#8c6d31",
-    "Slovenia": "#843c39",
-    "Slovakia": "#7b4173",
-    "Finland": "#3182bd",
-    "Sweden": "#e6550d",
-    "Iceland": "#31a354",
-    "Norway": "#756bb1",
-    "Switzerland": "#636363",
-    "United Kingdom": "#9ecae1",
-    "Bosnia and Herzegovina": "#fd8d3c",
-    "Montenegro": "#74c476",
-    "North Macedonia": "#6baed6",
-    "Serbia": "#969696"
-}
+from assets.countries import COUNTRIES
+
+# Line color of each country (the others get plotly's default colors)
+country_colors = {name: color for name, _, _, _, color in COUNTRIES if color}
@@ -1,12 +1,13 @@
-# --- Define mapping from country → region ---
-region_map = {
-    "Nordics": ["Finland", "Sweden", "Norway", "Denmark", "Iceland"],
-    "British Isles": ["United Kingdom", "Ireland"],
-    "Western Europe": ["France", "Belgium", "Netherlands", "Luxembourg", "Germany", "Switzerland", "Austria"],
-    "Southern Europe": ["Portugal", "Spain", "Italy", "Malta", "Greece", "Cyprus"],
-    "Eastern Europe": [
-        "Poland", "Czechia", "Slovakia", "Slovenia", "Hungary", "Romania", "Bulgaria",
-        "Croatia", "Bosnia and Herzegovina", "Serbia", "Montenegro",
-        "North Macedonia", "Estonia", "Latvia", "Lithuania"
-    ]
-}
\ No newline at end of file
+from assets.countries import COUNTRIES
+
+# --- Regions, in picker order, with their marker color (area_colors) ---
+REGIONS = {
+    "Nordics": "#1f77b4",
+    "British Isles": "#ff7f0e",
+    "Western Europe": "#2ca02c",
+    "Southern Europe": "#d62728",
+    "Eastern Europe": "#9467bd",
+}
+
+# --- Define mapping from region → countries (from assets/countries.py) ---
+region_map = {region: [name for name, _, _, r, _ in COUNTRIES if r == region] for region in REGIONS}
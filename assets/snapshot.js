@@ -0,0 +1,62 @@
+// Static mode (see snapshot.py): callbacks answered from a prerendered bundle
+(function () {
+    const manifests = {};
+
+    function manifest(base) {
+        if (!manifests[base]) {
+            manifests[base] = fetch(base + "/manifest.json").then((response) => response.json());
+        }
+        return manifests[base];
+    }
+
+    async function load(base, file) {
+        const response = await fetch(base + "/" + file);
+        let bytes = new Uint8Array(await response.arrayBuffer());
+        // Hosts that serve .gz with Content-Encoding: gzip have already inflated it
+        if (bytes[0] === 0x1f && bytes[1] === 0x8b) {
+            const stream = new Blob([bytes]).stream().pipeThrough(new DecompressionStream("gzip"));
+            bytes = new Uint8Array(await new Response(stream).arrayBuffer());
+        }
+        return JSON.parse(new TextDecoder().decode(bytes));
+    }
+
+    // Multi-select values were prerendered one at a time: every combination of single picks
+    function combinations(values, multi) {
+        let result = [[]];
+        values.forEach((value, i) => {
+            const picks = multi[i] ? (value && value.length ? value.map((v) => [v]) : [[]]) : [value];
+            result = result.flatMap((prefix) => picks.map((pick) => prefix.concat([pick])));
+        });
+        return result;
+    }
+
+    // Figures of the single picks drawn together, with the first one's layout
+    function merge(parts) {
+        return parts.slice(1).reduce((merged, part) => merged.map((value, i) =>
+            value && value.data && part[i] && part[i].data
+                ? {data: value.data.concat(part[i].data), layout: value.layout}
+                : value
+        ), parts[0]);
+    }
+
+    async function respond(base, output, values) {
+        const noUpdate = window.dash_clientside.no_update;
+        const entry = (await manifest(base)).callbacks[output];
+        if (!entry) {
+            return noUpdate;
+        }
+        const files = combinations(values, entry.multi).map((combination) => entry.files[JSON.stringify(combination)]);
+        if (files.some((file) => !file)) {
+            return noUpdate;
+        }
+        const parts = await Promise.all(files.map((file) => load(base, file)));
+        if (parts.length === 1) {
+            return parts[0];
+        }
+        const multiOutput = output.startsWith("..");
+        const merged = merge(parts.map((part) => (multiOutput ? part : [part])));
+        return multiOutput ? merged : merged[0];
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {snapshot: {respond: respond}});
+})();
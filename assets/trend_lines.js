@@ -0,0 +1,190 @@
+// Trend charts drawn in the browser (browser_trends in components/trend_lines.py):
+// the figures LineChart draws on the server, from rows sent once in a dcc.Store
+(function () {
+    function substitute(value, spec, name, color) {
+        if (typeof value === "string") {
+            return value.split(spec.name).join(name).split(spec.color).join(color);
+        }
+        if (Array.isArray(value)) {
+            return value.map((v) => substitute(v, spec, name, color));
+        }
+        if (value && typeof value === "object") {
+            const result = {};
+            Object.keys(value).forEach((key) => { result[key] = substitute(value[key], spec, name, color); });
+            return result;
+        }
+        return value;
+    }
+
+    // Rows of the picked series, in stored order
+    function pick(columns, picked) {
+        const bands = new Map((columns.band || []).map((row, i) => [row, i]));
+        const rows = [];
+        columns.series.forEach((code, i) => {
+            const series = columns.names[code];
+            if (!picked.has(series)) {
+                return;
+            }
+            rows.push({
+                series: series,
+                color: columns.color ? columns.names[columns.color[i]] : series,
+                x: columns.x[i],
+                y: columns.y[i],
+                low: bands.has(i) ? columns.low[bands.get(i)] : null,
+                high: bands.has(i) ? columns.high[bands.get(i)] : null,
+            });
+        });
+        return rows;
+    }
+
+    // pandas groupby(sort=False): groups in order of first appearance
+    function groupBy(rows, keyOf) {
+        const groups = new Map();
+        rows.forEach((row) => {
+            const key = keyOf(row);
+            if (!groups.has(key)) {
+                groups.set(key, []);
+            }
+            groups.get(key).push(row);
+        });
+        return groups;
+    }
+
+    function byX(a, b) {
+        return a.x - b.x;
+    }
+
+    function compare(a, b) {
+        return a < b ? -1 : a > b ? 1 : 0;
+    }
+
+    // figures.Series: one copy of the skeleton trace per color
+    function lines(spec, rows) {
+        const colors = Object.assign({}, spec.colorMap);
+        const data = [];
+        groupBy(rows, (row) => row.color).forEach((part, name) => {
+            if (colors[name] == null) {
+                colors[name] = spec.colorway[Object.keys(colors).length % spec.colorway.length];
+            }
+            data.push(Object.assign(substitute(spec.trace, spec, String(name), colors[name]), {
+                x: part.map((row) => row.x),
+                y: part.map((row) => row.y),
+            }));
+        });
+        return {data: data, layout: spec.layout};
+    }
+
+    // with_gaps: rows by series and x, with an empty point after each series
+    function withGaps(rows) {
+        const merged = [];
+        const groups = groupBy(rows, (row) => row.series);
+        Array.from(groups.keys()).sort(compare).forEach((series) => {
+            const part = groups.get(series).slice().sort(byX);
+            part.forEach((row) => merged.push(row));
+            merged.push(Object.assign({}, part[part.length - 1], {x: null, y: null}));
+        });
+        return merged;
+    }
+
+    // LineChart._merged: every line of a color in one WebGL trace
+    function merged(spec, rows) {
+        const data = [];
+        const colorOf = (name) => (name in spec.colorMap ? spec.colorMap[name] : spec.lineColor);
+        if (spec.sameColor) {
+            const points = withGaps(rows);
+            const names = Array.from(new Set(points.map((row) => row.series)));
+            const index = new Map(names.map((name, i) => [name, i]));
+            const colorscale = [];
+            names.forEach((name, i) => {
+                colorscale.push([i / names.length, colorOf(name)], [(i + 1) / names.length, colorOf(name)]);
+            });
+            data.push({
+                type: "scattergl", x: points.map((row) => row.x), y: points.map((row) => row.y),
+                text: points.map((row) => row.series), mode: "lines+markers",
+                line: {color: spec.lineColor, width: 1},
+                marker: {color: points.map((row) => index.get(row.series)), colorscale: colorscale,
+                         cmin: -0.5, cmax: names.length - 0.5},
+                hovertemplate: spec.hovertemplate, showlegend: false,
+            });
+            names.forEach((name) => {
+                data.push({
+                    type: "scatter", x: [null], y: [null], mode: spec.mode, name: name,
+                    line: {color: colorOf(name)}, marker: {color: colorOf(name)}, hoverinfo: "skip",
+                });
+            });
+        } else {
+            groupBy(rows, (row) => row.color).forEach((part, name) => {
+                const points = withGaps(part);
+                data.push({
+                    type: "scattergl", x: points.map((row) => row.x), y: points.map((row) => row.y),
+                    text: points.map((row) => row.series), mode: spec.mode, name: name, legendgroup: name,
+                    line: {color: colorOf(name)}, hovertemplate: spec.hovertemplate,
+                });
+            });
+        }
+        return {data: data, layout: Object.assign({template: spec.layout.template}, spec.mergedLayout)};
+    }
+
+    function translucent(color) {
+        if (typeof color === "string" && color.length === 7 && color[0] === "#") {
+            const [r, g, b] = [1, 3, 5].map((i) => parseInt(color.slice(i, i + 2), 16));
+            return "rgba(" + r + ", " + g + ", " + b + ", 0.15)";
+        }
+        return "rgba(156, 163, 175, 0.15)";
+    }
+
+    // LineChart._with_bands: min-max band under every series that has one, line dotted
+    function withBands(spec, fig, rows) {
+        const colors = {};
+        fig.data.forEach((trace) => { colors[trace.name] = (trace.line || {}).color; });
+        const bands = [];
+        const banded = new Set();
+        const banding = rows.filter((row) => row.low != null && row.high != null);
+        groupBy(banding, (row) => row.series + "\u0000" + row.color).forEach((part) => {
+            part = part.slice().sort(byX);
+            const x = part.map((row) => row.x);
+            const name = part[0].series;
+            const color = colors[part[0].color] || (part[0].color in spec.colorMap ? spec.colorMap[part[0].color] : spec.lineColor);
+            bands.push({
+                type: "scatter", x: x.concat(x.slice().reverse()),
+                y: part.map((row) => row.high).concat(part.map((row) => row.low).reverse()),
+                fill: "toself", fillcolor: translucent(color), line: {width: 0},
+                hoverinfo: "skip", showlegend: false,
+            });
+            banded.add(name);
+        });
+        const data = fig.data.map((trace) => (banded.has(trace.name)
+            ? Object.assign({}, trace, {line: Object.assign({}, trace.line, {dash: "dot"})})
+            : trace));
+        return {data: bands.concat(data), layout: fig.layout};
+    }
+
+    function draw(selected, charts) {
+        const picked = new Set([].concat(selected || []));
+        return (charts || []).map((chart) => {
+            if (!picked.size) {
+                return {};
+            }
+            const spec = chart.spec;
+            const rows = pick(chart.rows, picked);
+            const count = new Set(rows.map((row) => row.series)).size;
+            let fig = count <= spec.maxSeries ? lines(spec, rows) : merged(spec, rows);
+            if (rows.some((row) => row.low != null)) {
+                fig = withBands(spec, fig, rows);
+            }
+            if (chart.legendrank) {
+                fig.data.forEach((trace) => {
+                    if (trace.name in chart.legendrank) {
+                        trace.legendrank = chart.legendrank[trace.name];
+                    }
+                });
+            }
+            if (chart.traces) {
+                fig = {data: fig.data.concat(chart.traces), layout: fig.layout};
+            }
+            return fig;
+        });
+    }
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {trends: {draw: draw}});
+})();
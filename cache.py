@@ -0,0 +1,298 @@
+import functools
+import glob
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from limits import degraded
+
+# Files whose contents decide what the callbacks and the data API return, relative to this folder
+SOURCES = ["data_loader.py", "data_api.py", "correlations.py", "catalog.py", "cache.py", "components/*.py", "assets/*.py"]
+
+
+@functools.cache
+def code_version():
+    """Short hash of SOURCES. Cache keys, snapshot versions and API ETags include it, so new code never serves old results."""
+    root = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for path in sorted(p for pattern in SOURCES for p in glob.glob(os.path.join(root, pattern))):
+        digest.update(os.path.relpath(path, root).replace(os.sep, "/").encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+class CallbackCache:
+    """
+    Memoizes callback outputs in a local SQLite file.
+    SQLite handles locking, so the cache is shared by every thread and
+    every worker process that points at the same file.
+    Entries expire after `ttl` seconds and the least recently used ones
+    are evicted once the file holds more than `max_bytes` of values.
+
+    Identical calls that arrive while one is being computed wait for it
+    instead of computing again: threads of a process share the result
+    directly, other processes see a lease row and poll for the entry.
+    A lease older than `lease` seconds is taken to be abandoned.
+
+    Nothing touches the disk until the first lookup: the folder, the file
+    and its tables are created then, so importing this module is free.
+    `code_version` defaults to this tree's code_version().
+    """
+
+    def __init__(self, path, ttl=3600, max_bytes=256 * 1024 * 1024, lease=60, code_version=None):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.lease = lease
+        self.data_version = ""
+        self.code_version = code_version
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._flights = {}
+        self._created = False
+
+    def _create(self, conn):
+        with self._lock:
+            if self._created:
+                return
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB, size INTEGER, created REAL, accessed REAL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, expires REAL)")
+            self._created = True
+
+    def _connect(self):
+        # sqlite3 connections must not be shared between threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._create(conn)
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def make_key(self, name, args, kwargs):
+        version = code_version() if self.code_version is None else self.code_version
+        raw = json.dumps([name, self.data_version, version, args, kwargs], sort_keys=True, default=_json_default)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Returns (True, value) on a hit and (False, None) on a miss."""
+        conn = self._connect()
+        row = conn.execute("SELECT value, created FROM entries WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return False, None
+
+        now = time.time()
+        if self.ttl and now - row[1] > self.ttl:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            return False, None
+
+        conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        return True, pickle.loads(row[0])
+
+    def set(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+            (key, blob, len(blob), now, now),
+        )
+        self._evict(conn, now)
+
+    def _evict(self, conn, now):
+        if self.ttl:
+            conn.execute("DELETE FROM entries WHERE created < ?", (now - self.ttl,))
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop least recently used entries until we are back under the limit
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed").fetchall():
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def clear(self):
+        conn = self._connect()
+        conn.execute("DELETE FROM entries")
+        conn.execute("DELETE FROM leases")
+
+    def _acquire(self, key):
+        """Takes the lease on `key`; False while another process holds it."""
+        now = time.time()
+        cursor = self._connect().execute(
+            "INSERT INTO leases (key, expires) VALUES (?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET expires = excluded.expires WHERE leases.expires < ?",
+            (key, now + self.lease, now),
+        )
+        return cursor.rowcount > 0
+
+    def _release(self, key):
+        self._connect().execute("DELETE FROM leases WHERE key = ?", (key,))
+
+    def _await_other(self, key):
+        """
+        Polls for the entry another process is computing. Returns (True, value)
+        once it lands and (False, None) when the lease is gone without one
+        (error, eviction, expiry) and this process got the lease instead.
+        """
+        delay = 0.01
+        while not self._acquire(key):
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+            hit, value = self.get(key)
+            if hit:
+                return True, value
+        return False, None
+
+    def _compute(self, key, cache_name, func, args, kwargs, limit):
+        try:
+            hit, value = self._await_other(key)
+            leased = not hit
+        except sqlite3.Error:
+            # Computed without the lease, which may still be another process's: leave it alone
+            hit, value, leased = False, None, False
+        if hit:
+            self._count(cache_name, "coalesced")
+            return value
+
+        def call():
+            return _plain(func(*args, **kwargs)), degraded()
+
+        try:
+            self._count(cache_name, "misses")
+            value, partial = limit.run(call) if limit else call()
+            try:
+                # Degraded results (see limits.py) are served but never stored
+                if not partial:
+                    self.set(key, value)
+            except (sqlite3.Error, pickle.PicklingError):
+                pass
+            return value
+        finally:
+            if leased:
+                try:
+                    self._release(key)
+                except sqlite3.Error:
+                    pass
+
+    def _count(self, name, field):
+        with self._lock:
+            counters = self._stats.setdefault(name, {"hits": 0, "misses": 0, "coalesced": 0})
+            counters[field] += 1
+
+    def stats(self):
+        """
+        Counters of this process, per memoized function: hits, misses
+        (computed here) and coalesced (served by a computation already in flight).
+        """
+        with self._lock:
+            return {name: dict(counters) for name, counters in self._stats.items()}
+
+    def memoize(self, name=None, limit=None):
+        """
+        Decorator caching a pure function of (dataset version, arguments).
+        Put it below @app.callback so Dash registers the cached function.
+        With `limit` (a limits.budget), computations run within that
+        budget, while cache hits and coalesced calls skip it.
+        """
+
+        def decorator(func):
+            cache_name = name or f"{func.__module__}.{func.__qualname__}"
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                key = self.make_key(cache_name, args, kwargs)
+                try:
+                    hit, value = self.get(key)
+                except sqlite3.Error:
+                    hit, value = False, None
+
+                if hit:
+                    self._count(cache_name, "hits")
+                    return value
+
+                # Single flight: the first thread computes, the others wait for its result
+                with self._lock:
+                    flight = self._flights.get(key)
+                    leader = flight is None
+                    if leader:
+                        flight = self._flights[key] = _Flight()
+                if not leader:
+                    self._count(cache_name, "coalesced")
+                    return flight.wait()
+
+                try:
+                    flight.value = self._compute(key, cache_name, func, args, kwargs, limit)
+                    return flight.value
+                except BaseException as error:
+                    flight.error = error
+                    raise
+                finally:
+                    with self._lock:
+                        del self._flights[key]
+                    flight.done.set()
+
+            return wrapper
+
+        return decorator
+
+
+class _Flight:
+    """One computation in progress, and the threads waiting on it."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+    def wait(self):
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+def _json_default(value):
+    # numpy scalars (e.g. years from .unique()) must key the same as the ints Dash sends
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+def _plain(value):
+    # Figures are stored as plain dicts: unpickling a go.Figure re-runs validation
+    from plotly.basedatatypes import BaseFigure
+
+    if isinstance(value, BaseFigure):
+        return value.to_dict()
+    if isinstance(value, tuple):
+        return tuple(_plain(v) for v in value)
+    return value
+
+
+callback_cache = CallbackCache(
+    os.environ.get("DASH_CACHE_PATH", os.path.join(".cache", "callbacks.sqlite")),
+    ttl=float(os.environ.get("DASH_CACHE_TTL", 3600)),
+    max_bytes=int(float(os.environ.get("DASH_CACHE_MAX_MB", 256)) * 1024 * 1024),
+    lease=float(os.environ.get("DASH_CACHE_LEASE", 60)),
+)
+memoize = callback_cache.memoize
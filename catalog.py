@@ -0,0 +1,98 @@
+"""
+Which years and countries each indicator has, and the dropdown options
+built from them. app.py builds it once per loaded dataset and hands it to
+the component factories, so they no longer scan their frames for years and
+countries.
+
+    catalog.years("real_gdp", "investment_gdp")                 # years either one has
+    catalog.years("real_gdp", "investment_gdp", how="all")      # years both have
+    catalog.year_options("employment_rate")                     # [{"label": "2024", "value": 2024}, ...]
+    catalog.country_options("real_gdp", regions=True)           # countries, then region averages
+
+Which to use: how="any" where each chart of a view is drawn on its own
+(maps, trends, bars), how="all" where one chart needs every indicator at
+once (scatter plots, the GDP coins).
+
+Option lists are built once per combination and the same list object is
+handed to every dropdown that asks for it, so never modify one.
+"""
+from data_loader import country_table, indicator_name
+
+NO_REGION = "Select region"
+
+
+class Catalog:
+    def __init__(self, dataframes):
+        self._years = {}
+        self._countries = {}
+        for file, df in dataframes.items():
+            name = indicator_name(file)
+            self._years[name] = frozenset(df["year"].unique().tolist())
+            self._countries[name] = frozenset(df["country"].unique().tolist())
+        self._options = {}
+
+    @property
+    def indicators(self):
+        return sorted(self._years)
+
+    def _combine(self, sets, indicators, how):
+        unknown = [name for name in indicators if name not in sets]
+        if unknown:
+            raise KeyError(f"unknown indicators {unknown}")
+        if how not in ("any", "all"):
+            raise ValueError(f"how must be 'any' or 'all', got {how!r}")
+        picked = [sets[name] for name in indicators]
+        return frozenset.union(*picked) if how == "any" else frozenset.intersection(*picked)
+
+    def years(self, *indicators, how="any"):
+        """Years with data for any / all of `indicators`, oldest first."""
+        return tuple(sorted(self._combine(self._years, indicators, how)))
+
+    def countries(self, *indicators, how="any"):
+        """Countries with data for any / all of `indicators`, by name."""
+        return tuple(sorted(self._combine(self._countries, indicators, how)))
+
+    def _shared(self, key, build):
+        options = self._options.get(key)
+        if options is None:
+            options = self._options[key] = build()
+        return options
+
+    def year_options(self, *indicators, how="any"):
+        """Year dropdown options, newest first."""
+        key = ("years", tuple(sorted(indicators)), how)
+        return self._shared(key, lambda: [
+            {"label": str(year), "value": year} for year in reversed(self.years(*indicators, how=how))
+        ])
+
+    def country_options(self, *indicators, how="any", regions=False):
+        """
+        Country dropdown options. With `regions`, the regions that have one
+        of those countries follow as "<region> (average)" (see
+        data_loader.region_aggregates).
+        """
+        key = ("countries", tuple(sorted(indicators)), how, regions)
+
+        def build():
+            countries = self.countries(*indicators, how=how)
+            options = [{"label": c, "value": c} for c in countries]
+            if regions:
+                table = country_table()
+                members = table.loc[~table["aggregate"] & table["name"].isin(countries), "region"]
+                options += [
+                    {"label": f"{r} (average)", "value": r}
+                    for r in table.loc[table["aggregate"] & table["region"].notna(), "name"]
+                    if r in set(members)
+                ]
+            return options
+
+        return self._shared(key, build)
+
+    def region_options(self):
+        """Region highlight options of the scatter plots, after a NO_REGION entry."""
+        def build():
+            table = country_table()
+            names = table.loc[table["aggregate"] & table["region"].notna(), "name"].tolist()
+            return [{"label": r, "value": r} for r in [NO_REGION] + names]
+
+        return self._shared(("regions",), build)
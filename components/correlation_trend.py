@@ -0,0 +1,103 @@
+import json
+
+import pandas as pd
+from dash.dependencies import Input, Output, State
+
+from components.figures import SKELETONS, with_layout
+from limits import budget
+
+# Shared by the scatter and R² callbacks of the correlation views, so a burst of them
+# leaves threads for the cheap callbacks. Overloaded calls skip the OLS trendlines
+# when figures are built with plotly express; skeleton figures have none to skip.
+CORRELATION = budget("correlation", concurrency=2, queue=8, timeout=5, degrade=not SKELETONS)
+
+# Line color and its 95% band fill, per line of the chart
+LINE_COLORS = [("#2563EB", "rgba(37, 99, 235, 0.15)"), ("#DC2626", "rgba(220, 38, 38, 0.15)")]
+
+_layout = None
+
+
+def _base_layout():
+    # Laid out once through plotly so the chart gets the same template as the px figures
+    global _layout
+    if _layout is None:
+        import plotly.graph_objects as go
+
+        _layout = go.Figure(layout=dict(
+            xaxis_title="Year",
+            yaxis=dict(title="R²", range=[0, 1]),
+            height=380,
+            hovermode="x unified",
+            legend=dict(orientation="h", yanchor="bottom", y=1.02, xanchor="right", x=1),
+        )).to_dict()["layout"]
+    return _layout
+
+
+def r2_over_time(trends, lines, title):
+    """
+    R² per year with its 95% band, one line per entry of `lines`
+    ({label: (x column, y column)}), from correlations.correlation_by_year().
+    """
+    data = []
+    for (label, (x, y)), (color, fill) in zip(lines.items(), LINE_COLORS):
+        trend = trends[(trends["x"] == x) & (trends["y"] == y)]
+        band = trend.dropna(subset=["r2_low", "r2_high"])
+        years = band["year"].tolist()
+        data.append(dict(
+            type="scatter", x=years + years[::-1], y=band["r2_high"].tolist() + band["r2_low"].tolist()[::-1],
+            fill="toself", fillcolor=fill, line=dict(width=0), hoverinfo="skip",
+            legendgroup=label, showlegend=False,
+        ))
+        data.append(dict(
+            type="scatter", x=trend["year"].tolist(), y=trend["r2"].tolist(), mode="lines+markers",
+            name=label, legendgroup=label, line=dict(color=color),
+            customdata=trend[["r", "n"]].values.tolist(),
+            hovertemplate=f"{label}: R² = %{{y:.2f}} (r = %{{customdata[0]:.2f}}, n = %{{customdata[1]}})<extra></extra>",
+        ))
+
+    return with_layout({"data": data, "layout": _base_layout()}, title={"text": title})
+
+
+def r2_subtitle(r2, points):
+    """The line under a scatter's title: its R², or why there is none."""
+    if not points:
+        return "No data for this year and lag"
+    if pd.isna(r2):
+        return "Too few datapoints for R²"
+    return f"Coefficient of determination of all datapoints: R² = {r2:.2f}"
+
+
+def group_years(app, catalog, group_id, year_id, groups, *indicators, lag_id=None, max_lag=0):
+    """
+    Years a scatter view can show for each entry of `groups` ({label:
+    indicator}): those where the group's indicator has data, and
+    `indicators` all have data `lag` years later. Returns {label: years}
+    at lag 0. Picking a group (or, with `lag_id`, a lag up to `max_lag`)
+    swaps the year dropdown's options in the browser, keeping the year if
+    it is still there and falling back to the latest one otherwise.
+    """
+    later = set(catalog.years(*indicators, how="all"))
+
+    def lagged(col, lag):
+        return tuple(year for year in catalog.years(col) if year + lag in later)
+
+    options = {
+        label: [[{"label": str(year), "value": year} for year in reversed(lagged(col, lag))] for lag in range(max_lag + 1)]
+        for label, col in groups.items()
+    }
+    inputs = [Input(group_id, "value")] + ([Input(lag_id, "value")] if lag_id else [])
+    app.clientside_callback(
+        """
+        function(group, %s year) {
+            const options = (%s[group] || [])[%s] || [];
+            const values = options.map((option) => option.value);
+            return [options, values.includes(year) ? year : (values.length ? values[0] : null)];
+        }
+        """ % ("lag," if lag_id else "", json.dumps(options), "lag || 0" if lag_id else "0"),
+        Output(year_id, "options"),
+        Output(year_id, "value"),
+        *inputs,
+        State(year_id, "value"),
+        prevent_initial_call=True,
+    )
+    return {label: lagged(col, 0) for label, col in groups.items()}
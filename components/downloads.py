@@ -0,0 +1,160 @@
+import io
+import itertools
+import json
+from urllib.parse import quote
+
+import pandas as pd
+from dash import html
+from dash.dependencies import Output
+from flask import Response, request
+
+from data_api import CHUNK_ROWS
+
+# view name -> function returning the DataFrame behind that view's figures, or yielding it in
+# blocks with the same columns (see by_country)
+VIEWS = {}
+# Bookkeeping columns of the loaded frames, never exported
+INTERNAL = ["country_id", "source_file"]
+FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def stacked(frames, key="indicator"):
+    """One long table from {name: df}, with the name in column `key`."""
+    return pd.concat([df.assign(**{key: name}) for name, df in frames.items()], ignore_index=True)
+
+
+def by_country(frame):
+    """
+    A download `frame(countries)` run for one picked country at a time, so
+    an export of many countries is built and written block by block instead
+    of as one table.
+    """
+    def blocks(countries):
+        if isinstance(countries, str):
+            countries = [countries]
+        if not countries:
+            yield frame([])  # no rows, but the columns
+        for country in countries or []:
+            yield frame([country])
+
+    return blocks
+
+
+def _blocks(result):
+    """A view's DataFrame, or the blocks it yields, without INTERNAL columns."""
+    for df in [result] if isinstance(result, pd.DataFrame) else result:
+        yield df.drop(columns=INTERNAL, errors="ignore")
+
+
+def stream_csv(blocks):
+    """CSV written CHUNK_ROWS rows at a time, with the header of the first block."""
+    header = True
+    for df in blocks:
+        for start in range(0, len(df), CHUNK_ROWS):
+            yield df.iloc[start:start + CHUNK_ROWS].to_csv(index=False, header=header)
+            header = False
+    if header:
+        yield df.to_csv(index=False)  # no rows: header only
+
+
+def stream_parquet(blocks):
+    """Parquet file written one row group of up to CHUNK_ROWS rows at a time, with the schema of the first block."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    buffer = io.BytesIO()
+    writer = schema = None
+    for df in blocks:
+        if writer is None:
+            schema = pa.Schema.from_pandas(df, preserve_index=False)
+            writer = pq.ParquetWriter(buffer, schema)
+        for start in range(0, len(df), CHUNK_ROWS):
+            writer.write_table(pa.Table.from_pandas(df.iloc[start:start + CHUNK_ROWS], schema=schema, preserve_index=False))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    writer.close()
+    yield buffer.getvalue()  # footer
+
+
+def _error(message, status):
+    return Response(json.dumps({"error": message}), status=status, mimetype="application/json")
+
+
+def export_view(view, fmt):
+    """
+    GET /export/<view>.<csv|parquet>?args=<JSON list of the view's input values>
+    Plain Flask route, so a large export streams from its own request thread
+    and never waits on (or holds up) a Dash callback.
+    """
+    if view not in VIEWS:
+        return _error(f"unknown view {view!r}", 404)
+    if fmt not in FORMATS:
+        return _error(f"unknown format {fmt!r}, use csv or parquet", 404)
+    try:
+        args = json.loads(request.args.get("args", "[]"))
+        blocks = _blocks(VIEWS[view](*args))
+        # The first block is built before the response starts, so bad arguments are a 400
+        first = next(blocks, None)
+    except (ValueError, TypeError, KeyError) as e:
+        return _error(f"bad arguments for {view}: {e}", 400)
+    blocks = itertools.chain([pd.DataFrame() if first is None else first], blocks)
+
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return _error("Parquet export needs pyarrow installed on the server", 406)
+        body = stream_parquet(blocks)
+    else:
+        body = stream_csv(blocks)
+
+    response = Response(body, mimetype=FORMATS[fmt])
+    response.headers["Content-Disposition"] = f'attachment; filename="{view}.{fmt}"'
+    return response
+
+
+def _href(view, fmt, values):
+    # Dropdown values built from a DataFrame are numpy scalars
+    args = json.dumps(values, separators=(",", ":"), default=lambda value: value.item())
+    return f"/export/{view}.{fmt}?args={quote(args, safe='')}"
+
+
+def download_links(app, view, frame, inputs, defaults):
+    """
+    "Download CSV / Parquet" links for a component.
+    `frame(*values)` returns the data behind the component's figures for the
+    values of `inputs` (the same Inputs as its figure callback), or yields it
+    in blocks with the same columns, and
+    `defaults` are their initial values. The links are rewritten in the
+    browser whenever an input changes, so they cost no callback.
+    """
+    if "export_view" not in app.server.view_functions:
+        app.server.add_url_rule("/export/<view>.<fmt>", "export_view", export_view, methods=["GET"])
+    VIEWS[view] = frame
+
+    ids = {fmt: f"{view}-download-{fmt}" for fmt in FORMATS}
+    app.clientside_callback(
+        """
+        function(...values) {
+            const args = "?args=" + encodeURIComponent(JSON.stringify(values));
+            return [%s];
+        }
+        """ % ", ".join(f'"/export/{view}.{fmt}" + args' for fmt in FORMATS),
+        [Output(ids[fmt], "href") for fmt in FORMATS],
+        inputs,
+        prevent_initial_call=True,
+    )
+
+    link_style = {"color": "#4B5563", "fontSize": "13px", "marginLeft": "12px"}
+    return html.Div(
+        ["Download data:"] + [
+            html.A(fmt.upper() if fmt == "csv" else fmt.capitalize(), id=ids[fmt],
+                   href=_href(view, fmt, defaults), download=f"{view}.{fmt}", style=link_style)
+            for fmt in FORMATS
+        ],
+        style={"textAlign": "right", "fontSize": "13px", "color": "#9CA3AF", "margin": "4px 0 10px 0"},
+    )
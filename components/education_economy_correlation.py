@@ -1,30 +1,180 @@
 from dash import html, dcc
-import plotly.express as px
-import pandas as pd
 from dash.dependencies import Input, Output
+from cache import memoize
+from warmup import warm
+from metrics import lap
+from components.figures import Series, highlight, hollow, with_layout
+from components.downloads import download_links, stacked
+from components.correlation_trend import CORRELATION, group_years, r2_over_time, r2_subtitle
+from correlations import MAX_LAG, lagged_correlation
+from data_loader import country_table, flag_columns, imputed
 from assets.area_colors import area_colors
 from assets.country_codes import country_codes
 from assets.regions import region_map
 
 
-def economy_education_correlation(app, early_childhood_df, tertiary_df, adult_df, real_df, investment_df):
-    
-    # Remove EU aggregates
-    drop_regions = [
-        "European Union - 27 countries (from 2020)",
-        "Euro area – 20 countries (from 2023)",
-        "Euro area - 19 countries  (2015-2022)"
-    ]
-    for df in [early_childhood_df, tertiary_df, adult_df, real_df, investment_df]:
-        df.drop(df[df["country"].isin(drop_regions)].index, inplace=True)
+def economy_education_correlation(app, panel, filled_panel, catalog):
 
     # Dropdown options
-    years = sorted(list(set(real_df['year'].unique()) | set(investment_df['year'].unique())))
     edu_groups = {
-        "Adult education": adult_df,
-        "Tertiary education": tertiary_df,
-        "Early childhood education": early_childhood_df,
+        "Adult education": "adult_learning",
+        "Tertiary education": "tertiary_educational",
+        "Early childhood education": "early_childhood",
     }
+    # Years with the education group, and GDP and investment `lag` years later, per group and lag
+    years = group_years(app, catalog, "edu-dropdown2", "economy-education-corr-year-dropdown", edu_groups, "real_gdp", "investment_gdp",
+                        lag_id="economy-education-lag-slider", max_lag=MAX_LAG)
+    default_year = years["Adult education"][-1] if years["Adult education"] else None
+
+    # Figure skeletons, laid out once per dropdown choice. Every country is its own
+    # one-point trace, so px's per-trace OLS trendlines are empty and the skeleton skips them.
+    scatter_style = dict(
+        traces=dict(marker=dict(size=10, opacity=0.9)),
+        layout=dict(height=550, hovermode="closest", showlegend=False),
+    )
+    gdp_charts = {
+        edu: Series(
+            "scatter", x="GDP_rate", y="edu_rate", text="country_code",
+            color="country", color_map=area_colors,
+            labels={"GDP_rate": "GDP (EUR per capita)", "edu_rate": f"{edu} participation (%)"},
+            px_only=dict(trendline="ols", trendline_color_override="black"),
+            **scatter_style,
+        )
+        for edu in edu_groups
+    }
+    inv_charts = {
+        edu: Series(
+            "scatter", x="inv_rate", y="edu_rate", text="country_code",
+            color="country", color_map=area_colors,
+            labels={"inv_rate": "Investment (% of GDP)", "edu_rate": f"{edu} participation (%)"},
+            px_only=dict(trendline="ols", trendline_color_override="black"),
+            **scatter_style,
+        )
+        for edu in edu_groups
+    }
+
+    # ISO-3 labels of the points, by country ID
+    iso3 = country_table()["iso3"]
+
+    def filtered(selected_year, selected_edu, lag=0, gaps="observed"):
+        """The points behind both scatter plots (also what the download links export)."""
+        edu_col = edu_groups[selected_edu]
+        # Education in selected_year against GDP and investment `lag` years later
+        source = filled_panel if gaps == "filled" else panel
+        education = source.loc[source["year"] == selected_year, ["country_id", "country"] + flag_columns(source, [edu_col])]
+        later = source.loc[source["year"] == selected_year + lag, ["country_id"] + flag_columns(source, ["real_gdp", "investment_gdp"])]
+        panel_year = education.merge(later, on="country_id")
+        df_GDP_corr = panel_year[["country_id", "country", "real_gdp", edu_col]].dropna().rename(columns={"real_gdp": "GDP_rate", edu_col: "edu_rate"})
+        df_inv_corr = panel_year[["country_id", "country", "investment_gdp", edu_col]].dropna().rename(columns={"investment_gdp": "inv_rate", edu_col: "edu_rate"})
+        df_GDP_corr['country_code'] = df_GDP_corr['country_id'].map(iso3)
+        df_inv_corr['country_code'] = df_inv_corr['country_id'].map(iso3)
+        df_GDP_corr["imputed"] = imputed(panel_year.loc[df_GDP_corr.index], ["real_gdp", edu_col])
+        df_inv_corr["imputed"] = imputed(panel_year.loc[df_inv_corr.index], ["investment_gdp", edu_col])
+        return df_GDP_corr, df_inv_corr
+
+    # --- Lag x indicator pair x year correlations: one grouped pass, cached per dataset version ---
+    @memoize()
+    def lagged_correlations(gaps):
+        source = filled_panel if gaps == "filled" else panel
+        return lagged_correlation(source, [(x, col) for col in edu_groups.values() for x in ["real_gdp", "investment_gdp"]])
+
+    tables = {}
+
+    def correlation_table(gaps):
+        """(table, R² by (x, y, lag, year)) for a gap mode, built on first use."""
+        if gaps not in tables:
+            trends = lagged_correlations(gaps)
+            tables[gaps] = trends, trends.set_index(["x", "y", "lag", "year"])["r2"]
+        return tables[gaps]
+
+    # --- Callback ---
+    @app.callback(
+        [Output("GDP-education-corr", "figure"),
+         Output("inv-GDP-education-corr", "figure"),
+         Output("region-country-list-education", "children")],
+        [Input("economy-education-corr-year-dropdown", "value"),
+         Input("edu-dropdown2", "value"),
+         Input("region-selector-education", "value"),
+         Input("economy-education-lag-slider", "value"),
+         Input("economy-education-gaps", "value")],
+        prevent_initial_call=True,
+    )
+    @memoize(limit=CORRELATION)
+    def update_scatter(selected_year, selected_edu, selected_region, lag=0, gaps="observed"):
+        if selected_year is None or selected_edu is None:
+            import plotly.express as px
+            return px.scatter(title="No data available"), px.scatter(title="No data available"), ""
+
+        df_GDP_corr, df_inv_corr = filtered(selected_year, selected_edu, lag, gaps)
+        lap("filter")
+
+        # --- GDP vs Education ---
+        fig_gdp = gdp_charts[selected_edu](df_GDP_corr)
+
+        # --- Investment vs Education ---
+        fig_inv = inv_charts[selected_edu](df_inv_corr)
+
+        # Filled-in points are drawn hollow
+        hollow(fig_gdp, df_GDP_corr.loc[df_GDP_corr["imputed"], "country"])
+        hollow(fig_inv, df_inv_corr.loc[df_inv_corr["imputed"], "country"])
+
+        # Highlight selected region
+        if selected_region and selected_region != "Select region":
+            highlighted = region_map[selected_region]
+
+            for fig in [fig_gdp, fig_inv]:
+                highlight(fig, highlighted, size=14)
+
+            countries = region_map[selected_region]
+            country_list = [
+                html.H5(f"{selected_region}", style={"marginBottom": "10px"})
+            ] + [html.Div(f"{country_codes[c]} – {c}") for c in countries]
+        else:
+            country_list = [html.Div("Select a region to see details.", style={"color": "#9CA3AF"})]
+
+        # --- Correlations (R²) ---
+        edu_col = edu_groups[selected_edu]
+        _, r2_lookup = correlation_table(gaps)
+        corr_gdp = r2_lookup.get(("real_gdp", edu_col, lag, selected_year), float("nan"))
+        corr_inv = r2_lookup.get(("investment_gdp", edu_col, lag, selected_year), float("nan"))
+        years = f"({selected_year})" if not lag else f"({selected_year} → {selected_year + lag})"
+
+        fig_gdp = with_layout(fig_gdp, title={"text": f"{selected_edu} vs GDP {years}<br><sup>{r2_subtitle(corr_gdp, len(df_GDP_corr))}</sup>"})
+        fig_inv = with_layout(fig_inv, title={"text": f"{selected_edu} vs Investment in GDP {years}<br><sup>{r2_subtitle(corr_inv, len(df_inv_corr))}</sup>"})
+
+        lap("figure")
+
+        return fig_gdp, fig_inv, country_list
+
+    # Pre-render the default view so the first page load needs no callback
+    default_gdp, default_inv, default_country_list = update_scatter(default_year, "Adult education", "Select region", 0, "observed")
+
+    downloads = download_links(
+        app, "education-economy-correlation",
+        lambda year, selected_edu, lag=0, gaps="observed": stacked(dict(zip(["GDP", "Investment"], filtered(year, selected_edu, lag, gaps))), key="chart").assign(year=year, lag=lag),
+        [Input("economy-education-corr-year-dropdown", "value"), Input("edu-dropdown2", "value"), Input("economy-education-lag-slider", "value"), Input("economy-education-gaps", "value")],
+        [default_year, "Adult education", 0, "observed"],
+    )
+
+    @app.callback(
+        Output("economy-education-r2-over-time", "figure"),
+        Input("edu-dropdown2", "value"),
+        Input("economy-education-lag-slider", "value"),
+        Input("economy-education-gaps", "value"),
+        prevent_initial_call=True,
+    )
+    @memoize(limit=CORRELATION)
+    def update_r2_over_time(selected, lag=0, gaps="observed"):
+        col = edu_groups[selected]
+        trends, _ = correlation_table(gaps)
+        later = f" {lag} years later" if lag else ""
+        return r2_over_time(trends[trends["lag"] == lag], {"GDP": ("real_gdp", col), "Investment": ("investment_gdp", col)}, f"{selected} vs GDP and investment{later}: R² by year of education")
+
+    default_r2 = update_r2_over_time("Adult education", 0, "observed")
+
+    # The latest year of every education group, computed in the background after startup
+    warm(update_scatter, [(years[g][-1], g, "Select region", 0, "observed") for g in edu_groups if years[g]])
+    warm(update_r2_over_time, [(g, 0, "observed") for g in edu_groups])
 
     # --- Layout ---
     layout = html.Div([
@@ -53,8 +203,8 @@ def economy_education_correlation(app, early_childhood_df, tertiary_df, adult_df
         html.Div([
             dcc.Dropdown(
                 id="economy-education-corr-year-dropdown",
-                options=[{"label": str(y), "value": y} for y in sorted(years, reverse=True)],
-                value=years[-1] if years else None,
+                options=catalog.year_options("real_gdp", "investment_gdp", "adult_learning", how="all"),
+                value=default_year,
                 clearable=False,
                 style={"width": "200px", "marginRight": "20px"}
             ),
@@ -67,21 +217,47 @@ def economy_education_correlation(app, early_childhood_df, tertiary_df, adult_df
             ),
             dcc.Dropdown(
                 id="region-selector-education",
-                options=[{"label": r, "value": r} for r in ["Select region"] + list(region_map.keys())],
+                options=catalog.region_options(),
                 value="Select region",
                 clearable=False,
                 style={"width": "250px"}
             ),
         ], style={"display": "flex", "justifyContent": "center", "marginBottom": "20px"}),
 
+        # --- Observed values only, or gaps filled (filled-in points drawn hollow) ---
+        dcc.RadioItems(
+            id="economy-education-gaps",
+            options=[
+                {"label": " Observed values", "value": "observed"},
+                {"label": " Fill gaps (filled-in points drawn hollow)", "value": "filled"},
+            ],
+            value="observed",
+            inline=True,
+            inputStyle={"marginLeft": "15px"},
+            style={"textAlign": "center", "fontSize": "14px", "color": "#4B5563", "marginBottom": "20px"},
+        ),
+
+        # --- Lag: GDP and investment measured k years after education ---
+        html.Div([
+            html.Label("Years between education and GDP and investment (lag)", style={"fontSize": "14px", "color": "#4B5563"}),
+            dcc.Slider(
+                id="economy-education-lag-slider",
+                min=0,
+                max=MAX_LAG,
+                step=1,
+                value=0,
+                marks={k: str(k) for k in range(MAX_LAG + 1)},
+            ),
+        ], style={"maxWidth": "500px", "margin": "0 auto 20px auto", "textAlign": "center"}),
+
         # --- Graphs + Sidebar ---
         html.Div([
             html.Div([
-                dcc.Graph(id="GDP-education-corr", style={"flex": "1", "minWidth": "400px"}),
-                dcc.Graph(id="inv-GDP-education-corr", style={"flex": "1", "minWidth": "400px"}),
+                dcc.Graph(id="GDP-education-corr", figure=default_gdp, style={"flex": "1", "minWidth": "400px"}),
+                dcc.Graph(id="inv-GDP-education-corr", figure=default_inv, style={"flex": "1", "minWidth": "400px"}),
             ], style={"flex": "4", "display": "flex", "flexDirection": "column", "gap": "2%"}),
 
-            html.Div(id="region-country-list-education", style={
+            html.Div(default_country_list, id="region-country-list-education", style={
                 "flex": "0.8",
                 "padding": "10px",
                 "borderLeft": "1px solid #ddd",
@@ -90,86 +266,9 @@ def economy_education_correlation(app, early_childhood_df, tertiary_df, adult_df
                 "maxWidth": "220px",
                 "overflowY": "auto"
             })
-        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"})
+        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"}),
+        downloads,
+        dcc.Graph(id="economy-education-r2-over-time", figure=default_r2),
     ])
 
-    # --- Callback ---
-    @app.callback(
-        [Output("GDP-education-corr", "figure"),
-         Output("inv-GDP-education-corr", "figure"),
-         Output("region-country-list-education", "children")],
-        [Input("economy-education-corr-year-dropdown", "value"),
-         Input("edu-dropdown2", "value"),
-         Input("region-selector-education", "value")]
-    )
-    def update_scatter(selected_year, selected_edu, selected_region):
-        if selected_year is None or selected_edu is None:
-            return px.scatter(title="No data available"), px.scatter(title="No data available"), ""
-
-        edu_df = edu_groups[selected_edu]
-        edu_year = edu_df[edu_df["year"] == selected_year][["country", "value"]].rename(columns={"value": "edu_rate"})
-        real_year = real_df[real_df["year"] == selected_year][["country", "value"]].rename(columns={"value": "GDP_rate"})
-        inv_year = investment_df[investment_df["year"] == selected_year][["country", "value"]].rename(columns={"value": "inv_rate"})
-
-        # Merge data
-        df_GDP_corr = pd.merge(real_year, edu_year, on="country", how="inner")
-        df_inv_corr = pd.merge(inv_year, edu_year, on="country", how="inner")
-        df_GDP_corr['country_code'] = df_GDP_corr['country'].map(country_codes)
-        df_inv_corr['country_code'] = df_inv_corr['country'].map(country_codes)
-
-        # --- GDP vs Education ---
-        fig_gdp = px.scatter(
-            df_GDP_corr,
-            x="GDP_rate", y="edu_rate", text="country_code",
-            color="country", color_discrete_map=area_colors,
-            trendline="ols", trendline_color_override="black",
-            title=f"{selected_edu} vs GDP ({selected_year})",
-            labels={"GDP_rate": "GDP (EUR per capita)", "edu_rate": f"{selected_edu} participation (%)"},
-        )
-
-        # --- Investment vs Education ---
-        fig_inv = px.scatter(
-            df_inv_corr,
-            x="inv_rate", y="edu_rate", text="country_code",
-            color="country", color_discrete_map=area_colors,
-            trendline="ols", trendline_color_override="black",
-            title=f"{selected_edu} vs Investment in GDP ({selected_year})",
-            labels={"inv_rate": "Investment (% of GDP)", "edu_rate": f"{selected_edu} participation (%)"},
-        )
-
-        # Default styling
-        for fig in [fig_gdp, fig_inv]:
-            fig.update_traces(marker=dict(size=10, opacity=0.9))
-            fig.update_layout(height=550, hovermode="closest", showlegend=False)
-
-        # Highlight selected region
-        if selected_region and selected_region != "Select region":
-            highlighted = region_map[selected_region]
-
-            for fig in [fig_gdp, fig_inv]:
-                fig.for_each_trace(
-                    lambda trace: trace.update(marker_opacity=0.25)
-                    if trace.name not in highlighted else trace.update(marker_opacity=1, marker_size=14)
-                )
-
-            countries = region_map[selected_region]
-            country_list = [
-                html.H5(f"{selected_region}", style={"marginBottom": "10px"})
-            ] + [html.Div(f"{country_codes[c]} – {c}") for c in countries]
-        else:
-            country_list = [html.Div("Select a region to see details.", style={"color": "#9CA3AF"})]
-
-        # --- Correlations (R²) ---
-        corr_gdp = df_GDP_corr["GDP_rate"].corr(df_GDP_corr["edu_rate"]) ** 2
-        corr_inv = df_inv_corr["inv_rate"].corr(df_inv_corr["edu_rate"]) ** 2
-
-        fig_gdp.update_layout(
-            title=f"{selected_edu} vs GDP ({selected_year})<br><sup>Coefficient of determination of all datapoints: R² = {corr_gdp:.2f}</sup>"
-        )
-        fig_inv.update_layout(
-            title=f"{selected_edu} vs Investment in GDP ({selected_year})<br><sup>Coefficient of determination of all datapoints: R² = {corr_inv:.2f}</sup>"
-        )
-
-        return fig_gdp, fig_inv, country_list
-
     return layout
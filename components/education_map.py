@@ -1,11 +1,59 @@
 # components/gdp_maps.py
 from dash import html, dcc
-import plotly.express as px
 from dash.dependencies import Input, Output
+from cache import memoize
+from warmup import warm
+from metrics import lap
+from components.figures import Choropleth
 
-def education_component(app, early_childhood_df, tertiary_df, adult_df):
-    # Find common years
-    common_years = sorted(list(set(early_childhood_df['year'].unique()) | set(tertiary_df['year'].unique()) | set(adult_df['year'].unique())))
+def education_component(app, early_childhood_df, tertiary_df, adult_df, catalog):
+    # Years with any of the maps
+    common_years = catalog.years("early_childhood", "tertiary_educational", "adult_learning")
+    default_year = common_years[-1] if common_years else None
+
+    # Map skeletons, laid out once
+    childhood_map = Choropleth("Viridis", "Early childhood education (%)",
+        layout={"coloraxis_colorbar": dict(thickness=10, len=1)})
+    tertiary_map = Choropleth("Plasma", "Tertiary education (%)",
+        layout={"coloraxis_colorbar": dict(thickness=10, len=1)})
+    adulthood_map = Choropleth("Plasma", "Adult education (%)",
+        layout={"coloraxis_colorbar": dict(thickness=10, len=1)})
+
+    # --- Callback to update maps ---
+    @app.callback(
+        Output("early-childhood-map", "figure"),
+        Output("tertiary-map", "figure"),
+        Output("adulthood-map", "figure"),
+        Input("education-year-dropdown", "value"),
+        prevent_initial_call=True,
+    )
+    @memoize()
+    def update_education_maps(selected_year):
+        if selected_year is None:
+            return {}, {}, {}
+
+        # Filter data
+        childhood_year = early_childhood_df[early_childhood_df['year'] == selected_year]
+        tertiary_year = tertiary_df[tertiary_df['year'] == selected_year]
+        adulthood_year = adult_df[adult_df['year'] == selected_year]
+        lap("filter")
+
+        # Early childhood map
+        fig_childhood = childhood_map(childhood_year)
+
+        # Tertiary map
+        fig_tertiary = tertiary_map(tertiary_year)
+
+        # Adulthood map
+        fig_adulthood = adulthood_map(adulthood_year)
+        lap("figure")
+
+        return  fig_childhood, fig_tertiary, fig_adulthood
+
+    # Pre-render the default view so the first page load needs no callback
+    default_childhood, default_tertiary, default_adulthood = update_education_maps(default_year)
+    # Every other year is computed in the background after startup, newest first
+    warm(update_education_maps, [(year,) for year in reversed(common_years)])
 
     # Layout with dropdown + two side-by-side maps
     layout = html.Div([
@@ -35,16 +83,16 @@ def education_component(app, early_childhood_df, tertiary_df, adult_df):
         
         dcc.Dropdown(
             id="education-year-dropdown",
-            options=[{"label": str(y), "value": y} for y in sorted(common_years, reverse=True)],
-            value=common_years[-1] if common_years else None,
+            options=catalog.year_options("early_childhood", "tertiary_educational", "adult_learning"),
+            value=default_year,
             clearable=False,
             style={"width": "200px", "margin": "0 auto", "marginBottom": "20px"}
         ),
 
         html.Div([
-            dcc.Graph(id="early-childhood-map", style={"flex": "1", "width": "350px"}),
-            dcc.Graph(id="tertiary-map", style={"flex": "1", "width": "350px"}),
-            dcc.Graph(id="adulthood-map", style={"flex": "1", "width": "350px"})
+            dcc.Graph(id="early-childhood-map", figure=default_childhood, style={"flex": "1", "width": "350px"}),
+            dcc.Graph(id="tertiary-map", figure=default_tertiary, style={"flex": "1", "width": "350px"}),
+            dcc.Graph(id="adulthood-map", figure=default_adulthood, style={"flex": "1", "width": "350px"})
         ], style={
             "display": "flex",
             "gap": "1%",   # optional — reduce spacing
@@ -52,76 +100,4 @@ def education_component(app, early_childhood_df, tertiary_df, adult_df):
         })
     ], className="my-8")
 
-    # --- Callback to update maps ---
-    @app.callback(
-        Output("early-childhood-map", "figure"),
-        Output("tertiary-map", "figure"),
-        Output("adulthood-map", "figure"),
-        Input("education-year-dropdown", "value")
-    )
-    def update_education_maps(selected_year):
-        if selected_year is None:
-            return {}, {}, {}
-
-        # Filter data
-        childhood_year = early_childhood_df[early_childhood_df['year'] == selected_year]
-        tertiary_year = tertiary_df[tertiary_df['year'] == selected_year]
-        adulthood_year = adult_df[adult_df['year'] == selected_year]
-
-        # Early childhood map
-        fig_childhood = px.choropleth(
-            childhood_year,
-            locations="country",
-            locationmode="country names",
-            color="value",
-            scope="europe",
-            color_continuous_scale="Viridis",
-            title=f"Early childhood education (%)"
-        )
-        fig_childhood.update_geos(fitbounds="locations")
-        fig_childhood.update_layout(
-            coloraxis_colorbar=dict(
-                thickness=10,
-                len=1
-            )
-        )
-
-        # Tertiary map
-        fig_tertiary = px.choropleth(
-            tertiary_year,
-            locations="country",
-            locationmode="country names",
-            color="value",
-            scope="europe",
-            color_continuous_scale="Plasma",
-            title=f"Tertiary education (%)"
-        )
-        fig_tertiary.update_geos(fitbounds="locations")
-        fig_tertiary.update_layout(
-            coloraxis_colorbar=dict(
-                thickness=10,
-                len=1
-            )
-        )
-
-        # Adulthood map
-        fig_adulthood = px.choropleth(
-            adulthood_year,
-            locations="country",
-            locationmode="country names",
-            color="value",
-            scope="europe",
-            color_continuous_scale="Plasma",
-            title=f"Adult education (%)"
-        )
-        fig_adulthood.update_geos(fitbounds="locations")
-        fig_adulthood.update_layout(
-            coloraxis_colorbar=dict(
-                thickness=10,
-                len=1
-            )
-        )
-
-        return  fig_childhood, fig_tertiary, fig_adulthood
-
     return layout
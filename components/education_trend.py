@@ -1,29 +1,133 @@
 from dash import html, dcc
 import pandas as pd
-import plotly.express as px
 from dash.dependencies import Input, Output
-from assets.country_colors import country_colors
+from cache import memoize
+from metrics import lap
+from assets.regions import region_map
+from components.trend_lines import LineChart, browser_trends
+from data_loader import country_ids
+from components.downloads import download_links
+
+def education_trend_component(app, early_childhood_df, tertiary_df, adult_df, catalog):
+
+    # Countries with any of the indicators, then their region averages
+    countries = catalog.countries("early_childhood", "tertiary_educational", "adult_learning")
+    options = catalog.country_options("early_childhood", "tertiary_educational", "adult_learning", regions=True)
+    default_country = "Finland" if countries else None
+
+    # Color map for both solid and dashed lines
+    color_map = {
+        "Early childhood": "#1f77b4",
+        "Tertiary": "#ff7f0e",
+        "Adult learning": "#2ca02c"
+    }
+    desired_order = [
+        "Early childhood",
+        "Mean - Early childhood",
+        "Tertiary",
+        "Mean - Tertiary",
+        "Adult learning",
+        "Mean - Adult learning"
+    ]
 
-def education_trend_component(app, early_childhood_df, tertiary_df, adult_df):
+    # --- Mean lines (same for every selection, built once), over the countries only ---
+    def country_rows(df):
+        return df[~df["country"].isin(region_map)]
+
+    mean_childhood = country_rows(early_childhood_df).groupby("year")["value"].mean().reset_index()
+    mean_childhood["indicator"] = "Mean - Early childhood"
+
+    mean_ter = country_rows(tertiary_df).groupby("year")["value"].mean().reset_index()
+    mean_ter["indicator"] = "Mean - Tertiary"
+
+    mean_adul = country_rows(adult_df).groupby("year")["value"].mean().reset_index()
+    mean_adul["indicator"] = "Mean - Adult learning"
+
+    means_df = pd.concat([mean_childhood, mean_ter, mean_adul])
+
+    mean_traces = []
+    for ind, df_mean in means_df.groupby("indicator"):
+        if "Early childhood" in ind:
+            color = color_map["Early childhood"]
+        elif "Tertiary" in ind:
+            color = color_map["Tertiary"]
+        else:
+            color = color_map["Adult learning"]
+
+        mean_traces.append(dict(
+            type="scatter",
+            x=df_mean["year"].tolist(),
+            y=df_mean["value"].tolist(),
+            mode="lines",
+            name=ind,
+            line=dict(dash="dash", width=3, color=color),
+            hoverinfo="skip",
+            legendrank=desired_order.index(ind)
+        ))
+
+    # Figure skeleton, laid out once
+    edu_chart = LineChart(
+        color="indicator",
+        color_map=color_map,
+        labels={"value": "Percentage (%)"},
+        layout=dict(
+            legend=dict(traceorder="normal"),
+            yaxis_title="Education (%)",
+            legend_title_text="Indicator",
+            title_x=0.5
+        )
+    )
 
+    # Every row of the solid lines, by indicator and year
+    all_rows = pd.concat([
+        early_childhood_df.sort_values("year", kind="stable").assign(indicator="Early childhood"),
+        tertiary_df.sort_values("year", kind="stable").assign(indicator="Tertiary"),
+        adult_df.sort_values("year", kind="stable").assign(indicator="Adult learning"),
+    ])
 
-    drop_regions = [
-        "European Union - 27 countries (from 2020)",
-        "Euro area – 20 countries (from 2023)",
-        "Euro area - 19 countries  (2015-2022)"
-    ]
-    early_childhood_df = early_childhood_df.loc[~early_childhood_df["country"].isin(drop_regions)]
-    tertiary_df = tertiary_df.loc[~tertiary_df["country"].isin(drop_regions)]
-    adult_df = adult_df.loc[~adult_df["country"].isin(drop_regions)]
-
-    countries = sorted(
-        list(
-            set(early_childhood_df['country'].unique())
-            | set(tertiary_df['country'].unique())
-            | set(adult_df['country'].unique())
-        )
+    def filtered(selected_countries):
+        """The country rows behind the solid lines."""
+        if isinstance(selected_countries, str):
+            selected_countries = [selected_countries]
+        selected_ids = country_ids(pd.Series(selected_countries or [], dtype=str), "selection")
+
+        # Filter by country
+        return all_rows[all_rows['country_id'].isin(selected_ids)]
+
+    # --- The graph for a selection (assets/trend_lines.js draws the same in the browser) ---
+    @memoize()
+    def update_edu_trends(selected_countries):
+        if not selected_countries:
+            return {}
+
+        df_all = filtered(selected_countries)
+        lap("filter")
+
+        # --- Main trend lines, then the dashed mean lines ---
+        fig_edu = edu_chart(df_all)
+        for trace in fig_edu["data"]:
+            if trace.get("name") in desired_order:
+                trace["legendrank"] = desired_order.index(trace["name"])
+        fig_edu = {"data": fig_edu["data"] + mean_traces, "layout": fig_edu["layout"]}
+        lap("figure")
+
+        return fig_edu
+
+    # Pre-render the default view so the first page load needs no callback
+    default_edu = update_edu_trends(default_country)
+
+    # All rows are sent once; picking a country is drawn in the browser
+    trend_data = browser_trends(
+        app, "education-trend-data", [Output("education-trend", "figure")], "education-country-dropdown",
+        [(edu_chart, all_rows, {"legendrank": {name: i for i, name in enumerate(desired_order)}, "traces": mean_traces})],
     )
 
+    # The export has the dashed mean lines too, as rows without a country
+    downloads = download_links(
+        app, "education-trends",
+        lambda countries: pd.concat([filtered(countries), means_df], ignore_index=True),
+        [Input("education-country-dropdown", "value")], [default_country],
+    )
 
     layout = html.Div([
         html.H3("Education Trends", 
@@ -52,107 +156,18 @@ def education_trend_component(app, early_childhood_df, tertiary_df, adult_df):
         # Single dropdown for both graphs
         dcc.Dropdown(
             id="education-country-dropdown",
-            options=[{"label": c, "value": c} for c in countries],
-            value="Finland" if countries else None,
+            options=options,
+            value=default_country,
             clearable=False,
             style={"width": "300px", "margin": "0 auto", "marginBottom": "10px"}
         ),
 
         # Graphs side by side (or stacked for smaller screens)
         html.Div([
-            dcc.Graph(id="education-trend", style={"flex": "1", "height": "600px"}),
-        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"})
+            dcc.Graph(id="education-trend", figure=default_edu, style={"flex": "1", "height": "600px"}),
+        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"}),
+        downloads,
+        trend_data,
     ])
 
-    # --- Single callback for both graphs ---
-    @app.callback(
-        Output("education-trend", "figure"),
-        Input("education-country-dropdown", "value")
-    )
-    def update_edu_trends(selected_countries):
-        if not selected_countries:
-            return {}
-
-        if isinstance(selected_countries, str):
-            selected_countries = [selected_countries]
-
-        # Filter by country
-        df_childhood = early_childhood_df[early_childhood_df['country'].isin(selected_countries)].sort_values("year")
-        df_ter = tertiary_df[tertiary_df['country'].isin(selected_countries)].sort_values("year")
-        df_adul = adult_df[adult_df['country'].isin(selected_countries)].sort_values("year")
-
-        df_childhood["indicator"] = "Early childhood"
-        df_ter["indicator"] = "Tertiary"
-        df_adul["indicator"] = "Adult learning"
-        df_all = pd.concat([df_childhood, df_ter, df_adul])
-
-        # --- Mean lines ---
-        mean_childhood = early_childhood_df.groupby("year")["value"].mean().reset_index()
-        mean_childhood["indicator"] = "Mean - Early childhood"
-
-        mean_ter = tertiary_df.groupby("year")["value"].mean().reset_index()
-        mean_ter["indicator"] = "Mean - Tertiary"
-
-        mean_adul = adult_df.groupby("year")["value"].mean().reset_index()
-        mean_adul["indicator"] = "Mean - Adult learning"
-
-        means_df = pd.concat([mean_childhood, mean_ter, mean_adul])
-
-        # Color map for both solid and dashed lines
-        color_map = {
-            "Early childhood": "#1f77b4",
-            "Tertiary": "#ff7f0e",
-            "Adult learning": "#2ca02c"
-        }
-
-        # --- Main trend lines ---
-        fig_edu = px.line(
-            df_all,
-            x="year",
-            y="value",
-            color="indicator",
-            labels={"value": "Percentage (%)"},
-            color_discrete_map=color_map
-        )
-
-        # --- Add dashed mean lines manually ---
-        for ind, df_mean in means_df.groupby("indicator"):
-            if "Early childhood" in ind:
-                color = color_map["Early childhood"]
-            elif "Tertiary" in ind:
-                color = color_map["Tertiary"]
-            else:
-                color = color_map["Adult learning"]
-
-            fig_edu.add_scatter(
-                x=df_mean["year"],
-                y=df_mean["value"],
-                mode="lines",
-                name=ind,
-                line=dict(dash="dash", width=3, color=color),
-                hoverinfo="skip"
-            )
-
-        # --- Order legend and layout ---
-        desired_order = [
-            "Early childhood",
-            "Mean - Early childhood",
-            "Tertiary",
-            "Mean - Tertiary",
-            "Adult learning",
-            "Mean - Adult learning"
-        ]
-        for trace in fig_edu.data:
-            if trace.name in desired_order:
-                trace.legendrank = desired_order.index(trace.name)
-
-        fig_edu.update_layout(
-            legend=dict(traceorder="normal"),
-            yaxis_title="Education (%)",
-            legend_title_text="Indicator",
-            title_x=0.5
-        )
-
-        return fig_edu
-
     return layout
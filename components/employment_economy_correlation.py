@@ -1,29 +1,159 @@
 from dash import html, dcc
-import plotly.express as px
-import pandas as pd
 from dash.dependencies import Input, Output
+from cache import memoize
+from warmup import warm
+from metrics import lap
+from components.figures import Series, highlight, hollow, with_layout
+from components.downloads import download_links, stacked
+from components.correlation_trend import CORRELATION, group_years, r2_over_time
+from correlations import correlation_by_year
+from data_loader import country_table, imputed
 from assets.area_colors import area_colors
 from assets.country_codes import country_codes
 from assets.regions import region_map
 
 
-def economy_employment_correlation(app, emp_rate_df, long_term_unemp_df, real_df, investment_df):
-    
-    # Remove EU aggregates
-    drop_regions = [
-        "European Union - 27 countries (from 2020)",
-        "Euro area – 20 countries (from 2023)",
-        "Euro area - 19 countries  (2015-2022)"
-    ]
-    for df in [emp_rate_df, long_term_unemp_df, real_df, investment_df]:
-        df.drop(df[df["country"].isin(drop_regions)].index, inplace=True)
+def economy_employment_correlation(app, panel, filled_panel, catalog):
 
     # Dropdown options
-    years = sorted(list(set(real_df['year'].unique()) | set(investment_df['year'].unique())))
     emp_groups = {
-        "Employment rate": emp_rate_df,
-        "Long-term unemployment rate": long_term_unemp_df,
+        "Employment rate": "employment_rate",
+        "Long-term unemployment rate": "long_term_unemployment",
     }
+    # Years with GDP, investment and the employment indicator, per group
+    years = group_years(app, catalog, "employment-dropdown2", "economy-employment-corr-year-dropdown", emp_groups, "real_gdp", "investment_gdp")
+    default_year = years["Employment rate"][-1] if years["Employment rate"] else None
+
+    # Figure skeletons, laid out once per dropdown choice. Every country is its own
+    # one-point trace, so px's per-trace OLS trendlines are empty and the skeleton skips them.
+    scatter_style = dict(
+        traces=dict(marker=dict(size=10, opacity=0.9)),
+        layout=dict(height=550, hovermode="closest", showlegend=False),
+    )
+    gdp_charts = {
+        emp: Series(
+            "scatter", x="GDP_rate", y="emp_rate", text="country_code",
+            color="country", color_map=area_colors,
+            labels={"GDP_rate": "GDP (EUR per capita)", "emp_rate": f"{emp} (%)"},
+            px_only=dict(trendline="ols", trendline_color_override="black"),
+            **scatter_style,
+        )
+        for emp in emp_groups
+    }
+    inv_charts = {
+        emp: Series(
+            "scatter", x="inv_rate", y="emp_rate", text="country_code",
+            color="country", color_map=area_colors,
+            labels={"inv_rate": "Investment (% of GDP)", "emp_rate": f"{emp} (%)"},
+            px_only=dict(trendline="ols", trendline_color_override="black"),
+            **scatter_style,
+        )
+        for emp in emp_groups
+    }
+
+    # ISO-3 labels of the points, by country ID
+    iso3 = country_table()["iso3"]
+
+    def filtered(selected_year, selected_emp, gaps="observed"):
+        """The points behind both scatter plots (also what the download links export)."""
+        emp_col = emp_groups[selected_emp]
+        source = filled_panel if gaps == "filled" else panel
+        panel_year = source[source["year"] == selected_year]
+        df_GDP_corr = panel_year[["country_id", "country", "real_gdp", emp_col]].dropna().rename(columns={"real_gdp": "GDP_rate", emp_col: "emp_rate"})
+        df_inv_corr = panel_year[["country_id", "country", "investment_gdp", emp_col]].dropna().rename(columns={"investment_gdp": "inv_rate", emp_col: "emp_rate"})
+        df_GDP_corr["imputed"] = imputed(panel_year.loc[df_GDP_corr.index], ["real_gdp", emp_col])
+        df_inv_corr["imputed"] = imputed(panel_year.loc[df_inv_corr.index], ["investment_gdp", emp_col])
+        df_GDP_corr['country_code'] = df_GDP_corr['country_id'].map(iso3)
+        df_inv_corr['country_code'] = df_inv_corr['country_id'].map(iso3)
+        return df_GDP_corr, df_inv_corr
+
+    # --- Callback ---
+    @app.callback(
+        [Output("GDP-employment-corr", "figure"),
+         Output("inv-GDP-employment-corr", "figure"),
+         Output("region-country-list-economy", "children")],
+        [Input("economy-employment-corr-year-dropdown", "value"),
+         Input("employment-dropdown2", "value"),
+         Input("region-selector-economy", "value"),
+         Input("economy-employment-gaps", "value")],
+        prevent_initial_call=True,
+    )
+    @memoize(limit=CORRELATION)
+    def update_scatter(selected_year, selected_emp, selected_region, gaps="observed"):
+        if selected_year is None or selected_emp is None:
+            import plotly.express as px
+            return px.scatter(title="No data available"), px.scatter(title="No data available"), ""
+
+        df_GDP_corr, df_inv_corr = filtered(selected_year, selected_emp, gaps)
+        lap("filter")
+
+        # --- GDP vs Employment ---
+        fig_gdp = gdp_charts[selected_emp](df_GDP_corr)
+
+        # --- Investment vs Employment ---
+        fig_inv = inv_charts[selected_emp](df_inv_corr)
+
+        # Filled-in points are drawn hollow
+        hollow(fig_gdp, df_GDP_corr.loc[df_GDP_corr["imputed"], "country"])
+        hollow(fig_inv, df_inv_corr.loc[df_inv_corr["imputed"], "country"])
+
+        # Highlight region
+        if selected_region and selected_region != "Select region":
+            highlighted = region_map[selected_region]
+
+            for fig in [fig_gdp, fig_inv]:
+                highlight(fig, highlighted, size=14)
+
+            countries = region_map[selected_region]
+            country_list = [
+                html.H5(f"{selected_region}", style={"marginBottom": "10px"})
+            ] + [html.Div(f"{country_codes[c]} – {c}") for c in countries]
+        else:
+            country_list = [html.Div("Select a region to see details.", style={"color": "#9CA3AF"})]
+
+        # Compute R² correlations
+        corr_gdp = df_GDP_corr["GDP_rate"].corr(df_GDP_corr["emp_rate"]) ** 2
+        corr_inv = df_inv_corr["inv_rate"].corr(df_inv_corr["emp_rate"]) ** 2
+
+        fig_gdp = with_layout(fig_gdp, title={"text": f"{selected_emp} vs GDP ({selected_year})<br><sup>Coefficient of determination of all datapoints: R² = {corr_gdp:.2f}</sup>"})
+        fig_inv = with_layout(fig_inv, title={"text": f"{selected_emp} vs Investment in GDP ({selected_year})<br><sup>Coefficient of determination of all datapoints: R² = {corr_inv:.2f}</sup>"})
+
+        lap("figure")
+
+        return fig_gdp, fig_inv, country_list
+
+    # Pre-render the default view so the first page load needs no callback
+    default_gdp, default_inv, default_country_list = update_scatter(default_year, "Employment rate", "Select region", "observed")
+
+    downloads = download_links(
+        app, "employment-economy-correlation",
+        lambda year, selected_emp, gaps="observed": stacked(dict(zip(["GDP", "Investment"], filtered(year, selected_emp, gaps))), key="chart").assign(year=year),
+        [Input("economy-employment-corr-year-dropdown", "value"), Input("employment-dropdown2", "value"), Input("economy-employment-gaps", "value")],
+        [default_year, "Employment rate", "observed"],
+    )
+
+    # --- R² over time: every pair this view can show, computed in one pass, cached per dataset version ---
+    @memoize()
+    def yearly_correlations(gaps):
+        source = filled_panel if gaps == "filled" else panel
+        return correlation_by_year(source, [(x, col) for col in emp_groups.values() for x in ["real_gdp", "investment_gdp"]])
+
+    @app.callback(
+        Output("economy-employment-r2-over-time", "figure"),
+        Input("employment-dropdown2", "value"),
+        Input("economy-employment-gaps", "value"),
+        prevent_initial_call=True,
+    )
+    @memoize(limit=CORRELATION)
+    def update_r2_over_time(selected, gaps="observed"):
+        col = emp_groups[selected]
+        return r2_over_time(yearly_correlations(gaps), {"GDP": ("real_gdp", col), "Investment": ("investment_gdp", col)}, f"{selected} vs GDP and investment: R² by year")
+
+    default_r2 = update_r2_over_time("Employment rate", "observed")
+
+    # The latest year of every employment indicator, computed in the background after startup
+    warm(update_scatter, [(years[g][-1], g, "Select region", "observed") for g in emp_groups if years[g]])
+    warm(update_r2_over_time, [(g, "observed") for g in emp_groups])
 
     # --- Layout ---
     layout = html.Div([
@@ -52,8 +182,8 @@ def economy_employment_correlation(app, emp_rate_df, long_term_unemp_df, real_df
         html.Div([
             dcc.Dropdown(
                 id="economy-employment-corr-year-dropdown",
-                options=[{"label": str(y), "value": y} for y in sorted(years, reverse=True)],
-                value=years[-1] if years else None,
+                options=catalog.year_options("real_gdp", "investment_gdp", "employment_rate", how="all"),
+                value=default_year,
                 clearable=False,
                 style={"width": "200px", "marginRight": "20px"}
             ),
@@ -66,21 +196,34 @@ def economy_employment_correlation(app, emp_rate_df, long_term_unemp_df, real_df
             ),
             dcc.Dropdown(
                 id="region-selector-economy",
-                options=[{"label": r, "value": r} for r in ["Select region"] + list(region_map.keys())],
+                options=catalog.region_options(),
                 value="Select region",
                 clearable=False,
                 style={"width": "250px"}
             ),
         ], style={"display": "flex", "justifyContent": "center", "marginBottom": "20px"}),
 
+        # --- Observed values only, or gaps filled (filled-in points drawn hollow) ---
+        dcc.RadioItems(
+            id="economy-employment-gaps",
+            options=[
+                {"label": " Observed values", "value": "observed"},
+                {"label": " Fill gaps (filled-in points drawn hollow)", "value": "filled"},
+            ],
+            value="observed",
+            inline=True,
+            inputStyle={"marginLeft": "15px"},
+            style={"textAlign": "center", "fontSize": "14px", "color": "#4B5563", "marginBottom": "20px"},
+        ),
+
         # --- Graphs + Sidebar ---
         html.Div([
             html.Div([
-                dcc.Graph(id="GDP-employment-corr", style={"flex": "1", "minWidth": "400px"}),
-                dcc.Graph(id="inv-GDP-employment-corr", style={"flex": "1", "minWidth": "400px"}),
+                dcc.Graph(id="GDP-employment-corr", figure=default_gdp, style={"flex": "1", "minWidth": "400px"}),
+                dcc.Graph(id="inv-GDP-employment-corr", figure=default_inv, style={"flex": "1", "minWidth": "400px"}),
             ], style={"flex": "4", "display": "flex", "flexDirection": "column", "gap": "2%"}),
 
-            html.Div(id="region-country-list-economy", style={
+            html.Div(default_country_list, id="region-country-list-economy", style={
                 "flex": "0.8",
                 "padding": "10px",
                 "borderLeft": "1px solid #ddd",
@@ -89,85 +232,9 @@ def economy_employment_correlation(app, emp_rate_df, long_term_unemp_df, real_df
                 "maxWidth": "220px",
                 "overflowY": "auto"
             })
-        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"})
+        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"}),
+        downloads,
+        dcc.Graph(id="economy-employment-r2-over-time", figure=default_r2),
     ])
 
-    # --- Callback ---
-    @app.callback(
-        [Output("GDP-employment-corr", "figure"),
-         Output("inv-GDP-employment-corr", "figure"),
-         Output("region-country-list-economy", "children")],
-        [Input("economy-employment-corr-year-dropdown", "value"),
-         Input("employment-dropdown2", "value"),
-         Input("region-selector-economy", "value")]
-    )
-    def update_scatter(selected_year, selected_emp, selected_region):
-        if selected_year is None or selected_emp is None:
-            return px.scatter(title="No data available"), px.scatter(title="No data available"), ""
-
-        emp_df = emp_groups[selected_emp]
-        emp_year = emp_df[emp_df["year"] == selected_year][["country", "value"]].rename(columns={"value": "emp_rate"})
-        real_year = real_df[real_df["year"] == selected_year][["country", "value"]].rename(columns={"value": "GDP_rate"})
-        inv_year = investment_df[investment_df["year"] == selected_year][["country", "value"]].rename(columns={"value": "inv_rate"})
-
-        df_GDP_corr = pd.merge(real_year, emp_year, on="country", how="inner")
-        df_inv_corr = pd.merge(inv_year, emp_year, on="country", how="inner")
-        df_GDP_corr['country_code'] = df_GDP_corr['country'].map(country_codes)
-        df_inv_corr['country_code'] = df_inv_corr['country'].map(country_codes)
-
-        # --- GDP vs Employment ---
-        fig_gdp = px.scatter(
-            df_GDP_corr,
-            x="GDP_rate", y="emp_rate", text="country_code",
-            color="country", color_discrete_map=area_colors,
-            trendline="ols", trendline_color_override="black",
-            title=f"{selected_emp} vs GDP ({selected_year})",
-            labels={"GDP_rate": "GDP (EUR per capita)", "emp_rate": f"{selected_emp} (%)"},
-        )
-
-        # --- Investment vs Employment ---
-        fig_inv = px.scatter(
-            df_inv_corr,
-            x="inv_rate", y="emp_rate", text="country_code",
-            color="country", color_discrete_map=area_colors,
-            trendline="ols", trendline_color_override="black",
-            title=f"{selected_emp} vs Investment in GDP ({selected_year})",
-            labels={"inv_rate": "Investment (% of GDP)", "emp_rate": f"{selected_emp} (%)"},
-        )
-
-        # Default styling
-        for fig in [fig_gdp, fig_inv]:
-            fig.update_traces(marker=dict(size=10, opacity=0.9))
-            fig.update_layout(height=550, hovermode="closest", showlegend=False)
-
-        # Highlight region
-        if selected_region and selected_region != "Select region":
-            highlighted = region_map[selected_region]
-
-            for fig in [fig_gdp, fig_inv]:
-                fig.for_each_trace(
-                    lambda trace: trace.update(marker_opacity=0.25)
-                    if trace.name not in highlighted else trace.update(marker_opacity=1, marker_size=14)
-                )
-
-            countries = region_map[selected_region]
-            country_list = [
-                html.H5(f"{selected_region}", style={"marginBottom": "10px"})
-            ] + [html.Div(f"{country_codes[c]} – {c}") for c in countries]
-        else:
-            country_list = [html.Div("Select a region to see details.", style={"color": "#9CA3AF"})]
-
-        # Compute R² correlations
-        corr_gdp = df_GDP_corr["GDP_rate"].corr(df_GDP_corr["emp_rate"]) ** 2
-        corr_inv = df_inv_corr["inv_rate"].corr(df_inv_corr["emp_rate"]) ** 2
-
-        fig_gdp.update_layout(
-            title=f"{selected_emp} vs GDP ({selected_year})<br><sup>Coefficient of determination of all datapoints: R² = {corr_gdp:.2f}</sup>"
-        )
-        fig_inv.update_layout(
-            title=f"{selected_emp} vs Investment in GDP ({selected_year})<br><sup>Coefficient of determination of all datapoints: R² = {corr_inv:.2f}</sup>"
-        )
-
-        return fig_gdp, fig_inv, country_list
-
     return layout
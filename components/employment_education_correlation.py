@@ -1,30 +1,179 @@
 from dash import html, dcc
-import plotly.express as px
-import pandas as pd
 from dash.dependencies import Input, Output
+from cache import memoize
+from warmup import warm
+from metrics import lap
+from components.figures import Series, highlight, hollow, with_layout
+from components.downloads import download_links, stacked
+from components.correlation_trend import CORRELATION, group_years, r2_over_time, r2_subtitle
+from correlations import MAX_LAG, lagged_correlation
+from data_loader import country_table, flag_columns, imputed
 from assets.area_colors import area_colors
 from assets.country_codes import country_codes
 from assets.regions import region_map
 
 
-def employment_education_correlation(app, early_childhood_df, tertiary_df, adult_df, emp_rate_df, long_term_unemp_df):
-    
-    # Remove EU aggregates
-    drop_regions = [
-        "European Union - 27 countries (from 2020)",
-        "Euro area – 20 countries (from 2023)",
-        "Euro area - 19 countries  (2015-2022)"
-    ]
-    for df in [early_childhood_df, tertiary_df, adult_df, emp_rate_df, long_term_unemp_df]:
-        df.drop(df[df["country"].isin(drop_regions)].index, inplace=True)
+def employment_education_correlation(app, panel, filled_panel, catalog):
 
     # Dropdown options
-    years = sorted(list(set(emp_rate_df['year'].unique()) | set(long_term_unemp_df['year'].unique())))
     edu_groups = {
-        "Adult education": adult_df,
-        "Tertiary education": tertiary_df,
-        "Early childhood education": early_childhood_df,
+        "Adult education": "adult_learning",
+        "Tertiary education": "tertiary_educational",
+        "Early childhood education": "early_childhood",
     }
+    # Years with the education group, and both employment indicators `lag` years later, per group and lag
+    years = group_years(app, catalog, "edu-dropdown", "employment-education-corr-year-dropdown", edu_groups, "employment_rate", "long_term_unemployment",
+                        lag_id="employment-education-lag-slider", max_lag=MAX_LAG)
+    default_year = years["Adult education"][-1] if years["Adult education"] else None
+
+    # Figure skeletons, laid out once per dropdown choice. Every country is its own
+    # one-point trace, so px's per-trace OLS trendlines are empty and the skeleton skips them.
+    scatter_style = dict(
+        traces=dict(marker=dict(size=10, opacity=0.9)),
+        layout=dict(height=550, hovermode="closest", showlegend=False),
+    )
+    emp_charts = {
+        edu: Series(
+            "scatter", x="emp_rate", y="edu_rate", text="country_code",
+            color="country", color_map=area_colors,
+            labels={"emp_rate": "Employment rate (%)", "edu_rate": f"{edu} participation rate (%)"},
+            px_only=dict(trendline="ols", trendline_color_override="black"),
+            **scatter_style,
+        )
+        for edu in edu_groups
+    }
+    unemp_charts = {
+        edu: Series(
+            "scatter", x="unemp_rate", y="edu_rate", text="country_code",
+            color="country", color_map=area_colors,
+            labels={"unemp_rate": "Long-term unemployment rate (%)", "edu_rate": f"{edu} participation rate (%)"},
+            px_only=dict(trendline="ols", trendline_color_override="black"),
+            **scatter_style,
+        )
+        for edu in edu_groups
+    }
+
+    # ISO-3 labels of the points, by country ID
+    iso3 = country_table()["iso3"]
+
+    def filtered(selected_year, selected_edu, lag=0, gaps="observed"):
+        """The points behind both scatter plots (also what the download links export)."""
+        edu_col = edu_groups[selected_edu]
+        # Education in selected_year against employment `lag` years later
+        source = filled_panel if gaps == "filled" else panel
+        education = source.loc[source["year"] == selected_year, ["country_id", "country"] + flag_columns(source, [edu_col])]
+        later = source.loc[source["year"] == selected_year + lag, ["country_id"] + flag_columns(source, ["employment_rate", "long_term_unemployment"])]
+        panel_year = education.merge(later, on="country_id")
+        df_emp_corr = panel_year[["country_id", "country", "employment_rate", edu_col]].dropna().rename(columns={"employment_rate": "emp_rate", edu_col: "edu_rate"})
+        df_unemp_corr = panel_year[["country_id", "country", "long_term_unemployment", edu_col]].dropna().rename(columns={"long_term_unemployment": "unemp_rate", edu_col: "edu_rate"})
+        df_emp_corr['country_code'] = df_emp_corr['country_id'].map(iso3)
+        df_unemp_corr['country_code'] = df_unemp_corr['country_id'].map(iso3)
+        df_emp_corr["imputed"] = imputed(panel_year.loc[df_emp_corr.index], ["employment_rate", edu_col])
+        df_unemp_corr["imputed"] = imputed(panel_year.loc[df_unemp_corr.index], ["long_term_unemployment", edu_col])
+        return df_emp_corr, df_unemp_corr
+
+    # --- Lag x indicator pair x year correlations: one grouped pass, cached per dataset version ---
+    @memoize()
+    def lagged_correlations(gaps):
+        source = filled_panel if gaps == "filled" else panel
+        return lagged_correlation(source, [(x, col) for col in edu_groups.values() for x in ["employment_rate", "long_term_unemployment"]])
+
+    tables = {}
+
+    def correlation_table(gaps):
+        """(table, R² by (x, y, lag, year)) for a gap mode, built on first use."""
+        if gaps not in tables:
+            trends = lagged_correlations(gaps)
+            tables[gaps] = trends, trends.set_index(["x", "y", "lag", "year"])["r2"]
+        return tables[gaps]
+
+    # --- Callback ---
+    @app.callback(
+        [Output("employment-education-corr", "figure"),
+         Output("unemployment-education-corr", "figure"),
+         Output("region-country-list-edu", "children")],
+        [Input("employment-education-corr-year-dropdown", "value"),
+         Input("edu-dropdown", "value"),
+         Input("region-selector-edu", "value"),
+         Input("employment-education-lag-slider", "value"),
+         Input("employment-education-gaps", "value")],
+        prevent_initial_call=True,
+    )
+    @memoize(limit=CORRELATION)
+    def update_scatter(selected_year, selected_edu, selected_region, lag=0, gaps="observed"):
+        if selected_year is None or selected_edu is None:
+            import plotly.express as px
+            return px.scatter(title="No data available"), px.scatter(title="No data available"), ""
+
+        df_emp_corr, df_unemp_corr = filtered(selected_year, selected_edu, lag, gaps)
+        lap("filter")
+
+        # Base scatter 1
+        fig_emp = emp_charts[selected_edu](df_emp_corr)
+
+        # Base scatter 2
+        fig_unemp = unemp_charts[selected_edu](df_unemp_corr)
+
+        # Filled-in points are drawn hollow
+        hollow(fig_emp, df_emp_corr.loc[df_emp_corr["imputed"], "country"])
+        hollow(fig_unemp, df_unemp_corr.loc[df_unemp_corr["imputed"], "country"])
+
+        # Highlight selected region
+        if selected_region and selected_region != "Select region":
+            highlighted = region_map[selected_region]
+
+            for fig in [fig_emp, fig_unemp]:
+                highlight(fig, highlighted, size=14)
+
+            countries = region_map[selected_region]
+            country_list = [
+                html.H5(f"{selected_region}", style={"marginBottom": "10px"})
+            ] + [html.Div(f"{country_codes[c]} – {c}") for c in countries]
+        else:
+            country_list = [html.Div("Select a region to see details.", style={"color": "#9CA3AF"})]
+
+        # Add R² values
+        edu_col = edu_groups[selected_edu]
+        _, r2_lookup = correlation_table(gaps)
+        corr_emp = r2_lookup.get(("employment_rate", edu_col, lag, selected_year), float("nan"))
+        corr_unemp = r2_lookup.get(("long_term_unemployment", edu_col, lag, selected_year), float("nan"))
+        years = f"({selected_year})" if not lag else f"({selected_year} → {selected_year + lag})"
+        fig_emp = with_layout(fig_emp, title={"text": f"{selected_edu} vs Employment Rate {years}<br><sup>{r2_subtitle(corr_emp, len(df_emp_corr))}</sup>"})
+        fig_unemp = with_layout(fig_unemp, title={"text": f"{selected_edu} vs Long-term Unemployment Rate {years}<br><sup>{r2_subtitle(corr_unemp, len(df_unemp_corr))}</sup>"})
+
+        lap("figure")
+
+        return fig_emp, fig_unemp, country_list
+
+    # Pre-render the default view so the first page load needs no callback
+    default_emp, default_unemp, default_country_list = update_scatter(default_year, "Adult education", "Select region", 0, "observed")
+
+    downloads = download_links(
+        app, "employment-education-correlation",
+        lambda year, selected_edu, lag=0, gaps="observed": stacked(dict(zip(["Employment rate", "Long-term unemployment rate"], filtered(year, selected_edu, lag, gaps))), key="chart").assign(year=year, lag=lag),
+        [Input("employment-education-corr-year-dropdown", "value"), Input("edu-dropdown", "value"), Input("employment-education-lag-slider", "value"), Input("employment-education-gaps", "value")],
+        [default_year, "Adult education", 0, "observed"],
+    )
+
+    @app.callback(
+        Output("employment-education-r2-over-time", "figure"),
+        Input("edu-dropdown", "value"),
+        Input("employment-education-lag-slider", "value"),
+        Input("employment-education-gaps", "value"),
+        prevent_initial_call=True,
+    )
+    @memoize(limit=CORRELATION)
+    def update_r2_over_time(selected, lag=0, gaps="observed"):
+        col = edu_groups[selected]
+        trends, _ = correlation_table(gaps)
+        later = f" {lag} years later" if lag else ""
+        return r2_over_time(trends[trends["lag"] == lag], {"Employment rate": ("employment_rate", col), "Long-term unemployment": ("long_term_unemployment", col)}, f"{selected} vs employment and long-term unemployment{later}: R² by year of education")
+
+    default_r2 = update_r2_over_time("Adult education", 0, "observed")
+
+    # The latest year of every education group, computed in the background after startup
+    warm(update_scatter, [(years[g][-1], g, "Select region", 0, "observed") for g in edu_groups if years[g]])
+    warm(update_r2_over_time, [(g, 0, "observed") for g in edu_groups])
 
     # Layout
     layout = html.Div([
@@ -53,8 +202,8 @@ def employment_education_correlation(app, early_childhood_df, tertiary_df, adult
         html.Div([
             dcc.Dropdown(
                 id="employment-education-corr-year-dropdown",
-                options=[{"label": str(y), "value": y} for y in sorted(years, reverse=True)],
-                value=years[-1] if years else None,
+                options=catalog.year_options("employment_rate", "long_term_unemployment", "adult_learning", how="all"),
+                value=default_year,
                 clearable=False,
                 style={"width": "200px", "marginRight": "20px"}
             ),
@@ -67,21 +216,47 @@ def employment_education_correlation(app, early_childhood_df, tertiary_df, adult
             ),
             dcc.Dropdown(
                 id="region-selector-edu",
-                options=[{"label": r, "value": r} for r in ["Select region"] + list(region_map.keys())],
+                options=catalog.region_options(),
                 value="Select region",
                 clearable=False,
                 style={"width": "250px"}
             ),
         ], style={"display": "flex", "justifyContent": "center", "marginBottom": "20px"}),
 
+        # --- Observed values only, or gaps filled (filled-in points drawn hollow) ---
+        dcc.RadioItems(
+            id="employment-education-gaps",
+            options=[
+                {"label": " Observed values", "value": "observed"},
+                {"label": " Fill gaps (filled-in points drawn hollow)", "value": "filled"},
+            ],
+            value="observed",
+            inline=True,
+            inputStyle={"marginLeft": "15px"},
+            style={"textAlign": "center", "fontSize": "14px", "color": "#4B5563", "marginBottom": "20px"},
+        ),
+
+        # --- Lag: employment measured k years after education ---
+        html.Div([
+            html.Label("Years between education and employment (lag)", style={"fontSize": "14px", "color": "#4B5563"}),
+            dcc.Slider(
+                id="employment-education-lag-slider",
+                min=0,
+                max=MAX_LAG,
+                step=1,
+                value=0,
+                marks={k: str(k) for k in range(MAX_LAG + 1)},
+            ),
+        ], style={"maxWidth": "500px", "margin": "0 auto 20px auto", "textAlign": "center"}),
+
         # --- Two plots + sidebar ---
         html.Div([
             html.Div([
-                dcc.Graph(id="employment-education-corr", style={"flex": "1", "minWidth": "400px"}),
-                dcc.Graph(id="unemployment-education-corr", style={"flex": "1", "minWidth": "400px"}),
+                dcc.Graph(id="employment-education-corr", figure=default_emp, style={"flex": "1", "minWidth": "400px"}),
+                dcc.Graph(id="unemployment-education-corr", figure=default_unemp, style={"flex": "1", "minWidth": "400px"}),
             ], style={"flex": "4", "display": "flex", "flexDirection": "column", "gap": "2%"}),
 
-            html.Div(id="region-country-list-edu", style={
+            html.Div(default_country_list, id="region-country-list-edu", style={
                 "flex": "0.8",
                 "padding": "10px",
                 "borderLeft": "1px solid #ddd",
@@ -90,87 +265,9 @@ def employment_education_correlation(app, early_childhood_df, tertiary_df, adult
                 "maxWidth": "220px",
                 "overflowY": "auto"
             })
-        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"})
+        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"}),
+        downloads,
+        dcc.Graph(id="employment-education-r2-over-time", figure=default_r2),
     ])
 
-    # --- Callback ---
-    @app.callback(
-        [Output("employment-education-corr", "figure"),
-         Output("unemployment-education-corr", "figure"),
-         Output("region-country-list-edu", "children")],
-        [Input("employment-education-corr-year-dropdown", "value"),
-         Input("edu-dropdown", "value"),
-         Input("region-selector-edu", "value")]
-    )
-    def update_scatter(selected_year, selected_edu, selected_region):
-        if selected_year is None or selected_edu is None:
-            return px.scatter(title="No data available"), px.scatter(title="No data available"), ""
-
-        # Select education dataframe
-        edu_df = edu_groups[selected_edu]
-        edu_year = edu_df[edu_df["year"] == selected_year][["country", "value"]].rename(columns={"value": "edu_rate"})
-
-        emp_year = emp_rate_df[emp_rate_df["year"] == selected_year][["country", "value"]].rename(columns={"value": "emp_rate"})
-        unemp_year = long_term_unemp_df[long_term_unemp_df["year"] == selected_year][["country", "value"]].rename(columns={"value": "unemp_rate"})
-
-        # Merge
-        df_emp_corr = pd.merge(emp_year, edu_year, on="country", how="inner")
-        df_unemp_corr = pd.merge(unemp_year, edu_year, on="country", how="inner")
-        df_emp_corr['country_code'] = df_emp_corr['country'].map(country_codes)
-        df_unemp_corr['country_code'] = df_unemp_corr['country'].map(country_codes)
-
-        # Base scatter 1
-        fig_emp = px.scatter(
-            df_emp_corr,
-            x="emp_rate", y="edu_rate", text="country_code",
-            color="country", color_discrete_map=area_colors,
-            trendline="ols", trendline_color_override="black",
-            title=f"{selected_edu} vs Employment Rate ({selected_year})",
-            labels={"emp_rate": "Employment rate (%)", "edu_rate": f"{selected_edu} participation rate (%)"},
-        )
-
-        # Base scatter 2
-        fig_unemp = px.scatter(
-            df_unemp_corr,
-            x="unemp_rate", y="edu_rate", text="country_code",
-            color="country", color_discrete_map=area_colors,
-            trendline="ols", trendline_color_override="black",
-            title=f"{selected_edu} vs Long-term Unemployment Rate ({selected_year})",
-            labels={"unemp_rate": "Long-term unemployment rate (%)", "edu_rate": f"{selected_edu} participation rate (%)"},
-        )
-
-        # Default style
-        for fig in [fig_emp, fig_unemp]:
-            fig.update_traces(marker=dict(size=10, opacity=0.9))
-            fig.update_layout(height=550, hovermode="closest", showlegend=False)
-
-        # Highlight selected region
-        if selected_region and selected_region != "Select region":
-            highlighted = region_map[selected_region]
-
-            for fig in [fig_emp, fig_unemp]:
-                fig.for_each_trace(
-                    lambda trace: trace.update(marker_opacity=0.25)
-                    if trace.name not in highlighted else trace.update(marker_opacity=1, marker_size=14)
-                )
-
-            countries = region_map[selected_region]
-            country_list = [
-                html.H5(f"{selected_region}", style={"marginBottom": "10px"})
-            ] + [html.Div(f"{country_codes[c]} – {c}") for c in countries]
-        else:
-            country_list = [html.Div("Select a region to see details.", style={"color": "#9CA3AF"})]
-
-        # Add R² values
-        corr_emp = df_emp_corr["emp_rate"].corr(df_emp_corr["edu_rate"]) ** 2
-        corr_unemp = df_unemp_corr["unemp_rate"].corr(df_unemp_corr["edu_rate"]) ** 2
-        fig_emp.update_layout(
-            title=f"{selected_edu} vs Employment Rate ({selected_year})<br><sup>Coefficient of determination of all datapoints: R² = {corr_emp:.2f}</sup>"
-        )
-        fig_unemp.update_layout(
-            title=f"{selected_edu} vs Long-term Unemployment Rate ({selected_year})<br><sup>Coefficient of determination of all datapoints: R² = {corr_unemp:.2f}</sup>"
-        )
-
-        return fig_emp, fig_unemp, country_list
-
     return layout
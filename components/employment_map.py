@@ -1,11 +1,50 @@
 # components/gdp_maps.py
 from dash import html, dcc
-import plotly.express as px
 from dash.dependencies import Input, Output
+from cache import memoize
+from warmup import warm
+from metrics import lap
+from components.figures import Choropleth
 
-def employment_map_component(app, emp_rate_df, long_term_unemp_df):
-    # Find common years
-    common_years = sorted(list(set(emp_rate_df['year'].unique()) & set(long_term_unemp_df['year'].unique())))
+def employment_map_component(app, emp_rate_df, long_term_unemp_df, catalog):
+    # Years with either map
+    common_years = catalog.years("employment_rate", "long_term_unemployment")
+    default_year = common_years[-1] if common_years else None
+
+    # Map skeletons, laid out once
+    employment_map = Choropleth("Viridis", "Employment rate (%)")
+    unemployment_map = Choropleth("Plasma", "Long-term unemployment rate (%)")
+
+    # --- Callback to update maps ---
+    @app.callback(
+        Output("employment-map", "figure"),
+        Output("unemployment-map", "figure"),
+        Input("employment-year-dropdown", "value"),
+        prevent_initial_call=True,
+    )
+    @memoize()
+    def update_education_maps(selected_year):
+        if selected_year is None:
+            return {}, {}
+
+        # Filter data
+        emp_year = emp_rate_df[emp_rate_df['year'] == selected_year]
+        unemp_year = long_term_unemp_df[long_term_unemp_df['year'] == selected_year]
+        lap("filter")
+
+        # Employment map
+        fig_employment = employment_map(emp_year)
+
+        # Unemployment map
+        fig_unemployment = unemployment_map(unemp_year)
+        lap("figure")
+
+        return  fig_employment, fig_unemployment
+
+    # Pre-render the default view so the first page load needs no callback
+    default_employment, default_unemployment = update_education_maps(default_year)
+    # Every other year is computed in the background after startup, newest first
+    warm(update_education_maps, [(year,) for year in reversed(common_years)])
 
     # Layout with dropdown + two side-by-side maps
     layout = html.Div([
@@ -34,55 +73,16 @@ def employment_map_component(app, emp_rate_df, long_term_unemp_df):
         
         dcc.Dropdown(
             id="employment-year-dropdown",
-            options=[{"label": str(y), "value": y} for y in sorted(common_years, reverse=True)],
-            value=common_years[-1] if common_years else None,
+            options=catalog.year_options("employment_rate", "long_term_unemployment"),
+            value=default_year,
             clearable=False,
             style={"width": "200px", "margin": "0 auto", "marginBottom": "20px"}
         ),
 
         html.Div([
-            dcc.Graph(id="employment-map", style={"flex": "1", "height": "600px", "minWidth": "400px"}),
-            dcc.Graph(id="unemployment-map", style={"flex": "1", "height": "600px", "minWidth": "400px"}),
+            dcc.Graph(id="employment-map", figure=default_employment, style={"flex": "1", "height": "600px", "minWidth": "400px"}),
+            dcc.Graph(id="unemployment-map", figure=default_unemployment, style={"flex": "1", "height": "600px", "minWidth": "400px"}),
         ], style={"display": "flex", "gap": "2%"})
     ], className="my-8")
 
-    # --- Callback to update maps ---
-    @app.callback(
-        Output("employment-map", "figure"),
-        Output("unemployment-map", "figure"),
-        Input("employment-year-dropdown", "value")
-    )
-    def update_education_maps(selected_year):
-        if selected_year is None:
-            return {}, {}
-
-        # Filter data
-        emp_year = emp_rate_df[emp_rate_df['year'] == selected_year]
-        unemp_year = long_term_unemp_df[long_term_unemp_df['year'] == selected_year]
-
-        # Employment map
-        fig_employment = px.choropleth(
-            emp_year,
-            locations="country",
-            locationmode="country names",
-            color="value",
-            scope="europe",
-            color_continuous_scale="Viridis",
-            title=f"Employment rate (%)"
-        )
-        fig_employment.update_geos(fitbounds="locations")
-
-        # Unemployment map
-        fig_unemployment = px.choropleth(
-            unemp_year,
-            locations="country",
-            locationmode="country names",
-            color="value",
-            scope="europe",
-            color_continuous_scale="Plasma",
-            title=f"Long-term unemployment rate (%)"
-        )
-        fig_unemployment.update_geos(fitbounds="locations")
-
-        return  fig_employment, fig_unemployment
     return layout
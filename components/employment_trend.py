@@ -1,18 +1,70 @@
 from dash import html, dcc
-import plotly.express as px
+import pandas as pd
 from dash.dependencies import Input, Output
+from cache import memoize
+from metrics import lap
 from assets.country_colors import country_colors
+from components.trend_lines import LineChart, browser_trends
+from data_loader import country_ids
+from components.downloads import by_country, download_links, stacked
 
-def employment_trend_component(app, emp_rate_df, long_term_unemp_df):
+def employment_trend_component(app, emp_rate_df, long_term_unemp_df, catalog):
 
-    # Get list of countries from both datasets
-    countries = sorted(list(set(emp_rate_df['country'].unique()) | set(long_term_unemp_df['country'].unique())))
-    # Remove aggregated regions
-    for agg in ["European Union - 27 countries (from 2020)",
-                "Euro area – 20 countries (from 2023)",
-                "Euro area - 19 countries  (2015-2022)"]:
-        if agg in countries:
-            countries.remove(agg)
+    # Countries with any of the indicators, then their region averages
+    countries = catalog.countries("employment_rate", "long_term_unemployment")
+    options = catalog.country_options("employment_rate", "long_term_unemployment", regions=True)
+    default_countries = ["Finland"] if countries else None
+
+    # Figure skeletons, laid out once
+    employment_chart = LineChart(color="country", color_map=country_colors, markers=True, title="Employment rate",
+        labels={"value": "Employment rate (%)", "year": "Year", "country": "Country"},
+        layout={"yaxis_title": "Employment rate (%)"})
+    unemployment_chart = LineChart(color="country", color_map=country_colors, markers=True, title="Long-term unemployment rate",
+        labels={"value": "Long-term unemployment rate (%)", "year": "Year", "country": "Country"},
+        layout={"yaxis_title": "Investment GDP (%)"})
+
+    def filtered(selected_countries):
+        """The rows behind both charts (also what the download links export)."""
+        # Ensure it’s a list
+        if isinstance(selected_countries, str):
+            selected_countries = [selected_countries]
+        selected_ids = country_ids(pd.Series(selected_countries or [], dtype=str), "selection")
+
+        df_emloyment = emp_rate_df[emp_rate_df['country_id'].isin(selected_ids)].sort_values("year", kind="stable")
+        df_unemployment = long_term_unemp_df[long_term_unemp_df['country_id'].isin(selected_ids)].sort_values("year", kind="stable")
+        return df_emloyment, df_unemployment
+
+    # --- Both graphs for a selection (assets/trend_lines.js draws the same in the browser) ---
+    @memoize()
+    def update_gdp_trends(selected_countries):
+        if not selected_countries:
+            return {}, {}
+
+        df_emloyment, df_unemployment = filtered(selected_countries)
+        lap("filter")
+        fig_employment = employment_chart(df_emloyment)
+        fig_unemployment = unemployment_chart(df_unemployment)
+        lap("figure")
+
+        return fig_employment, fig_unemployment
+
+    # Pre-render the default view so the first page load needs no callback
+    default_employment, default_unemployment = update_gdp_trends(default_countries)
+
+    # All rows are sent once; picking countries is drawn in the browser
+    trend_data = browser_trends(
+        app, "employment-trend-data",
+        [Output("employment-trend", "figure"), Output("unemployment-trend", "figure")],
+        "employment-country-dropdown",
+        [(employment_chart, emp_rate_df.sort_values("year", kind="stable"), {}),
+         (unemployment_chart, long_term_unemp_df.sort_values("year", kind="stable"), {})],
+    )
+
+    downloads = download_links(
+        app, "employment-trends",
+        by_country(lambda countries: stacked(dict(zip(["Employment rate", "Long-term unemployment rate"], filtered(countries))))),
+        [Input("employment-country-dropdown", "value")], [default_countries],
+    )
 
     layout = html.Div([
         html.H3("Employment and long-term unemployment trends", 
@@ -39,62 +91,20 @@ def employment_trend_component(app, emp_rate_df, long_term_unemp_df):
         # Single dropdown for both graphs
         dcc.Dropdown(
             id="employment-country-dropdown",
-            options=[{"label": c, "value": c} for c in countries],
+            options=options,
             multi=True,
-            value=["Finland"] if countries else None,
+            value=default_countries,
             clearable=False,
             style={"width": "300px", "margin": "0 auto", "marginBottom": "10px"}
         ),
 
         # Graphs side by side (or stacked for smaller screens)
         html.Div([
-            dcc.Graph(id="employment-trend", style={"flex": "1", "height": "500px", "width": "800px"}),
-            dcc.Graph(id="unemployment-trend", style={"flex": "1", "height": "500px", "width": "800px"})
-        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"})
+            dcc.Graph(id="employment-trend", figure=default_employment, style={"flex": "1", "height": "500px", "width": "800px"}),
+            dcc.Graph(id="unemployment-trend", figure=default_unemployment, style={"flex": "1", "height": "500px", "width": "800px"})
+        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"}),
+        downloads,
+        trend_data,
     ])
 
-    # --- Single callback for both graphs ---
-    @app.callback(
-        Output("employment-trend", "figure"),
-        Output("unemployment-trend", "figure"),
-        Input("employment-country-dropdown", "value")
-    )
-    def update_gdp_trends(selected_countries):
-        if not selected_countries:
-            return {}, {}
-
-        # Ensure it’s a list
-        if isinstance(selected_countries, str):
-            selected_countries = [selected_countries]
-
-        # Filter real GDP
-        df_emloyment = emp_rate_df[emp_rate_df['country'].isin(selected_countries)].sort_values("year")
-        fig_employment = px.line(
-            df_emloyment,
-            x="year",
-            y="value",
-            color="country",
-            markers=True,
-            title="Employment rate",
-            labels={"value": "Employment rate (%)", "year": "Year", "country": "Country"},
-            color_discrete_map=country_colors
-        )
-        fig_employment.update_layout(yaxis_title="Employment rate (%)")
-
-        # Filter investment GDP
-        df_unemployment = long_term_unemp_df[long_term_unemp_df['country'].isin(selected_countries)].sort_values("year")
-        fig_unemployment = px.line(
-            df_unemployment,
-            x="year",
-            y="value",
-            color="country",
-            markers=True,
-            title="Long-term unemployment rate",
-            labels={"value": "Long-term unemployment rate (%)", "year": "Year", "country": "Country"},
-            color_discrete_map=country_colors
-        )
-        fig_unemployment.update_layout(yaxis_title="Investment GDP (%)")
-
-        return fig_employment, fig_unemployment
-
     return layout
@@ -1,23 +1,133 @@
 from dash import html, dcc
-import pandas as pd
-import plotly.express as px
 from dash.dependencies import Input, Output
+from cache import memoize
+from metrics import lap
+from components.figures import Series, highlight, hollow, with_layout
+from components.downloads import download_links
+from components.correlation_trend import r2_over_time
+from correlations import correlation_by_year
+from data_loader import country_table, imputed
 from assets.area_colors import area_colors
 from assets.country_codes import country_codes
 from assets.regions import region_map
 
 
-def employ_vs_unemploy(app, emp_rate_df, long_term_unemp_df):
+def employ_vs_unemploy(app, panel, filled_panel, catalog):
+
+    common_years = catalog.years("employment_rate", "long_term_unemployment", how="all")
+    default_year = common_years[-1] if common_years else None
+
+    # Figure skeleton, laid out once
+    scatter_chart = Series(
+        "scatter",
+        x='value_emp',
+        y='value_unemp',
+        color='country',
+        text='country_code',
+        color_map=area_colors,
+        labels={
+            'value_emp': 'Employment rate (%)',
+            'value_unemp': 'Long-term unemployment rate (%)',
+            'country': 'Country'
+        },
+        title="Employment vs. Long-term Unemployment",
+        # Default: all visible with normal colors
+        traces=dict(marker=dict(size=11, opacity=0.9)),
+        layout=dict(height=600, hovermode='closest', showlegend=False),
+    )
+
+    # ISO-3 labels of the points, by country ID
+    iso3 = country_table()["iso3"]
+
+    def filtered(selected_year, gaps="observed"):
+        """The points behind the scatter plot (also what the download links export)."""
+        # Merge employment and long-term unemployment data
+        source = filled_panel if gaps == "filled" else panel
+        panel_year = source[source['year'] == selected_year]
+        df = panel_year[['country_id', 'country', 'employment_rate', 'long_term_unemployment']].dropna().rename(
+            columns={'employment_rate': 'value_emp', 'long_term_unemployment': 'value_unemp'})
+        df['country_code'] = df['country_id'].map(iso3)
+        df['imputed'] = imputed(panel_year.loc[df.index], ['employment_rate', 'long_term_unemployment'])
+        return df
+
+    # --- Callback ---
+    @app.callback(
+        [Output("employment-correlation", "figure"),
+         Output("region-country-list", "children")],
+        [Input("employment-corr-year-dropdown", "value"),
+         Input("region-selector", "value"),
+         Input("employment-gaps", "value")],
+        prevent_initial_call=True,
+    )
+    @memoize()
+    def update_scatter(selected_year, selected_region, gaps="observed"):
+        if selected_year is None:
+            return {}, ""
 
-    drop_regions = [
-        "European Union - 27 countries (from 2020)",
-        "Euro area – 20 countries (from 2023)",
-        "Euro area - 19 countries  (2015-2022)"
-    ]
-    emp_rate_df = emp_rate_df.loc[~emp_rate_df["country"].isin(drop_regions)]
-    long_term_unemp_df = long_term_unemp_df.loc[~long_term_unemp_df["country"].isin(drop_regions)]
+        df = filtered(selected_year, gaps)
+        lap("filter")
 
-    common_years = sorted(list(set(emp_rate_df['year'].unique()) & set(long_term_unemp_df['year'].unique())))
+        # Base figure: everyone colored by area_colors
+        fig = scatter_chart(df)
+        # Filled-in points are drawn hollow
+        hollow(fig, df.loc[df["imputed"], "country"])
+
+        # --- Highlight if a region is selected ---
+        if selected_region and selected_region != "Select region":
+            highlighted = region_map[selected_region]
+
+            # Reduce opacity for non-selected countries
+            highlight(fig, highlighted, size=15)
+
+            # Sidebar country list
+            countries = region_map[selected_region]
+            country_list = [
+                html.H5(f"{selected_region}", style={"marginBottom": "10px"})
+            ] + [html.Div(f"{country_codes[c]} – {c}") for c in countries]
+        else:
+            country_list = [html.Div("Select a region to see details.", style={"color": "#9CA3AF"})]
+
+        correlation = df["value_emp"].corr(df["value_unemp"]) ** 2
+        fig = with_layout(fig,
+            title={"text": f"<br><sup>Coefficient of determination of all datapoints: R² = {correlation:.2f}</sup>"},
+            # Layout tweaks
+            xaxis=dict(range=[df['value_emp'].min() - 2, df['value_emp'].max() + 2]),
+            yaxis=dict(range=[df['value_unemp'].min() - 2, df['value_unemp'].max() + 2]),
+        )
+
+        lap("figure")
+
+        return fig, country_list
+
+    # Pre-render the default view so the first page load needs no callback
+    default_fig, default_country_list = update_scatter(default_year, "Select region", "observed")
+
+    downloads = download_links(
+        app, "employment-unemployment-correlation",
+        lambda year, gaps="observed": filtered(year, gaps).assign(year=year),
+        [Input("employment-corr-year-dropdown", "value"), Input("employment-gaps", "value")], [default_year, "observed"],
+    )
+
+    # --- R² over time, computed in one pass and cached per dataset version ---
+    @memoize()
+    def yearly_correlations(gaps):
+        source = filled_panel if gaps == "filled" else panel
+        return correlation_by_year(source, [("employment_rate", "long_term_unemployment")])
+
+    @app.callback(
+        Output("employment-r2-over-time", "figure"),
+        Input("employment-gaps", "value"),
+        prevent_initial_call=True,
+    )
+    @memoize()
+    def update_r2_over_time(gaps):
+        return r2_over_time(
+            yearly_correlations(gaps),
+            {"Employment vs long-term unemployment": ("employment_rate", "long_term_unemployment")},
+            "Employment vs long-term unemployment: R² by year",
+        )
+
+    r2_figure = update_r2_over_time("observed")
 
     # --- Layout ---
     layout = html.Div([
@@ -43,24 +153,37 @@ def employ_vs_unemploy(app, emp_rate_df, long_term_unemp_df):
         html.Div([
             dcc.Dropdown(
                 id="employment-corr-year-dropdown",
-                options=[{"label": str(y), "value": y} for y in sorted(common_years, reverse=True)],
-                value=common_years[-1] if common_years else None,
+                options=catalog.year_options("employment_rate", "long_term_unemployment", how="all"),
+                value=default_year,
                 clearable=False,
                 style={"width": "200px", "marginRight": "20px"}
             ),
             dcc.Dropdown(
                 id="region-selector",
-                options=[{"label": r, "value": r} for r in ["Select region"] + list(region_map.keys())],
+                options=catalog.region_options(),
                 value="Select region",
                 clearable=False,
                 style={"width": "250px"}
             ),
         ], style={"display": "flex", "justifyContent": "center", "marginBottom": "20px"}),
 
+        # --- Observed values only, or gaps filled (filled-in points drawn hollow) ---
+        dcc.RadioItems(
+            id="employment-gaps",
+            options=[
+                {"label": " Observed values", "value": "observed"},
+                {"label": " Fill gaps (filled-in points drawn hollow)", "value": "filled"},
+            ],
+            value="observed",
+            inline=True,
+            inputStyle={"marginLeft": "15px"},
+            style={"textAlign": "center", "fontSize": "14px", "color": "#4B5563", "marginBottom": "20px"},
+        ),
+
         # --- Graph + Sidebar ---
         html.Div([
-            dcc.Graph(id="employment-correlation", style={"flex": "4"}),  # bigger chart
-            html.Div(id="region-country-list", style={
+            dcc.Graph(id="employment-correlation", figure=default_fig, style={"flex": "4"}),  # bigger chart
+            html.Div(default_country_list, id="region-country-list", style={
                 "flex": "0.8",  # smaller sidebar
                 "padding": "10px",
                 "borderLeft": "1px solid #ddd",
@@ -69,76 +192,9 @@ def employ_vs_unemploy(app, emp_rate_df, long_term_unemp_df):
                 "maxWidth": "220px",
                 "overflowY": "auto"
             })
-        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"})
+        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"}),
+        downloads,
+        dcc.Graph(id="employment-r2-over-time", figure=r2_figure),
     ])
 
-    # --- Callback ---
-    @app.callback(
-        [Output("employment-correlation", "figure"),
-         Output("region-country-list", "children")],
-        [Input("employment-corr-year-dropdown", "value"),
-         Input("region-selector", "value")]
-    )
-    def update_scatter(selected_year, selected_region):
-        if selected_year is None:
-            return {}, ""
-
-        # Merge employment and long-term unemployment data
-        df_emp = emp_rate_df[emp_rate_df['year'] == selected_year][['country', 'value']]
-        df_unemp = long_term_unemp_df[long_term_unemp_df['year'] == selected_year][['country', 'value']]
-        df = pd.merge(df_emp, df_unemp, on='country', suffixes=('_emp', '_unemp'))
-        df['country_code'] = df['country'].map(country_codes)
-
-        # Base figure: everyone colored by area_colors
-        fig = px.scatter(
-            df,
-            x='value_emp',
-            y='value_unemp',
-            color='country',
-            text='country_code',
-            color_discrete_map=area_colors,
-            labels={
-                'value_emp': 'Employment rate (%)',
-                'value_unemp': 'Long-term unemployment rate (%)',
-                'country': 'Country'
-            },
-            title=f"Employment vs. Long-term Unemployment"
-        )
-
-        # Default: all visible with normal colors
-        fig.update_traces(marker=dict(size=11, opacity=0.9))
-
-        # --- Highlight if a region is selected ---
-        if selected_region and selected_region != "Select region":
-            highlighted = region_map[selected_region]
-
-            # Reduce opacity for non-selected countries
-            fig.for_each_trace(
-                lambda trace: trace.update(marker_opacity=0.25)
-                if trace.name not in highlighted else trace.update(marker_opacity=1, marker_size=15)
-            )
-
-            # Sidebar country list
-            countries = region_map[selected_region]
-            country_list = [
-                html.H5(f"{selected_region}", style={"marginBottom": "10px"})
-            ] + [html.Div(f"{country_codes[c]} – {c}") for c in countries]
-        else:
-            country_list = [html.Div("Select a region to see details.", style={"color": "#9CA3AF"})]
-
-        correlation = df["value_emp"].corr(df["value_unemp"]) ** 2
-        fig.update_layout(
-            title=f"<br><sup>Coefficient of determination of all datapoints: R² = {correlation:.2f}</sup>"
-        )
-        # Layout tweaks
-        fig.update_layout(
-            xaxis=dict(range=[df['value_emp'].min() - 2, df['value_emp'].max() + 2]),
-            yaxis=dict(range=[df['value_unemp'].min() - 2, df['value_unemp'].max() + 2]),
-            height=600,
-            hovermode='closest',
-            showlegend=False
-        )
-
-        return fig, country_list
-
     return layout
@@ -0,0 +1,185 @@
+import os
+
+import pandas as pd
+
+from data_loader import country_table
+from limits import degraded
+
+# Figures are laid out once by plotly express and then only refilled with data.
+# DASH_FIGURE_SKELETONS=0 builds every figure with plotly express again (see figure_bench.py).
+SKELETONS = os.environ.get("DASH_FIGURE_SKELETONS", "1") != "0"
+
+# Stand-ins for a series name / color in the placeholder figure, replaced per series
+_NAME = "\x00series\x00"
+_COLOR = "#010203"
+
+
+def with_layout(fig, **updates):
+    """Copy of a figure dict with layout keys replaced, nested dicts merged one level deep."""
+    layout = dict(fig["layout"])
+    for key, value in updates.items():
+        if isinstance(value, dict) and isinstance(layout.get(key), dict):
+            value = {**layout[key], **value}
+        layout[key] = value
+    return {"data": fig["data"], "layout": layout}
+
+
+def highlight(fig, names, size):
+    """Fades the markers of every trace not in `names` and enlarges the rest (in place)."""
+    for trace in fig["data"]:
+        if trace.get("name") in names:
+            trace["marker"] = {**trace.get("marker", {}), "opacity": 1, "size": size}
+        else:
+            trace["marker"] = {**trace.get("marker", {}), "opacity": 0.25}
+    return fig
+
+
+def hollow(fig, names):
+    """Draws the markers of the traces in `names` as open circles (in place), e.g. for filled-in values."""
+    names = set(names)
+    for trace in fig["data"]:
+        if trace.get("name") in names:
+            trace["marker"] = {**trace.get("marker", {}), "symbol": "circle-open"}
+    return fig
+
+
+def _title(title):
+    return {"title": {"text": title}} if title is not None else {}
+
+
+def _substitute(value, name, color):
+    if isinstance(value, str):
+        return value.replace(_NAME, name).replace(_COLOR, color)
+    if isinstance(value, dict):
+        return {k: _substitute(v, name, color) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_substitute(v, name, color) for v in value]
+    return value
+
+
+class Choropleth:
+    """
+    A px.choropleth of `value` per country over Europe. Countries are
+    located by the ISO-3 code of their country_id, and hover shows the name.
+    """
+
+    def __init__(self, colorscale, title, layout=None):
+        self.kwargs = dict(
+            locations="iso3",
+            locationmode="ISO-3",
+            hover_name="country",
+            labels={"iso3": "Code"},
+            color="value",
+            scope="europe",
+            color_continuous_scale=colorscale,
+            title=title,
+        )
+        self.layout = layout or {}
+        self._skeleton = None
+
+    def _px(self, df):
+        import plotly.express as px
+
+        fig = px.choropleth(df, **self.kwargs)
+        fig.update_geos(fitbounds="locations")
+        fig.update_layout(**self.layout)
+        return fig.to_dict()
+
+    def __call__(self, df):
+        df = df.assign(iso3=df["country_id"].map(country_table()["iso3"]))
+        if not SKELETONS:
+            return self._px(df)
+        if self._skeleton is None:
+            self._skeleton = self._px(df.iloc[:0])
+
+        trace = {
+            **self._skeleton["data"][0],
+            "locations": df["iso3"].tolist(), "z": df["value"].tolist(), "hovertext": df["country"].tolist(),
+        }
+        return {"data": [trace], "layout": self._skeleton["layout"]}
+
+
+class Series:
+    """
+    A px.line / px.scatter / px.bar with one trace per `color` value.
+
+    The skeleton is drawn once from a one-row placeholder frame. Each request
+    copies the placeholder trace per series, with that series' name, color
+    and data. `traces` and `layout` are applied like update_traces /
+    update_layout after px. Arguments px uses only to add traces (e.g.
+    trendline) go in `px_only`. They are skipped by the skeleton, so only
+    pass ones that draw nothing here. plotly express skips them too under
+    load (limits.degraded()).
+    """
+
+    def __init__(self, kind, x, y, color, color_map, text=None, traces=None, layout=None, px_only=None, **kwargs):
+        self.kind = kind
+        self.columns = {"x": x, "y": y}
+        if text:
+            self.columns["text"] = text
+        self.color = color
+        self.color_map = color_map
+        self.kwargs = dict(x=x, y=y, color=color, text=text, **kwargs)
+        self.traces = traces or {}
+        self.layout = layout or {}
+        self.px_only = px_only or {}
+        self._skeleton = None
+
+    def _px(self, df, color_map, **px_only):
+        import plotly.express as px
+
+        if df.empty:
+            fig = getattr(px, self.kind)()
+        else:
+            fig = getattr(px, self.kind)(df, color_discrete_map=color_map, **self.kwargs, **px_only)
+        fig.update_traces(**self.traces)
+        fig.update_layout(**self.layout)
+        return fig.to_dict()
+
+    def _build_skeleton(self):
+        placeholder = {column: [""] if key == "text" else [0] for key, column in self.columns.items()}
+        placeholder[self.color] = [_NAME]
+        fig = self._px(pd.DataFrame(placeholder), {_NAME: _COLOR})
+        template = fig["layout"].get("template", {}).get("layout", {})
+        return fig["data"][0], fig["layout"], template.get("colorway", [_COLOR])
+
+    def _groups(self, df):
+        if df.empty:
+            return
+        names = df[self.color].tolist()
+        if len(set(names)) == len(names):
+            # One row per series (scatter plots): skip the groupby
+            columns = {key: df[column].tolist() for key, column in self.columns.items()}
+            for i, name in enumerate(names):
+                yield name, {key: [values[i]] for key, values in columns.items()}
+        else:
+            for name, part in df.groupby(self.color, sort=False):
+                yield name, {key: part[column].tolist() for key, column in self.columns.items()}
+
+    def skeleton(self):
+        """(placeholder trace, layout, colorway): the trace's name and color are _NAME and _COLOR."""
+        if self._skeleton is None:
+            self._skeleton = self._build_skeleton()
+        return self._skeleton
+
+    def __call__(self, df, title=None, **layout):
+        if not SKELETONS:
+            fig = self._px(df, self.color_map, **({} if degraded() else self.px_only))
+            return with_layout(fig, **_title(title), **layout) if title is not None or layout else fig
+
+        trace, base_layout, colorway = self.skeleton()
+
+        # Unmapped series get colors the way px assigns them
+        colors = dict(self.color_map)
+        data = []
+        for name, values in self._groups(df):
+            if colors.get(name) is None:
+                colors[name] = colorway[len(colors) % len(colorway)]
+            data.append({**_substitute(trace, str(name), colors[name]), **values})
+
+        # px orders a categorical axis by series when the axis is the color column (bars)
+        for axis in ("xaxis", "yaxis"):
+            if base_layout.get(axis, {}).get("categoryarray") == [_NAME]:
+                layout.setdefault(axis, {"categoryarray": [trace["name"] for trace in data]})
+
+        return with_layout({"data": data, "layout": base_layout}, **_title(title), **layout)
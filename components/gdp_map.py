@@ -1,16 +1,55 @@
 # components/gdp_maps.py
 from dash import html, dcc
-import plotly.express as px
 from dash.dependencies import Input, Output
+from cache import memoize
+from warmup import warm
+from metrics import lap
+from components.figures import Choropleth
 
-def register_gdp_component(app, real_df, investment_df):
+def register_gdp_component(app, real_df, investment_df, catalog):
     """
     Creates GDP layout and registers callbacks for Dash.
     Returns the layout Div.
     """
 
-    # Find common years
-    common_years = sorted(list(set(real_df['year'].unique()) & set(investment_df['year'].unique())))
+    # Years with either map
+    common_years = catalog.years("real_gdp", "investment_gdp")
+    default_year = common_years[-1] if common_years else None
+
+    # Map skeletons, laid out once
+    real_map = Choropleth("Viridis", "Real GDP in euros (€)")
+    invest_map = Choropleth("Plasma", "Investment share of GDP in percentages (%)")
+
+    # --- Callback to update maps ---
+    @app.callback(
+        Output("real-gdp-map", "figure"),
+        Output("investment-gdp-map", "figure"),
+        Input("gdp-year-dropdown", "value"),
+        prevent_initial_call=True,
+    )
+    @memoize()
+    def update_gdp_maps(selected_year):
+        if selected_year is None:
+            return {}, {}
+
+        # Filter data
+        real_year = real_df[real_df['year'] == selected_year]
+        invest_year = investment_df[investment_df['year'] == selected_year]
+        lap("filter")
+
+        # Real GDP map
+        fig_real = real_map(real_year)
+
+        # Investment GDP map
+        fig_invest = invest_map(invest_year)
+        lap("figure")
+
+        return fig_real, fig_invest
+
+    # Pre-render the default view so the first page load needs no callback
+    default_real, default_invest = update_gdp_maps(default_year)
+    # Every other year is computed in the background after startup, newest first
+    warm(update_gdp_maps, [(year,) for year in reversed(common_years)])
 
     # Layout with dropdown + two side-by-side maps
     layout = html.Div([
@@ -40,57 +79,17 @@ def register_gdp_component(app, real_df, investment_df):
         
         dcc.Dropdown(
             id="gdp-year-dropdown",
-            options=[{"label": str(y), "value": y} for y in sorted(common_years, reverse=True)],
-            value=common_years[-1] if common_years else None,
+            options=catalog.year_options("real_gdp", "investment_gdp"),
+            value=default_year,
             clearable=False,
             style={"width": "200px", "margin": "0 auto", "marginBottom": "20px"}
         ),
 
         html.Div([
-            dcc.Graph(id="real-gdp-map", style={"flex": "1", "height": "600px", "minWidth": "400px"}),
-            dcc.Graph(id="investment-gdp-map", style={"flex": "1", "height": "600px", "minWidth": "400px"})
+            dcc.Graph(id="real-gdp-map", figure=default_real, style={"flex": "1", "height": "600px", "minWidth": "400px"}),
+            dcc.Graph(id="investment-gdp-map", figure=default_invest, style={"flex": "1", "height": "600px", "minWidth": "400px"})
         ], style={"display": "flex", "gap": "2%"})
     ], className="my-8")
 
-    # --- Callback to update maps ---
-    @app.callback(
-        Output("real-gdp-map", "figure"),
-        Output("investment-gdp-map", "figure"),
-        Input("gdp-year-dropdown", "value")
-    )
-    def update_gdp_maps(selected_year):
-        if selected_year is None:
-            return {}, {}
-
-        # Filter data
-        real_year = real_df[real_df['year'] == selected_year]
-        invest_year = investment_df[investment_df['year'] == selected_year]
-
-        # Real GDP map
-        fig_real = px.choropleth(
-            real_year,
-            locations="country",
-            locationmode="country names",
-            color="value",
-            scope="europe",
-            color_continuous_scale="Viridis",
-            title=f"Real GDP in euros (€)"
-        )
-        fig_real.update_geos(fitbounds="locations")
-
-        # Investment GDP map
-        fig_invest = px.choropleth(
-            invest_year,
-            locations="country",
-            locationmode="country names",
-            color="value",
-            scope="europe",
-            color_continuous_scale="Plasma",
-            title=f"Investment share of GDP in percentages (%)"
-        )
-        fig_invest.update_geos(fitbounds="locations")
-
-        return fig_real, fig_invest
-
     return layout
 
@@ -1,24 +1,70 @@
 from dash import html, dcc
 from dash.dependencies import Input, Output
-import plotly.express as px
-import os
-import math
-
-
-def gdp_money_component(app, real_df, investment_df):
-
-    # Get all common years
-    common_years = sorted(list(set(real_df['year'].unique()) & set(investment_df['year'].unique())))
+from cache import memoize
+from metrics import lap
+from data_loader import country_ids
+import pandas as pd
+
+
+def gdp_money_component(app, real_df, investment_df, catalog):
+
+    # The coins need both GDP and investment share: years and countries with both
+    common_years = catalog.years("real_gdp", "investment_gdp", how="all")
+    default_year = common_years[-1] if common_years else None
+    country_options = catalog.country_options("real_gdp", "investment_gdp", how="all")
+
+    @memoize()
+    def country_visual(selected_year, country):
+        if not selected_year or not country:
+            return html.Div()
+
+        # Filter for the right country and year, by country ID
+        try:
+            country_id = country_ids(pd.Series([country], dtype=str), "selection").iloc[0]
+        except ValueError:
+            # A name that is not in the country table (stale or hand-made request)
+            return html.Div()
+        real_row = real_df[(real_df['country_id'] == country_id) & (real_df['year'] == selected_year)]
+        invest_row = investment_df[(investment_df['country_id'] == country_id) & (investment_df['year'] == selected_year)]
+        lap("filter")
+
+        if real_row.empty or invest_row.empty:
+            return html.Div(
+                "No data found")
+
+        # Both GDP and investment share are stored in the 'value' column
+        gdp = float(real_row.iloc[0]['value'])
+        invest_share = float(invest_row.iloc[0]['value'])  # e.g. 19.3 (%)
+
+        # Convert GDP to number of icons (each icon = 1000 GDP units)
+        total_icons = min(100, max(1, round(gdp / 1000)))
+        bright_count = round(total_icons * invest_share / 100)
+
+        # Build emoji icons
+        icons = []
+        for i in range(total_icons):
+            is_bright = i >= total_icons - bright_count  # brighter icons = investment share
+            icons.append(
+                html.Span(
+                    "💰",  # GDP icon
+                    className="money-emoji" if not is_bright else "money-emoji money-bright"
+                )
+            )
+        lap("figure")
 
+        return list(reversed(icons))
 
-    countries = sorted(list(set(real_df['country'].unique()) | set(investment_df['country'].unique())))
-    # Remove aggregated regions
-    for agg in ["European Union - 27 countries (from 2020)",
-                "Euro area – 20 countries (from 2023)",
-                "Euro area - 19 countries  (2015-2022)"]:
-        if agg in countries:
-            countries.remove(agg)
+    # One callback per side, so changing country A leaves country B alone
+    for side in ["a", "b"]:
+        app.callback(
+            Output(f"country-{side}-visual", "children"),
+            Input("gdp-money-year-dropdown", "value"),
+            Input(f"country-{side}-dropdown", "value"),
+            prevent_initial_call=True,
+        )(country_visual)
 
+    # Pre-render the default view so the first page load needs no callback
+    default_a, default_b = country_visual(default_year, "Finland"), country_visual(default_year, "Sweden")
 
     layout = html.Div([
         html.H3("European GDP Comparison", 
@@ -63,8 +109,8 @@ def gdp_money_component(app, real_df, investment_df):
         html.Div([
             dcc.Dropdown(
                 id="gdp-money-year-dropdown",
-                options=[{"label": str(y), "value": y} for y in sorted(common_years, reverse=True)],
-                value=common_years[-1] if common_years else None,
+                options=catalog.year_options("real_gdp", "investment_gdp", how="all"),
+                value=default_year,
                 clearable=False,
                 style={"width": "200px", "margin": "0 auto", "marginBottom": "20px"}
             ),
@@ -74,7 +120,7 @@ def gdp_money_component(app, real_df, investment_df):
                     html.Label("Country A", style={"fontWeight": "bold"}),
                     dcc.Dropdown(
                         id="country-a-dropdown",
-                        options=[{"label": c, "value": c} for c in countries],
+                        options=country_options,
                         value="Finland",
                         clearable=False,
                         style={"marginBottom": "20px"}
@@ -85,7 +131,7 @@ def gdp_money_component(app, real_df, investment_df):
                     html.Label("Country B", style={"fontWeight": "bold"}),
                     dcc.Dropdown(
                         id="country-b-dropdown",
-                        options=[{"label": c, "value": c} for c in countries],
+                        options=country_options,
                         value="Sweden",
                         clearable=False,
                         style={"marginBottom": "20px"}
@@ -95,59 +141,11 @@ def gdp_money_component(app, real_df, investment_df):
         ]),
 
         html.Div([
-            html.Div(id="country-a-visual", className="money-grid"),
-            html.Div(id="country-b-visual", className="money-grid")
+            html.Div(default_a, id="country-a-visual", className="money-grid"),
+            html.Div(default_b, id="country-b-visual", className="money-grid")
         ], style={"display": "flex", "justifyContent": "space-around", "gap": "5%", "marginTop": "30px"}),
     ], className="my-8")
 
     # --- Callbacks ---
 
-    @app.callback(
-        Output("country-a-visual", "children"),
-        Output("country-b-visual", "children"),
-        Input("gdp-money-year-dropdown", "value"),
-        Input("country-a-dropdown", "value"),
-        Input("country-b-dropdown", "value")
-    )
-    def update_visuals(selected_year, country_a, country_b):
-        if not selected_year or not country_a or not country_b:
-            return html.Div(), html.Div()
-
-        visuals = []
-        for country in [country_a, country_b]:
-            # Filter for the right country and year
-            real_row = real_df[(real_df['country'] == country) & (real_df['year'] == selected_year)]
-            invest_row = investment_df[(investment_df['country'] == country) & (investment_df['year'] == selected_year)]
-
-            if real_row.empty or invest_row.empty:
-                visuals.append(
-                    html.Div(
-                        "No data found")
-                )
-                continue
-
-            # Both GDP and investment share are stored in the 'value' column
-            gdp = float(real_row.iloc[0]['value'])
-            invest_share = float(invest_row.iloc[0]['value'])  # e.g. 19.3 (%)
-
-            # Convert GDP to number of icons (each icon = 1000 GDP units)
-            total_icons = min(100, max(1, round(gdp / 1000)))
-            bright_count = round(total_icons * invest_share / 100)
-
-            # Build emoji icons
-            icons = []
-            for i in range(total_icons):
-                is_bright = i >= total_icons - bright_count  # brighter icons = investment share
-                icons.append(
-                    html.Span(
-                        "💰",  # GDP icon
-                        className="money-emoji" if not is_bright else "money-emoji money-bright"
-                    )
-                )
-
-            visuals.append(list(reversed(icons)))
-
-        return visuals[0], visuals[1]
-
-
     return layout
@@ -1,23 +1,75 @@
 from dash import html, dcc
-import plotly.express as px
+import pandas as pd
 from dash.dependencies import Input, Output
+from cache import memoize
+from metrics import lap
 from assets.country_colors import country_colors
+from components.trend_lines import LineChart, browser_trends
+from data_loader import country_ids
+from components.downloads import by_country, download_links, stacked
 
-def gdp_trend_component(app, real_df, investment_df):
+def gdp_trend_component(app, real_df, investment_df, catalog):
     """
     Creates a layout for GDP trend line plots under the maps.
     Registers callbacks to update plots based on selected country.
     Returns the layout Div.
     """
 
-    # Get list of countries from both datasets
-    countries = sorted(list(set(real_df['country'].unique()) | set(investment_df['country'].unique())))
-    # Remove aggregated regions
-    for agg in ["European Union - 27 countries (from 2020)",
-                "Euro area – 20 countries (from 2023)",
-                "Euro area - 19 countries  (2015-2022)"]:
-        if agg in countries:
-            countries.remove(agg)
+    # Countries with any of the indicators, then their region averages
+    countries = catalog.countries("real_gdp", "investment_gdp")
+    options = catalog.country_options("real_gdp", "investment_gdp", regions=True)
+    default_countries = ["Finland"] if countries else None
+
+    # Figure skeletons, laid out once
+    real_chart = LineChart(color="country", color_map=country_colors, markers=True, title="Real GDP Trend",
+        labels={"value": "GDP (€)", "year": "Year", "country": "Country"},
+        layout={"yaxis_title": "GDP (€)"})
+    invest_chart = LineChart(color="country", color_map=country_colors, markers=True, title="Investment GDP Trend",
+        labels={"value": "Investment share (%)", "year": "Year", "country": "Country"},
+        layout={"yaxis_title": "Investment GDP (%)"})
+
+    def filtered(selected_countries):
+        """The rows behind both charts (also what the download links export)."""
+        # Ensure it’s a list
+        if isinstance(selected_countries, str):
+            selected_countries = [selected_countries]
+        selected_ids = country_ids(pd.Series(selected_countries or [], dtype=str), "selection")
+
+        df_real = real_df[real_df['country_id'].isin(selected_ids)].sort_values("year", kind="stable")
+        df_invest = investment_df[investment_df['country_id'].isin(selected_ids)].sort_values("year", kind="stable")
+        return df_real, df_invest
+
+    # --- Both graphs for a selection (assets/trend_lines.js draws the same in the browser) ---
+    @memoize()
+    def update_gdp_trends(selected_countries):
+        if not selected_countries:
+            return {}, {}
+
+        df_real, df_invest = filtered(selected_countries)
+        lap("filter")
+        fig_real = real_chart(df_real)
+        fig_invest = invest_chart(df_invest)
+        lap("figure")
+
+        return fig_real, fig_invest
+
+    # Pre-render the default view so the first page load needs no callback
+    default_real, default_invest = update_gdp_trends(default_countries)
+
+    # All rows are sent once; picking countries is drawn in the browser
+    trend_data = browser_trends(
+        app, "gdp-trend-data",
+        [Output("real-gdp-trend", "figure"), Output("investment-gdp-trend", "figure")],
+        "gdp-country-dropdown",
+        [(real_chart, real_df.sort_values("year", kind="stable"), {}),
+         (invest_chart, investment_df.sort_values("year", kind="stable"), {})],
+    )
+
+    downloads = download_links(
+        app, "gdp-trends",
+        by_country(lambda countries: stacked(dict(zip(["Real GDP", "Investment GDP"], filtered(countries))))),
+        [Input("gdp-country-dropdown", "value")], [default_countries],
+    )
 
     layout = html.Div([
         html.H3("GDP Trends", 
@@ -44,62 +96,20 @@ def gdp_trend_component(app, real_df, investment_df):
         # Single dropdown for both graphs
         dcc.Dropdown(
             id="gdp-country-dropdown",
-            options=[{"label": c, "value": c} for c in countries],
+            options=options,
             multi=True,
-            value=["Finland"] if countries else None,
+            value=default_countries,
             clearable=False,
             style={"width": "300px", "margin": "0 auto", "marginBottom": "10px"}
         ),
 
         # Graphs side by side (or stacked for smaller screens)
         html.Div([
-            dcc.Graph(id="real-gdp-trend", style={"flex": "1", "height": "500px"}),
-            dcc.Graph(id="investment-gdp-trend", style={"flex": "1", "height": "500px"})
-        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"})
+            dcc.Graph(id="real-gdp-trend", figure=default_real, style={"flex": "1", "height": "500px"}),
+            dcc.Graph(id="investment-gdp-trend", figure=default_invest, style={"flex": "1", "height": "500px"})
+        ], style={"display": "flex", "gap": "2%", "flexWrap": "wrap"}),
+        downloads,
+        trend_data,
     ])
 
-    # --- Single callback for both graphs ---
-    @app.callback(
-        Output("real-gdp-trend", "figure"),
-        Output("investment-gdp-trend", "figure"),
-        Input("gdp-country-dropdown", "value")
-    )
-    def update_gdp_trends(selected_countries):
-        if not selected_countries:
-            return {}, {}
-
-        # Ensure it’s a list
-        if isinstance(selected_countries, str):
-            selected_countries = [selected_countries]
-
-        # Filter real GDP
-        df_real = real_df[real_df['country'].isin(selected_countries)].sort_values("year")
-        fig_real = px.line(
-            df_real,
-            x="year",
-            y="value",
-            color="country",
-            markers=True,
-            title="Real GDP Trend",
-            labels={"value": "GDP (€)", "year": "Year", "country": "Country"},
-            color_discrete_map=country_colors
-        )
-        fig_real.update_layout(yaxis_title="GDP (€)")
-
-        # Filter investment GDP
-        df_invest = investment_df[investment_df['country'].isin(selected_countries)].sort_values("year")
-        fig_invest = px.line(
-            df_invest,
-            x="year",
-            y="value",
-            color="country",
-            markers=True,
-            title="Investment GDP Trend",
-            labels={"value": "Investment share (%)", "year": "Year", "country": "Country"},
-            color_discrete_map=country_colors
-        )
-        fig_invest.update_layout(yaxis_title="Investment GDP (%)")
-
-        return fig_real, fig_invest
-
     return layout
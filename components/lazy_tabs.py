@@ -0,0 +1,71 @@
+from dash import html, dcc, no_update
+import dash_bootstrap_components as dbc
+from dash.dependencies import Input, Output, State
+
+
+def lazy_tabs(app, tabs_id, tabs, active_tab=None, className="mb-3"):
+    """
+    dbc.Tabs that only render a tab's content when it is first opened.
+    `tabs` is a list of (tab_id, label, children).
+    Graphs in hidden tabs are not requested until the tab is opened and
+    stay in the browser afterwards, so switching back costs no request.
+    """
+    active_tab = active_tab or tabs[0][0]
+    pane_ids = [f"{tabs_id}-{tab_id}-pane" for tab_id, _, _ in tabs]
+    contents = {tab_id: children for tab_id, _, children in tabs}
+
+    layout = html.Div([
+        dbc.Tabs(
+            [
+                dbc.Tab(
+                    html.Div(
+                        children if tab_id == active_tab else None,
+                        id=pane_id,
+                        style={"padding": "25px"},
+                    ),
+                    label=label,
+                    tab_id=tab_id,
+                )
+                for (tab_id, label, children), pane_id in zip(tabs, pane_ids)
+            ],
+            id=tabs_id,
+            active_tab=active_tab,
+            className=className,
+        ),
+        # Tabs already sent to this browser, and the tab waiting to be rendered
+        dcc.Store(id=f"{tabs_id}-rendered", data=[active_tab]),
+        dcc.Store(id=f"{tabs_id}-pending"),
+    ])
+
+    # Decide in the browser whether the server is needed at all
+    app.clientside_callback(
+        """
+        function(activeTab, rendered) {
+            if (!activeTab || (rendered || []).includes(activeTab)) {
+                return window.dash_clientside.no_update;
+            }
+            return activeTab;
+        }
+        """,
+        Output(f"{tabs_id}-pending", "data"),
+        Input(tabs_id, "active_tab"),
+        State(f"{tabs_id}-rendered", "data"),
+        prevent_initial_call=True,
+    )
+
+    @app.callback(
+        [Output(pane_id, "children") for pane_id in pane_ids]
+        + [Output(f"{tabs_id}-rendered", "data")],
+        Input(f"{tabs_id}-pending", "data"),
+        State(f"{tabs_id}-rendered", "data"),
+        prevent_initial_call=True,
+    )
+    def render_tab(pending, rendered):
+        rendered = rendered or []
+        if pending not in contents or pending in rendered:
+            return [no_update] * (len(pane_ids) + 1)
+
+        children = [contents[pending] if tab_id == pending else no_update for tab_id, _, _ in tabs]
+        return children + [rendered + [pending]]
+
+    return layout
@@ -0,0 +1,221 @@
+import os
+
+import pandas as pd
+from dash import dcc
+from dash.dependencies import ClientsideFunction, Input, State
+
+from cache import memoize
+from components import figures
+
+# Above this many lines a trend chart switches to WebGL with the lines merged into a few traces
+MAX_SERIES = int(os.environ.get("DASH_TREND_MAX_SERIES", 10))
+LINE_COLOR = "#9CA3AF"
+# Columns of a min-max band under a line (data_loader.region_aggregates rows)
+BAND = ("min", "max")
+
+
+def _translucent(color, alpha=0.15):
+    if isinstance(color, str) and len(color) == 7 and color.startswith("#"):
+        r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+        return f"rgba({r}, {g}, {b}, {alpha})"
+    return f"rgba(156, 163, 175, {alpha})"
+
+
+def with_gaps(df, series, x, y):
+    """
+    Sorts rows by series and x and puts a row with no x/y after each series,
+    so one trace can draw many lines without joining them.
+    """
+    df = df.sort_values([series, x]).reset_index(drop=True)
+    gaps = df.drop_duplicates(series, keep="last").assign(**{x: float("nan"), y: float("nan")})
+    return pd.concat([df, gaps]).sort_index(kind="stable")
+
+
+class LineChart:
+    """
+    px.line(df, x, y, color=color, ...) for up to MAX_SERIES lines, drawn
+    from a figures.Series skeleton.
+
+    With more lines, every line of the same color goes into one Scattergl
+    trace. Lines are separated by gaps, and hover still names the series.
+    When each series has its own color (color == series), all lines share a
+    single grey trace with the markers colored per series, and the legend
+    comes from one empty stub trace per series.
+
+    Series with BAND columns (region averages) are drawn dotted over a
+    shaded min-max band.
+    """
+
+    def __init__(self, color, color_map, series="country", x="year", y="value", markers=False, title=None, labels=None, layout=None):
+        self.color = color
+        self.color_map = color_map
+        self.series = series
+        self.x = x
+        self.y = y
+        self.markers = markers
+        self.labels = labels or {}
+        self.layout = {"title": {"text": title}, **(layout or {})}
+        self.lines = figures.Series(
+            "line", x=x, y=y, color=color, color_map=color_map, markers=markers, title=title,
+            labels=self.labels, layout=layout,
+        )
+        self._merged_layout = None
+
+    def __call__(self, df):
+        if df[self.series].nunique() <= MAX_SERIES:
+            fig = self.lines(df)
+        else:
+            fig = self._merged(df)
+        if all(column in df for column in BAND) and df[BAND[0]].notna().any():
+            fig = self._with_bands(fig, df)
+        return fig
+
+    def _with_bands(self, fig, df):
+        colors = {trace.get("name"): (trace.get("line") or {}).get("color") for trace in fig["data"]}
+        keys = list(dict.fromkeys([self.series, self.color]))
+        low, high = BAND
+        bands, banded = [], set()
+        for key, part in df.dropna(subset=list(BAND)).groupby(keys, sort=False):
+            name, color_name = (key[0], key[-1]) if isinstance(key, tuple) else (key, key)
+            part = part.sort_values(self.x)
+            x = part[self.x].tolist()
+            color = colors.get(color_name) or self.color_map.get(color_name, LINE_COLOR)
+            bands.append(dict(
+                type="scatter", x=x + x[::-1], y=part[high].tolist() + part[low].tolist()[::-1],
+                fill="toself", fillcolor=_translucent(color), line=dict(width=0),
+                hoverinfo="skip", showlegend=False,
+            ))
+            banded.add(name)
+
+        data = [
+            {**trace, "line": {**trace.get("line", {}), "dash": "dot"}} if trace.get("name") in banded else trace
+            for trace in fig["data"]
+        ]
+        return {"data": bands + data, "layout": fig["layout"]}
+
+    def _merged_base(self):
+        if self._merged_layout is None:
+            import plotly.graph_objects as go
+
+            fig = go.Figure(layout=dict(
+                xaxis_title=self.labels.get(self.x, self.x),
+                yaxis_title=self.labels.get(self.y, self.y),
+                legend_title_text=self.labels.get(self.color, self.color),
+                hovermode="closest",
+            ))
+            fig.update_layout(**self.layout)
+            self._merged_layout = fig.to_dict()["layout"]
+        return self._merged_layout
+
+    def _hovertemplate(self):
+        labels = self.labels
+        return (f"{labels.get(self.series, self.series)}=%{{text}}<br>{labels.get(self.x, self.x)}=%{{x}}"
+                f"<br>{labels.get(self.y, self.y)}=%{{y}}<extra></extra>")
+
+    def _merged(self, df):
+        hovertemplate = self._hovertemplate()
+        mode = "lines+markers" if self.markers else "lines"
+        data = []
+
+        if self.color == self.series:
+            merged = with_gaps(df, self.series, self.x, self.y)
+            names = list(merged[self.series].unique())
+            colors = [self.color_map.get(name, LINE_COLOR) for name in names]
+            # Marker colors as indices into a stepped colorscale: one number per point instead of a hex string
+            colorscale = []
+            for i, color in enumerate(colors):
+                colorscale += [[i / len(names), color], [(i + 1) / len(names), color]]
+            # Always with markers: they are what tells the series apart
+            data.append(dict(
+                type="scattergl", x=merged[self.x].tolist(), y=merged[self.y].tolist(),
+                text=merged[self.series].tolist(), mode="lines+markers",
+                line=dict(color=LINE_COLOR, width=1),
+                marker=dict(color=merged[self.series].map({name: i for i, name in enumerate(names)}).tolist(),
+                            colorscale=colorscale, cmin=-0.5, cmax=len(names) - 0.5),
+                hovertemplate=hovertemplate, showlegend=False,
+            ))
+            # Legend entries only: no points, so they cost no WebGL drawing
+            data += [
+                dict(type="scatter", x=[None], y=[None], mode=mode, name=name,
+                     line=dict(color=color), marker=dict(color=color), hoverinfo="skip")
+                for name, color in zip(names, colors)
+            ]
+        else:
+            for name, part in df.groupby(self.color, sort=False):
+                merged = with_gaps(part, self.series, self.x, self.y)
+                data.append(dict(
+                    type="scattergl", x=merged[self.x].tolist(), y=merged[self.y].tolist(),
+                    text=merged[self.series].tolist(), mode=mode, name=name, legendgroup=name,
+                    line=dict(color=self.color_map.get(name, LINE_COLOR)), hovertemplate=hovertemplate,
+                ))
+
+        return {"data": data, "layout": self._merged_base()}
+
+    def client_spec(self):
+        """Everything assets/trend_lines.js needs to draw this chart the way __call__ does."""
+        trace, layout, colorway = self.lines.skeleton()
+        # Both layouts share the plotly template, which is sent once
+        merged_layout = {k: v for k, v in self._merged_base().items() if k != "template"}
+        if self._merged_base().get("template") != layout.get("template"):
+            merged_layout["template"] = self._merged_base().get("template")
+        return dict(
+            trace=trace, layout=layout, colorway=colorway, colorMap=self.color_map,
+            name=figures._NAME, color=figures._COLOR, sameColor=self.color == self.series,
+            mergedLayout=merged_layout, hovertemplate=self._hovertemplate(),
+            mode="lines+markers" if self.markers else "lines",
+            lineColor=LINE_COLOR, maxSeries=MAX_SERIES,
+        )
+
+    def columns(self, df):
+        """
+        The rows of `df` as compact columns: series and color as indices into
+        `names`, x and y, and for the rows that have one, their band (row
+        numbers in `band`, bounds in `low` and `high`).
+        """
+        keys = [self.series] if self.color == self.series else [self.series, self.color]
+        names, codes = {}, {}
+        for key in keys:
+            values = df[key].astype(str)
+            for name in values.unique():
+                names.setdefault(name, len(names))
+            codes[key] = values.map(names).tolist()
+
+        columns = {"names": list(names), "series": codes[self.series], "x": df[self.x].tolist(), "y": df[self.y].tolist()}
+        if self.color != self.series:
+            columns["color"] = codes[self.color]
+        if all(column in df for column in BAND) and df[BAND[0]].notna().any():
+            banded = df[list(BAND)].reset_index(drop=True).dropna()
+            columns["band"] = banded.index.tolist()
+            columns["low"], columns["high"] = banded[BAND[0]].tolist(), banded[BAND[1]].tolist()
+        return columns
+
+
+def browser_trends(app, store_id, outputs, dropdown, charts):
+    """
+    Trend charts drawn in the browser. The rows of every chart are sent once
+    in a dcc.Store (LineChart.columns) and a clientside callback
+    (assets/trend_lines.js) filters them by the countries picked in
+    `dropdown` and draws them the way the LineChart would, so picking
+    countries costs no request.
+
+    `charts` holds one (LineChart, rows, extras) per output, with rows in
+    the order the chart's filter returns them. `extras` may hold a
+    "legendrank" ({trace name: rank}) and "traces" drawn after the lines.
+    Returns the Store, to put in the layout.
+    """
+    app.clientside_callback(
+        ClientsideFunction("trends", "draw"),
+        outputs,
+        Input(dropdown, "value"),
+        State(store_id, "data"),
+        prevent_initial_call=True,
+    )
+
+    # The specs come from plotly skeletons: cached, so a warm boot does not import plotly
+    @memoize(name=f"{__name__}.client_specs.{store_id}")
+    def client_specs():
+        return [chart.client_spec() for chart, _, _ in charts]
+
+    return dcc.Store(id=store_id, data=[
+        dict(spec=spec, rows=chart.columns(rows), **extras) for spec, (chart, rows, extras) in zip(client_specs(), charts)
+    ])
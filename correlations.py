@@ -0,0 +1,75 @@
+# correlations.py
+import numpy as np
+import pandas as pd
+
+# Two-sided 95% normal quantile for the Fisher z bands
+Z_95 = 1.959964
+# Longest delay (years) of the lagged correlations
+MAX_LAG = 10
+
+
+def _correlate(long, keys):
+    """Pearson r, R² and n with 95% bands per `keys` group of the paired values vx, vy."""
+    groups = long.groupby(keys, sort=True)
+    dx = long["vx"] - groups["vx"].transform("mean")
+    dy = long["vy"] - groups["vy"].transform("mean")
+    sums = long[keys].assign(sxy=dx * dy, sxx=dx * dx, syy=dy * dy, n=1).groupby(keys, sort=True).sum()
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = (sums["sxy"] / np.sqrt(sums["sxx"] * sums["syy"])).clip(-1, 1)
+        z = np.arctanh(r)
+        half = Z_95 / np.sqrt(sums["n"] - 3)
+    # n <= 3 gives no band
+    half = half.where(sums["n"] > 3)
+    r_low, r_high = np.tanh(z - half), np.tanh(z + half)
+
+    # R² band: squares of the r bounds, down to 0 when the r band spans 0
+    spans_zero = (r_low < 0) & (r_high > 0)
+    r2_low = np.minimum(r_low ** 2, r_high ** 2).where(~spans_zero, 0.0)
+    r2_high = np.maximum(r_low ** 2, r_high ** 2)
+
+    return pd.DataFrame({
+        "n": sums["n"], "r": r, "r2": r ** 2,
+        "r_low": r_low, "r_high": r_high, "r2_low": r2_low, "r2_high": r2_high,
+    }).reset_index()
+
+
+def _pairs(aligned, pairs, **extra):
+    return [
+        aligned[["year", x, y]].dropna().set_axis(["year", "vx", "vy"], axis=1).assign(x=x, y=y, **extra)
+        for x, y in pairs
+    ]
+
+
+def correlation_by_year(panel, pairs):
+    """
+    Pearson r, R² and n per year for every (x, y) column pair of the
+    build_panel() table, with a 95% confidence band from Fisher's z.
+    Countries missing either value in a year are left out of that year,
+    as in the scatter plots. All pairs are computed in one grouped pass.
+
+    Returns one row per (x, y, year): x, y, year, n, r, r2, r_low, r_high,
+    r2_low, r2_high.
+    """
+    return _correlate(pd.concat(_pairs(panel, pairs), ignore_index=True), ["x", "y", "year"])
+
+
+def lagged_correlation(panel, pairs, lags=range(MAX_LAG + 1)):
+    """
+    correlation_by_year() with x taken `lag` years after y: for each
+    country, y in year t is paired with x in year t + lag (e.g. education
+    now against GDP later). `year` is t. The whole lag x pair x year table
+    is computed in one grouped pass, so a lag change is a lookup.
+
+    Returns one row per (x, y, lag, year), with the same columns as
+    correlation_by_year() plus lag.
+    """
+    xs = sorted({x for x, _ in pairs})
+    ys = sorted({y for _, y in pairs} - set(xs))
+    frames = []
+    for lag in lags:
+        # x columns moved back by `lag` years, joined on the same (country, year) rows as the panel
+        ahead = panel[["country_id", "year"] + xs].assign(year=panel["year"] - lag)
+        aligned = panel[["country_id", "year"] + ys].merge(ahead, on=["country_id", "year"])
+        frames += _pairs(aligned, pairs, lag=lag)
+    return _correlate(pd.concat(frames, ignore_index=True), ["x", "y", "lag", "year"])
@@ -0,0 +1,191 @@
+"""
+Read-only HTTP access to the cleaned indicators, for tools that need the
+numbers behind the dashboard.
+
+    GET /api/indicators
+    GET /api/data?indicator=real_gdp&country=Finland&country=Sweden&from=2015&to=2022
+    GET /api/data?indicator=real_gdp,employment_rate&format=arrow
+
+Responses are columnar (country, year, value and, for /api/data, indicator)
+and streamed in chunks. `format` is json (default) or arrow (Arrow IPC
+stream), or picked from the Accept header (so /api/data responses carry
+Vary: Accept). Every response carries a strong ETag built from the dataset
+version, the code version (cache.code_version, so a serializer change
+retires old ETags) and the query. A matching If-None-Match gets 304 Not
+Modified.
+"""
+import hashlib
+import io
+import json
+
+import pandas as pd
+from flask import Response, request
+
+from cache import code_version
+from data_loader import indicator_name
+
+ARROW_MIMETYPE = "application/vnd.apache.arrow.stream"
+CHUNK_ROWS = 10_000
+COLUMNS = ["indicator", "country", "year", "value"]
+
+
+class BadRequest(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _error(message, status):
+    return Response(json.dumps({"error": message}), status=status, mimetype="application/json")
+
+
+def _values(name):
+    """Repeated and comma-separated query values: ?country=A&country=B,C -> [A, B, C]"""
+    return [v.strip() for arg in request.args.getlist(name) for v in arg.split(",") if v.strip()]
+
+
+def _year(name):
+    value = request.args.get(name)
+    if value in (None, ""):
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise BadRequest(f"'{name}' must be a year, got {value!r}")
+
+
+def _format():
+    fmt = request.args.get("format")
+    if fmt is None:
+        best = request.accept_mimetypes.best_match(["application/json", ARROW_MIMETYPE], default="application/json")
+        fmt = "arrow" if best == ARROW_MIMETYPE else "json"
+    if fmt not in ("json", "arrow"):
+        raise BadRequest(f"unknown format {fmt!r}, use json or arrow")
+    return fmt
+
+
+def _etag(version, *parts):
+    digest = hashlib.sha256(json.dumps([version, *parts], sort_keys=True).encode("utf-8")).hexdigest()
+    return f"{version}-{digest[:16]}"
+
+
+def _not_modified(etag):
+    return request.if_none_match.contains_weak(etag) or request.if_none_match.star_tag
+
+
+def stream_json(df, meta):
+    """{...meta, "columns": {name: [values]}} written column by column, CHUNK_ROWS values at a time."""
+    yield json.dumps(meta)[:-1] + ', "rows": %d, "columns": {' % len(df)
+    for i, column in enumerate(df.columns):
+        yield ("" if i == 0 else ", ") + json.dumps(column) + ": ["
+        values = df[column]
+        for start in range(0, len(values), CHUNK_ROWS):
+            chunk = values.iloc[start:start + CHUNK_ROWS].tolist()
+            yield ("" if start == 0 else ",") + json.dumps(chunk)[1:-1]
+        yield "]"
+    yield "}}"
+
+
+def stream_arrow(df):
+    """Arrow IPC stream, one record batch of up to CHUNK_ROWS rows at a time."""
+    import pyarrow as pa
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    buffer = io.BytesIO()
+    with pa.ipc.new_stream(buffer, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=CHUNK_ROWS):
+            writer.write_batch(batch)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()  # end-of-stream marker (and the schema if there were no rows)
+
+
+def register(server, data, version):
+    """
+    Adds the read-only /api routes to the Flask `server`, serving slices of
+    `data` (the SharedData from load_all_data). `version` is the dataset
+    version used for ETags, with the code version added.
+    """
+    files = {indicator_name(file): file for file in data}
+    tag_version = f"{version}-{code_version()}"
+
+    def send(df, etag, meta, fmt):
+        if fmt == "arrow":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                return _error("Arrow output needs pyarrow installed on the server", 406)
+            body, mimetype = stream_arrow(df), ARROW_MIMETYPE
+        else:
+            body, mimetype = stream_json(df, meta), "application/json"
+
+        response = Response(body, mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    def indicators():
+        etag = _etag(tag_version, "indicators")
+        if _not_modified(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        rows = []
+        for name, file in sorted(files.items()):
+            df = data[file]
+            rows.append({
+                "indicator": name,
+                "file": file,
+                "countries": int(df["country"].nunique()),
+                "first_year": int(df["year"].min()),
+                "last_year": int(df["year"].max()),
+                "rows": len(df),
+            })
+        listing = pd.DataFrame(rows)
+        return send(listing, etag, {"version": version}, "json")
+
+    def slice_data():
+        try:
+            # Sorted, so the same set of indicators always gives the same bytes (strong ETag)
+            names = sorted(set(_values("indicator")))
+            if not names:
+                raise BadRequest("at least one 'indicator' is required, see /api/indicators")
+            unknown = [name for name in names if name not in files]
+            if unknown:
+                raise BadRequest(f"unknown indicator(s): {', '.join(unknown)}", 404)
+            countries = _values("country")
+            year_from, year_to = _year("from"), _year("to")
+            fmt = _format()
+        except BadRequest as e:
+            return _error(str(e), e.status)
+
+        etag = _etag(tag_version, names, sorted(set(countries)), year_from, year_to, fmt)
+        if _not_modified(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            response.headers["Vary"] = "Accept"
+            return response
+
+        frames = []
+        for name in names:
+            df = data[files[name]]
+            mask = pd.Series(True, index=df.index)
+            if countries:
+                mask &= df["country"].isin(countries)
+            if year_from is not None:
+                mask &= df["year"] >= year_from
+            if year_to is not None:
+                mask &= df["year"] <= year_to
+            frames.append(df.loc[mask, ["country", "year", "value"]].assign(indicator=name))
+        df = pd.concat(frames, ignore_index=True)[COLUMNS]
+
+        meta = {"version": version, "indicators": names}
+        response = send(df, etag, meta, fmt)
+        # The format may come from the Accept header: caches must keep JSON and Arrow apart
+        response.headers["Vary"] = "Accept"
+        return response
+
+    server.add_url_rule("/api/indicators", "api_indicators", indicators, methods=["GET"])
+    server.add_url_rule("/api/data", "api_data", slice_data, methods=["GET"])
@@ -1,6 +1,139 @@
 # data_loader.py
+import numpy as np
 import pandas as pd
+import functools
+import hashlib
 import os
+import re
+from collections.abc import Mapping
+
+from assets.countries import AGGREGATES, COUNTRIES
+from assets.regions import REGIONS
+
+# pandas 3 always copies on write; 2.x needs it switched on for SharedData views
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+# Key columns of the build_panel() table; every other column is an indicator
+KEYS = ["country_id", "country", "year"]
+
+# Gap filling (fill_gaps): longest run of years carried forward / back at a series' ends
+MAX_FILL_SPAN = int(os.environ.get("DASH_MAX_FILL_SPAN", 3))
+# Suffix of the fill_gaps() flag columns
+IMPUTED = "_imputed"
+# Indicator that weights the region averages, when a file of that name is loaded
+POPULATION = "population"
+# First country_id of the EU / euro area totals and of the regions. Each kind has its own
+# range, so appending a country (IDs from 1) or an aggregate never moves another ID.
+AGGREGATE_IDS = 1001
+REGION_IDS = 2001
+
+
+class SharedData(Mapping):
+    """
+    Read-only file name -> DataFrame mapping shared by all components.
+
+    Every lookup returns a fresh shallow copy. With copy-on-write any change
+    to it (inplace drop, .loc assignment, new columns) copies the data first,
+    so a component can never change what other components or request threads
+    see. Indicators are also available as attributes by indicator_name(),
+    e.g. `data.real_gdp`, `data.panel` is the build_panel() table and
+    `data.filled_panel` the same table after fill_gaps() and match_nearest().
+    `data.regions` holds
+    the region_aggregates() of every indicator, computed once at load, and
+    `data.countries` the country_table() the frames are keyed by.
+    """
+
+    def __init__(self, frames):
+        self._frames = dict(frames)
+        self._by_name = {indicator_name(file): file for file in self._frames}
+        self._panel = None
+        self._filled_panel = None
+        self._regions = region_aggregates(self._frames)
+
+    def __getitem__(self, file):
+        return self._frames[file].copy(deep=False)
+
+    def __iter__(self):
+        return iter(self._frames)
+
+    def __len__(self):
+        return len(self._frames)
+
+    def __getattr__(self, name):
+        by_name = self.__dict__.get("_by_name", {})
+        if name not in by_name:
+            raise AttributeError(name)
+        return self[by_name[name]]
+
+    @property
+    def panel(self):
+        if self._panel is None:
+            self._panel = build_panel(self)
+        return self._panel.copy(deep=False)
+
+    @property
+    def filled_panel(self):
+        if self._filled_panel is None:
+            self._filled_panel = match_nearest(fill_gaps(self.panel))
+        return self._filled_panel.copy(deep=False)
+
+    @property
+    def countries(self):
+        return country_table().copy(deep=False)
+
+    @property
+    def regions(self):
+        return self._regions.copy(deep=False)
+
+    def with_regions(self, name):
+        """Indicator `name` with its region aggregates appended as extra "countries"."""
+        regions = self._regions[self._regions["indicator"] == name].drop(columns="indicator")
+        return pd.concat([getattr(self, name), regions], ignore_index=True)
+
+
+@functools.cache
+def country_table():
+    """
+    The country dimension, indexed by an integer country_id: display name,
+    ISO 3166 alpha-2 / alpha-3 codes, region, line color and an aggregate
+    flag. Aggregates are the EU / euro area totals and the regions of
+    assets/regions.py, whose rows come from region_aggregates(). Countries
+    are numbered from 1, EU / euro area totals from AGGREGATE_IDS and regions
+    from REGION_IDS, each in list order, so IDs are the same on every load
+    and only new entries get new ones.
+    """
+    # (first ID, first ID of the next range, rows)
+    ranges = [
+        (1, AGGREGATE_IDS, [dict(name=name, iso2=iso2, iso3=iso3, region=region, color=color, aggregate=False)
+                            for name, iso2, iso3, region, color in COUNTRIES]),
+        (AGGREGATE_IDS, REGION_IDS, [dict(name=name, aggregate=True) for name in AGGREGATES]),
+        (REGION_IDS, 2 * REGION_IDS - AGGREGATE_IDS, [dict(name=region, region=region, color=color, aggregate=True)
+                                                      for region, color in REGIONS.items()]),
+    ]
+    ids, rows = [], []
+    for start, end, part in ranges:
+        if start + len(part) > end:
+            raise ValueError(f"More than {end - start} entries for country_id {start}-{end - 1}")
+        ids += range(start, start + len(part))
+        rows += part
+
+    table = pd.DataFrame(rows, columns=["name", "iso2", "iso3", "region", "color", "aggregate"])
+    table.index = pd.Index(ids, name="country_id")
+    if table["name"].duplicated().any():
+        raise ValueError(f"Duplicate country names: {sorted(table.loc[table['name'].duplicated(), 'name'])}")
+    return table
+
+
+def country_ids(names, source=""):
+    """country_table() IDs of a Series of display names. Unknown names are an error, not a missing point."""
+    table = country_table()
+    ids = names.map(pd.Series(table.index, index=table["name"]))
+    unknown = sorted(names[ids.isna()].unique())
+    if unknown:
+        raise ValueError(f"{source}: countries missing from assets/countries.py: {unknown}")
+    return ids.astype("int64")
+
 
 def load_all_data(data_dir="data"):
     """Loads and cleans all Eurostat CSV files in the given folder."""
@@ -62,9 +195,162 @@ def load_all_data(data_dir="data"):
         )
 
         df = df.dropna(subset=["value"])
+        # Keyed by country ID; EU / euro area totals are excluded once here so no component sees them
+        df["country"] = df["country"].str.strip()
+        df.insert(0, "country_id", country_ids(df["country"], file))
+        df = df[~df["country_id"].map(country_table()["aggregate"])]
         df["source_file"] = file
         dataframes[file] = df
 
         print(f"✅ Processed {file} → {df.shape[0]} rows, {df['country'].nunique()} countries")
 
-    return dataframes
+    return SharedData(dataframes)
+
+
+def indicator_name(file):
+    """'8_6_real_gdp.csv' -> 'real_gdp'"""
+    return re.sub(r"^[\d_]+", "", os.path.splitext(file)[0])
+
+
+def build_panel(dataframes):
+    """
+    Joins all indicators into one wide table: one row per (country_id, year)
+    with the country's display name, one column per indicator, named by
+    indicator_name().
+    """
+    long = pd.concat(
+        [df.assign(indicator=indicator_name(file)) for file, df in dataframes.items()],
+        ignore_index=True,
+    )
+
+    panel = long.pivot_table(index=["country_id", "year"], columns="indicator", values="value", aggfunc="first")
+    panel.columns.name = None
+    # Rows in name order, as the figures list countries
+    return _with_names(panel.reset_index()).sort_values(["country", "year"], ignore_index=True)
+
+
+def _with_names(df):
+    """`df` keyed by country_id with the display name column after it."""
+    df.insert(1, "country", df["country_id"].map(country_table()["name"]))
+    return df
+
+
+def region_aggregates(dataframes):
+    """
+    Every indicator summarized per region of country_table() and year, in one
+    grouped pass: mean, median, min, max and the number of countries `n`.
+    `value` is the mean, weighted by population when a POPULATION indicator
+    is loaded (countries without a population that year are left out of
+    the weighted mean).
+
+    Returns one row per (indicator, region, year) with the region's
+    country_id and name, so the rows can sit next to the country rows of an
+    indicator.
+    """
+    table = country_table()
+    long = pd.concat(
+        [df[["country_id", "year", "value"]].assign(indicator=indicator_name(file)) for file, df in dataframes.items()],
+        ignore_index=True,
+    )
+    # Region of each country, as the region's own country_id
+    region_ids = pd.Series(table.index, index=table["name"])[table.loc[table["aggregate"], "name"]]
+    long["region"] = long["country_id"].map(table.loc[~table["aggregate"], "region"].map(region_ids))
+    long = long.dropna(subset=["region"]).astype({"region": "int64"})
+
+    weights = next((df for file, df in dataframes.items() if indicator_name(file) == POPULATION), None)
+    if weights is not None:
+        weights = weights.drop_duplicates(["country_id", "year"]).set_index(["country_id", "year"])["value"]
+        long["weight"] = pd.MultiIndex.from_frame(long[["country_id", "year"]]).map(weights)
+        long["weighted"] = long["value"] * long["weight"]
+
+    groups = long.groupby(["indicator", "region", "year"], sort=True)
+    result = groups["value"].agg(["mean", "median", "min", "max", "count"]).rename(columns={"count": "n"})
+    result["value"] = result["mean"]
+    if weights is not None:
+        sums = groups[["weighted", "weight"]].sum(min_count=1)
+        result["value"] = (sums["weighted"] / sums["weight"]).fillna(result["mean"])
+    result = _with_names(result.reset_index().rename(columns={"region": "country_id"}))
+    return result[["indicator"] + KEYS + ["value", "mean", "median", "min", "max", "n"]]
+
+
+def fill_gaps(panel, max_span=MAX_FILL_SPAN):
+    """
+    build_panel() table with missing values filled per country and indicator:
+    linear interpolation across gaps of at most `max_span` years between
+    observed years (longer gaps stay empty), and carry-forward after the last
+    and back-fill before the first observation (nearest year) for at most
+    `max_span` years. Every indicator gets an `<indicator>_imputed` column
+    that is True where the value was filled in. Each indicator is filled as
+    one country x year matrix.
+    """
+    indicators = [c for c in panel.columns if c not in KEYS]
+    years = range(panel["year"].min(), panel["year"].max() + 1)
+    grid = pd.MultiIndex.from_product([sorted(panel["country_id"].unique()), years], names=["country_id", "year"])
+    wide = panel.set_index(["country_id", "year"])[indicators].reindex(grid).unstack("year")
+
+    filled, flags = {}, {}
+    position = pd.DataFrame(np.tile(np.arange(len(years)), (len(wide), 1)), index=wide.index, columns=years)
+    for indicator in indicators:
+        observed = wide[indicator]
+        # Length of the interior gap each missing year is in (NaN before the first / after the last observation)
+        seen = position.where(observed.notna())
+        gap = seen.bfill(axis=1) - seen.ffill(axis=1) - 1
+        values = observed.interpolate(axis=1, limit_area="inside").where(observed.notna() | (gap <= max_span))
+        values = values.ffill(axis=1, limit=max_span, limit_area="outside").bfill(axis=1, limit=max_span, limit_area="outside")
+        filled[indicator] = values.stack(future_stack=True)
+        flags[indicator + IMPUTED] = (observed.isna() & values.notna()).stack(future_stack=True)
+
+    result = pd.DataFrame({**filled, **flags})
+    result = result[result[indicators].notna().any(axis=1)]
+    return _with_names(result.reset_index()).sort_values(["country", "year"], ignore_index=True)
+
+
+def match_nearest(panel, max_span=MAX_FILL_SPAN):
+    """
+    fill_gaps() table with the values it left missing (gaps longer than
+    `max_span` years) taken from the same country's nearest year that has
+    one, at most `max_span` years away, and flagged as imputed. This pairs
+    indicators by nearest year in the correlation views, so a long gap in
+    one indicator does not drop the country from every year of the gap.
+    """
+    indicators = [c for c in panel.columns if c not in KEYS and not c.endswith(IMPUTED)]
+    years = range(panel["year"].min(), panel["year"].max() + 1)
+    grid = pd.MultiIndex.from_product([sorted(panel["country_id"].unique()), years], names=["country_id", "year"])
+    # merge_asof needs both sides sorted by year
+    result = panel.set_index(["country_id", "year"]).drop(columns="country").reindex(grid).reset_index().sort_values("year", kind="stable", ignore_index=True)
+
+    for indicator in indicators:
+        have = panel.loc[panel[indicator].notna(), ["country_id", "year", indicator]]
+        have = have.rename(columns={"year": "matched_year", indicator: "matched"}).sort_values("matched_year")
+        nearest = pd.merge_asof(result[["country_id", "year"]], have, left_on="year", right_on="matched_year",
+                                by="country_id", direction="nearest", tolerance=max_span)
+        missing = (result[indicator].isna() & nearest["matched"].notna()).to_numpy()
+        result.loc[missing, indicator] = nearest.loc[missing, "matched"].to_numpy()
+        flag = indicator + IMPUTED
+        result[flag] = result[flag].fillna(False).astype(bool) | missing
+
+    result = result[result[indicators].notna().any(axis=1)]
+    return _with_names(result).sort_values(["country", "year"], ignore_index=True)
+
+
+def flag_columns(df, columns):
+    """`columns` plus their fill_gaps() flags, where `df` has them."""
+    return list(columns) + [c + IMPUTED for c in columns if c + IMPUTED in df.columns]
+
+
+def imputed(df, columns):
+    """True for rows where any of `columns` was filled in by fill_gaps()."""
+    flags = [c + IMPUTED for c in columns if c + IMPUTED in df.columns]
+    return df[flags].any(axis=1) if flags else pd.Series(False, index=df.index)
+
+
+def dataset_version(data_dir="data"):
+    """Short hash of all CSV files in the folder. Changes whenever the data changes."""
+    digest = hashlib.sha256()
+    for file in sorted(os.listdir(data_dir)):
+        if not file.endswith(".csv"):
+            continue
+        digest.update(file.encode("utf-8"))
+        with open(os.path.join(data_dir, file), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
@@ -0,0 +1,101 @@
+"""
+Microbenchmark for the figure skeletons in components/figures.py.
+
+Builds the app from app.py and calls every figure callback's own function
+(no cache, no Dash dispatch) with the values of the initial layout. Each
+callback runs once with the skeletons and once with plain plotly express,
+and the script reports the median time, the response size and whether both
+paths draw the same traces.
+
+    python figure_bench.py --repeat 50
+"""
+import argparse
+import base64
+import inspect
+import os
+import statistics
+import time
+
+import numpy as np
+from plotly.io.json import to_json_plotly
+
+from components import figures
+from loadtest import collect_components
+
+
+def _decode(value):
+    # px stores numeric arrays as {"dtype": ..., "bdata": base64}
+    if isinstance(value, dict) and "bdata" in value:
+        return np.frombuffer(base64.b64decode(value["bdata"]), dtype=value["dtype"]).tolist()
+    if isinstance(value, dict):
+        return {k: _decode(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_decode(v) for v in value]
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    return value
+
+
+def _drawn(result):
+    """The traces of every figure in a callback result, without empty ones (px trendlines on one point)."""
+    results = result if isinstance(result, (list, tuple)) else [result]
+    drawn = []
+    for fig in results:
+        if hasattr(fig, "to_dict"):
+            fig = fig.to_dict()
+        if isinstance(fig, dict) and "data" in fig:
+            traces = [_decode(t) for t in fig["data"] if t.get("x") is not None or t.get("locations") is not None]
+            drawn.append(to_json_plotly(traces))
+    return drawn
+
+
+def time_callback(func, args, repeat):
+    func(*args)  # warm up: builds the skeleton
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), len(to_json_plotly(result)), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare figure skeletons with plotly express per callback.")
+    parser.add_argument("--repeat", type=int, default=20, help="timed calls per callback and path (default 20)")
+    args = parser.parse_args()
+
+    # Keep background warm-up from competing with the timed calls
+    os.environ.setdefault("DASH_WARMUP", "0")
+    os.environ.setdefault("DASH_BACKGROUND_LOAD", "0")
+    import app as dashboard
+
+    components = collect_components(dashboard)
+    header = f"{'callback':<60} {'px ms':>8} {'skel ms':>8} {'speedup':>8} {'px KB':>7} {'skel KB':>7} {'same':>5}"
+    print(header)
+    print("-" * len(header))
+
+    for key, entry in dashboard.app.callback_map.items():
+        # Clientside callbacks (the trend charts) have no Python function to time
+        if ".figure" not in key or "callback" not in entry:
+            continue
+        try:
+            inputs = [getattr(components[item["id"]], item["property"]) for item in entry["inputs"]]
+        except (KeyError, AttributeError):
+            print(f"⚠️ Skipping {key}: inputs not in the layout")
+            continue
+
+        func = inspect.unwrap(entry["callback"])
+        figures.SKELETONS = False
+        px_time, px_size, px_result = time_callback(func, inputs, args.repeat)
+        figures.SKELETONS = True
+        skel_time, skel_size, skel_result = time_callback(func, inputs, args.repeat)
+
+        same = "yes" if _drawn(px_result) == _drawn(skel_result) else "NO"
+        print(
+            f"{key.strip('.')[:60]:<60} {px_time * 1000:>8.2f} {skel_time * 1000:>8.2f} {px_time / skel_time:>7.1f}x "
+            f"{px_size / 1024:>7.1f} {skel_size / 1024:>7.1f} {same:>5}"
+        )
+
+
+if __name__ == "__main__":
+    main()
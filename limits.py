@@ -0,0 +1,114 @@
+"""
+Concurrency budgets for expensive callbacks, so a burst of heavy requests
+cannot take every worker thread and starve the cheap ones.
+
+A budget lets `concurrency` calls run at once and up to `queue` more wait
+for a slot, each for at most `timeout` seconds. A call that finds the
+queue full, or waits too long, is overloaded: it is rejected (PreventUpdate,
+so the browser keeps the figure it has), or with `degrade` run straight away
+in degraded mode, where degraded() is true and optional work such as
+trendlines is skipped.
+
+    CORRELATION = budget("correlation", concurrency=2, queue=8, timeout=5)
+
+    @app.callback(...)
+    @memoize(limit=CORRELATION)      # cache hits and coalesced calls take no slot
+    def update_scatter(...): ...
+
+Every setting can be overridden per budget from the environment, e.g.
+DASH_LIMIT_CORRELATION_CONCURRENCY, _QUEUE, _TIMEOUT and _DEGRADE (0 / 1).
+"""
+import os
+import threading
+import time
+
+from dash.exceptions import PreventUpdate
+
+_lock = threading.Lock()
+_budgets = {}
+_current = threading.local()
+
+
+def _env(name, field, default, cast):
+    value = os.environ.get(f"DASH_LIMIT_{name.upper()}_{field}")
+    return default if value is None else cast(value)
+
+
+class Budget:
+    def __init__(self, name, concurrency, queue, timeout, degrade=False):
+        self.name = name
+        self.concurrency = _env(name, "CONCURRENCY", concurrency, int)
+        self.queue = _env(name, "QUEUE", queue, int)
+        self.timeout = _env(name, "TIMEOUT", timeout, float)
+        self.degrade = _env(name, "DEGRADE", degrade, lambda v: v != "0")
+        self._slots = threading.Condition()
+        self.running = 0
+        self.waiting = 0
+        self._stats = {"admitted": 0, "rejected": 0, "degraded": 0, "wait_seconds": 0.0}
+
+    def _enter(self):
+        """Takes a slot, waiting in the queue if need be. False when overloaded."""
+        start = time.perf_counter()
+        with self._slots:
+            if self.running >= self.concurrency:
+                if self.waiting >= self.queue:
+                    return False
+                self.waiting += 1
+                try:
+                    admitted = self._slots.wait_for(lambda: self.running < self.concurrency, self.timeout)
+                finally:
+                    self.waiting -= 1
+                if not admitted:
+                    return False
+            self.running += 1
+            self._stats["admitted"] += 1
+            self._stats["wait_seconds"] += time.perf_counter() - start
+            return True
+
+    def _leave(self):
+        with self._slots:
+            self.running -= 1
+            self._slots.notify()
+
+    def run(self, func, *args, **kwargs):
+        if self._enter():
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._leave()
+
+        with self._slots:
+            self._stats["degraded" if self.degrade else "rejected"] += 1
+        if not self.degrade:
+            print(f"🚦 {self.name}: overloaded, request rejected")
+            raise PreventUpdate
+        _current.degraded = True
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.degraded = False
+
+    def stats(self):
+        with self._slots:
+            return {**self._stats, "running": self.running, "waiting": self.waiting,
+                    "concurrency": self.concurrency, "queue": self.queue}
+
+
+def budget(name, concurrency, queue, timeout, degrade=False):
+    """The budget called `name`, created with these settings on first use."""
+    with _lock:
+        if name not in _budgets:
+            _budgets[name] = Budget(name, concurrency, queue, timeout, degrade)
+        return _budgets[name]
+
+
+def degraded():
+    """True inside a call an overloaded budget let through in degraded mode."""
+    return getattr(_current, "degraded", False)
+
+
+def stats():
+    """Counters and current queue state of every budget, by name."""
+    with _lock:
+        budgets = dict(_budgets)
+    return {name: b.stats() for name, b in budgets.items()}
@@ -0,0 +1,244 @@
+"""
+Load generator for the dashboard callbacks.
+
+Builds the real app from app.py and replays randomized callback requests
+(year changes, multi-country trend selections, region toggles, ...) through
+the Flask test client, or against a running server with --url.
+
+    python loadtest.py --concurrency 8 --duration 30
+    python loadtest.py --url http://127.0.0.1:8050 --requests 2000
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from dash.development.base_component import Component
+from plotly.io.json import to_json_plotly
+
+
+def collect_components(dashboard):
+    """All components with an id, from the layout and every component built in app.py."""
+    found = {}
+
+    def walk(node):
+        if isinstance(node, Component):
+            component_id = getattr(node, "id", None)
+            if isinstance(component_id, str):
+                found.setdefault(component_id, node)
+            walk(getattr(node, "children", None))
+        elif isinstance(node, (list, tuple)):
+            for child in node:
+                walk(child)
+
+    walk(dashboard.app.layout)
+    for value in vars(dashboard).values():
+        walk(value)
+    return found
+
+
+def _plain(value):
+    # numpy scalars from the data frames -> plain JSON values
+    return value.item() if hasattr(value, "item") else value
+
+
+def option_values(component):
+    """Values a user can pick on this component, or None if it is not a picker."""
+    if component.__class__.__name__ == "Tabs":
+        return [tab.tab_id for tab in component.children if getattr(tab, "tab_id", None)]
+    if component.__class__.__name__ == "Slider":
+        return list(range(component.min, component.max + 1, getattr(component, "step", None) or 1))
+
+    options = getattr(component, "options", None)
+    if not options:
+        return None
+    if isinstance(options, dict):
+        return [_plain(v) for v in options]
+    return [_plain(o["value"] if isinstance(o, dict) else o) for o in options]
+
+
+class Scenario:
+    """Random but realistic requests for one server-side callback."""
+
+    def __init__(self, spec, components):
+        self.spec = spec
+        self.name = spec["output"].strip(".").replace("...", ",")
+        self.choices = []
+        for item in spec["inputs"]:
+            component = components.get(item["id"])
+            values = option_values(component) if component is not None else None
+            if not values:
+                raise ValueError(f"no values to pick for {item['id']}.{item['property']}")
+            self.choices.append((item, values, bool(getattr(component, "multi", False))))
+        self.states = [
+            (item, getattr(components.get(item["id"]), item["property"], None))
+            for item in spec.get("state", [])
+        ]
+
+    def payload(self, rng):
+        inputs = []
+        for item, values, multi in self.choices:
+            value = rng.sample(values, rng.randint(1, min(5, len(values)))) if multi else rng.choice(values)
+            inputs.append({"id": item["id"], "property": item["property"], "value": value})
+
+        output = self.spec["output"]
+        if output.startswith(".."):
+            outputs = [
+                {"id": part.rsplit(".", 1)[0], "property": part.rsplit(".", 1)[1]}
+                for part in output.strip(".").split("...")
+            ]
+        else:
+            outputs = {"id": output.rsplit(".", 1)[0], "property": output.rsplit(".", 1)[1]}
+
+        changed = rng.choice(inputs)
+        return to_json_plotly({
+            "output": output,
+            "outputs": outputs,
+            "inputs": inputs,
+            "state": [{"id": item["id"], "property": item["property"], "value": value} for item, value in self.states],
+            "changedPropIds": [f"{changed['id']}.{changed['property']}"],
+        })
+
+
+def build_scenarios(dashboard, client, only=None):
+    components = collect_components(dashboard)
+    specs = json.loads(client.get("/_dash-dependencies").get_data(as_text=True))
+
+    scenarios = []
+    for spec in specs:
+        if spec.get("clientside_function") or (only and only not in spec["output"]):
+            continue
+        try:
+            scenarios.append(Scenario(spec, components))
+        except ValueError as e:
+            print(f"⚠️ Skipping {spec['output']}: {e}")
+    return scenarios
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return float("nan")
+    index = min(len(sorted_values) - 1, max(0, round(q / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(scenarios, send, concurrency, duration=None, total=None, seed=0):
+    """Fires requests from `concurrency` threads until `duration` seconds or `total` requests."""
+    results = {scenario.name: [] for scenario in scenarios}
+    errors = {scenario.name: 0 for scenario in scenarios}
+    sizes = {scenario.name: 0 for scenario in scenarios}
+    lock = threading.Lock()
+    issued = iter(range(total)) if total else None
+    deadline = time.perf_counter() + duration if duration else None
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        while True:
+            if deadline and time.perf_counter() >= deadline:
+                return
+            if issued is not None:
+                with lock:
+                    if next(issued, None) is None:
+                        return
+
+            scenario = rng.choice(scenarios)
+            body = scenario.payload(rng)
+            start = time.perf_counter()
+            status, size = send(body)
+            elapsed = time.perf_counter() - start
+
+            with lock:
+                results[scenario.name].append(elapsed)
+                sizes[scenario.name] += size
+                if status not in (200, 204):
+                    errors[scenario.name] += 1
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(worker, worker_id) for worker_id in range(concurrency)]:
+            future.result()
+    wall = time.perf_counter() - start
+    return results, errors, sizes, wall
+
+
+def report(results, errors, sizes, wall):
+    header = f"{'callback':<60} {'n':>6} {'err':>4} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'avg KB':>7}"
+    print(header)
+    print("-" * len(header))
+
+    everything = []
+    for name, latencies in sorted(results.items()):
+        if not latencies:
+            continue
+        latencies.sort()
+        everything += latencies
+        print(
+            f"{name[:60]:<60} {len(latencies):>6} {errors[name]:>4} {len(latencies) / wall:>7.1f} "
+            f"{percentile(latencies, 50) * 1000:>8.1f} {percentile(latencies, 95) * 1000:>8.1f} "
+            f"{percentile(latencies, 99) * 1000:>8.1f} {sizes[name] / len(latencies) / 1024:>7.1f}"
+        )
+
+    everything.sort()
+    print("-" * len(header))
+    print(
+        f"{'total':<60} {len(everything):>6} {sum(errors.values()):>4} {len(everything) / wall:>7.1f} "
+        f"{percentile(everything, 50) * 1000:>8.1f} {percentile(everything, 95) * 1000:>8.1f} "
+        f"{percentile(everything, 99) * 1000:>8.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay dashboard callbacks and report latency per callback.")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel clients (default 4)")
+    parser.add_argument("--duration", type=float, default=None, help="seconds to run (default 20 unless --requests)")
+    parser.add_argument("--requests", type=int, default=None, help="total number of requests instead of a duration")
+    parser.add_argument("--url", default=None, help="running server to hit instead of the in-process test client")
+    parser.add_argument("--callback", default=None, help="only callbacks whose output contains this text")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    if args.duration is None and args.requests is None:
+        args.duration = 20
+
+    # The scenarios are read from the built components, so build them during import. No warm-up:
+    # its calls would fill the cache and compete for the budgets while the load test measures them
+    os.environ.setdefault("DASH_BACKGROUND_LOAD", "0")
+    os.environ.setdefault("DASH_WARMUP", "0")
+    import app as dashboard
+
+    client = dashboard.app.server.test_client()
+    scenarios = build_scenarios(dashboard, client, args.callback)
+    if not scenarios:
+        raise SystemExit("No callbacks to replay.")
+
+    if args.url:
+        endpoint = args.url.rstrip("/") + "/_dash-update-component"
+
+        def send(body):
+            req = urllib.request.Request(endpoint, data=body.encode("utf-8"), headers={"Content-Type": "application/json"})
+            try:
+                with urllib.request.urlopen(req) as response:
+                    return response.status, len(response.read())
+            except urllib.error.HTTPError as e:
+                return e.code, 0
+    else:
+        local = threading.local()
+
+        def send(body):
+            # Test clients keep per-client state, so each thread gets its own
+            if not hasattr(local, "client"):
+                local.client = dashboard.app.server.test_client()
+            response = local.client.post("/_dash-update-component", data=body, content_type="application/json")
+            return response.status_code, len(response.data)
+
+    target = args.url or "test client"
+    print(f"🚀 {len(scenarios)} callbacks, {args.concurrency} clients against {target}")
+    report(*run(scenarios, send, args.concurrency, args.duration, args.requests, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+import functools
+import os
+import threading
+import time
+
+from dash.exceptions import PreventUpdate
+from flask import Response
+
+import limits
+import startup
+from cache import callback_cache
+
+# Upper bounds (seconds) of the latency histogram
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+enabled = os.environ.get("DASH_METRICS", "1") != "0"
+
+_lock = threading.Lock()
+_callbacks = {}
+_current = threading.local()
+
+
+def _label(callback_id):
+    # "..a.figure...b.figure.." -> "a.figure,b.figure"
+    return ",".join(part for part in callback_id.strip(".").split("...") if part)
+
+
+def _record(label):
+    record = _callbacks.get(label)
+    if record is None:
+        record = _callbacks[label] = {
+            "buckets": [0] * len(BUCKETS),
+            "count": 0,
+            "sum": 0.0,
+            "bytes": 0,
+            "errors": 0,
+            "phases": {},
+        }
+    return record
+
+
+def lap(phase):
+    """
+    Adds the time since the previous lap (or since the callback started) to `phase`.
+    Call it at the end of each stage of a callback, e.g. lap("filter"), lap("figure").
+    Does nothing outside an instrumented callback.
+    """
+    state = getattr(_current, "state", None)
+    if state is None:
+        return
+    now = time.perf_counter()
+    phases = state["phases"]
+    phases[phase] = phases.get(phase, 0.0) + now - state["last"]
+    state["last"] = now
+
+
+def _time_compute(func):
+    # Times the user function; whatever Dash does afterwards is serialization
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        _current.state = {"last": start, "phases": {}}
+        try:
+            return func(*args, **kwargs)
+        finally:
+            state = _current.state
+            state["compute"] = time.perf_counter() - start
+
+    return wrapper
+
+
+def _time_dispatch(dispatch, label):
+    @functools.wraps(dispatch)
+    def wrapper(*args, **kwargs):
+        _current.state = None
+        start = time.perf_counter()
+        size = 0
+        failed = False
+        try:
+            response = dispatch(*args, **kwargs)
+            size = len(response) if isinstance(response, (str, bytes)) else 0
+            return response
+        except PreventUpdate:
+            raise
+        except Exception:
+            failed = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            state = getattr(_current, "state", None) or {"phases": {}}
+            _current.state = None
+            phases = dict(state["phases"])
+            if "compute" in state:
+                phases["serialize"] = max(0.0, elapsed - state["compute"])
+
+            with _lock:
+                record = _record(label)
+                record["count"] += 1
+                record["sum"] += elapsed
+                record["bytes"] += size
+                record["errors"] += failed
+                for i, bound in enumerate(BUCKETS):
+                    if elapsed <= bound:
+                        record["buckets"][i] += 1
+                        break
+                for phase, seconds in phases.items():
+                    record["phases"][phase] = record["phases"].get(phase, 0.0) + seconds
+
+    return wrapper
+
+
+def instrument(app):
+    """
+    Times every callback registered on `app` from now on and serves the
+    numbers on /metrics. Call it before any component registers callbacks.
+    Set DASH_METRICS=0 to turn it off.
+    """
+    if not enabled:
+        return
+
+    register = app.callback
+
+    @functools.wraps(register)
+    def callback(*args, **kwargs):
+        before = set(app.callback_map)
+        decorator = register(*args, **kwargs)
+        callback_ids = set(app.callback_map) - before
+
+        def wrap(func):
+            decorator(_time_compute(func))
+            for callback_id in callback_ids:
+                entry = app.callback_map[callback_id]
+                entry["callback"] = _time_dispatch(entry["callback"], _label(callback_id))
+            return func
+
+        return wrap
+
+    app.callback = callback
+    app.server.add_url_rule("/metrics", "metrics", lambda: Response(render(), mimetype="text/plain; version=0.0.4"))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render():
+    """Prometheus text exposition of all collected metrics."""
+    with _lock:
+        snapshot = {
+            label: dict(record, buckets=list(record["buckets"]), phases=dict(record["phases"]))
+            for label, record in _callbacks.items()
+        }
+
+    lines = [
+        "# HELP dash_callback_duration_seconds Wall time of Dash callbacks, including serialization.",
+        "# TYPE dash_callback_duration_seconds histogram",
+    ]
+    for label, record in sorted(snapshot.items()):
+        output = f'output="{_escape(label)}"'
+        cumulative = 0
+        for bound, count in zip(BUCKETS, record["buckets"]):
+            cumulative += count
+            lines.append(f'dash_callback_duration_seconds_bucket{{{output},le="{bound}"}} {cumulative}')
+        lines.append(f'dash_callback_duration_seconds_bucket{{{output},le="+Inf"}} {record["count"]}')
+        lines.append(f"dash_callback_duration_seconds_sum{{{output}}} {record['sum']:.6f}")
+        lines.append(f"dash_callback_duration_seconds_count{{{output}}} {record['count']}")
+
+    lines += [
+        "# HELP dash_callback_phase_seconds_total Time spent per callback phase (filter, figure, serialize).",
+        "# TYPE dash_callback_phase_seconds_total counter",
+    ]
+    for label, record in sorted(snapshot.items()):
+        for phase, seconds in sorted(record["phases"].items()):
+            lines.append(
+                f'dash_callback_phase_seconds_total{{output="{_escape(label)}",phase="{_escape(phase)}"}} {seconds:.6f}'
+            )
+
+    lines += [
+        "# HELP dash_callback_response_bytes_total Bytes of serialized callback responses.",
+        "# TYPE dash_callback_response_bytes_total counter",
+    ]
+    for label, record in sorted(snapshot.items()):
+        lines.append(f'dash_callback_response_bytes_total{{output="{_escape(label)}"}} {record["bytes"]}')
+
+    lines += [
+        "# HELP dash_callback_errors_total Callbacks that raised an exception.",
+        "# TYPE dash_callback_errors_total counter",
+    ]
+    for label, record in sorted(snapshot.items()):
+        lines.append(f'dash_callback_errors_total{{output="{_escape(label)}"}} {record["errors"]}')
+
+    lines += [
+        "# HELP dash_cache_requests_total Memoized callback lookups by result.",
+        "# TYPE dash_cache_requests_total counter",
+    ]
+    for name, counters in sorted(callback_cache.stats().items()):
+        for result, field in (("hit", "hits"), ("miss", "misses"), ("coalesced", "coalesced")):
+            lines.append(f'dash_cache_requests_total{{function="{_escape(name)}",result="{result}"}} {counters[field]}')
+
+    budgets = sorted(limits.stats().items())
+    lines += [
+        "# HELP dash_limit_requests_total Computations under a concurrency budget, by outcome.",
+        "# TYPE dash_limit_requests_total counter",
+    ]
+    for name, counters in budgets:
+        for result in ("admitted", "rejected", "degraded"):
+            lines.append(f'dash_limit_requests_total{{budget="{_escape(name)}",result="{result}"}} {counters[result]}')
+    lines += [
+        "# HELP dash_limit_wait_seconds_total Time admitted computations spent queued for a slot.",
+        "# TYPE dash_limit_wait_seconds_total counter",
+    ]
+    for name, counters in budgets:
+        lines.append(f'dash_limit_wait_seconds_total{{budget="{_escape(name)}"}} {counters["wait_seconds"]:.6f}')
+    for metric, field, text in (
+        ("dash_limit_running", "running", "Computations holding a slot of the budget."),
+        ("dash_limit_queue_depth", "waiting", "Computations waiting for a slot of the budget."),
+    ):
+        lines += [f"# HELP {metric} {text}", f"# TYPE {metric} gauge"]
+        for name, counters in budgets:
+            lines.append(f'{metric}{{budget="{_escape(name)}"}} {counters[field]}')
+
+    lines += [
+        "# HELP dash_startup_phase_seconds Time spent in each startup phase of this worker.",
+        "# TYPE dash_startup_phase_seconds gauge",
+    ]
+    for phase, seconds in startup.phases:
+        lines.append(f'dash_startup_phase_seconds{{phase="{_escape(phase)}"}} {seconds:.6f}')
+
+    return "\n".join(lines) + "\n"
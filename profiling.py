@@ -0,0 +1,124 @@
+import functools
+import itertools
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+from flask import request
+
+HEADER = "X-Dash-Profile"
+QUERY_FLAG = "profile"
+
+_sequence = itertools.count(1)
+
+
+class StackSampler:
+    """
+    Samples the call stack of one thread every `interval` seconds from a
+    background thread and counts identical stacks (the "folded" format
+    read by flamegraph.pl, inferno and speedscope).
+    """
+
+    def __init__(self, thread_id, interval=0.002):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+def _requested(sample_rate):
+    if request.headers.get(HEADER, "") not in ("", "0"):
+        return True
+    if request.args.get(QUERY_FLAG, "") not in ("", "0"):
+        return True
+    return sample_rate > 0 and random.random() < sample_rate
+
+
+def _write_profile(output_dir, sampler, body, elapsed):
+    callback_id = body.get("output", "unknown")
+    name = re.sub(r"[^A-Za-z0-9_-]+", "_", callback_id.strip("."))[:80]
+    base = os.path.join(output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{next(_sequence)}-{name}")
+
+    with open(base + ".folded", "w", encoding="utf-8") as f:
+        f.write(sampler.folded())
+    with open(base + ".json", "w", encoding="utf-8") as f:
+        json.dump({
+            "callback": callback_id,
+            "inputs": body.get("inputs", []),
+            "state": body.get("state", []),
+            "seconds": round(elapsed, 6),
+            "samples": sum(sampler.stacks.values()),
+            "interval": sampler.interval,
+        }, f, indent=2, default=str)
+    print(f"🔥 Profiled {callback_id} in {elapsed * 1000:.0f} ms → {base}.folded")
+
+
+def enable(app, output_dir="profiles", sample_rate=0.0, interval=0.002):
+    """
+    Wraps Dash's callback dispatch in a sampling profiler for requests that
+    send the X-Dash-Profile header or ?profile=1, plus a random `sample_rate`
+    share of all requests. Each profiled request writes <name>.folded
+    (flame graph input) and <name>.json (callback id and inputs) to `output_dir`.
+    """
+    endpoint = app.config.routes_pathname_prefix + "_dash-update-component"
+    dispatch = app.server.view_functions[endpoint]
+    os.makedirs(output_dir, exist_ok=True)
+
+    @functools.wraps(dispatch)
+    def profiled_dispatch(*args, **kwargs):
+        if not _requested(sample_rate):
+            return dispatch(*args, **kwargs)
+
+        start = time.perf_counter()
+        with StackSampler(threading.get_ident(), interval) as sampler:
+            response = dispatch(*args, **kwargs)
+        elapsed = time.perf_counter() - start
+
+        try:
+            _write_profile(output_dir, sampler, request.get_json(silent=True) or {}, elapsed)
+        except OSError as e:
+            print(f"⚠️ Could not write profile: {e}")
+        return response
+
+    app.server.view_functions[endpoint] = profiled_dispatch
+
+
+def enable_from_env(app):
+    """Turns profiling on when DASH_PROFILE=1. Without it the dispatch is left untouched."""
+    if os.environ.get("DASH_PROFILE", "0") == "0":
+        return
+    enable(
+        app,
+        output_dir=os.environ.get("DASH_PROFILE_DIR", "profiles"),
+        sample_rate=float(os.environ.get("DASH_PROFILE_SAMPLE_RATE", 0)),
+        interval=float(os.environ.get("DASH_PROFILE_INTERVAL", 0.002)),
+    )
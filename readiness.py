@@ -0,0 +1,162 @@
+"""
+Loads the data and builds the dashboard in a background thread, so a
+worker answers health checks from the moment it starts instead of only
+once every file is parsed.
+
+The thread starts with the first request each process gets, not at import:
+threads do not survive a fork, so one started while a pre-fork server
+(gunicorn --preload) imports the app would never run in its workers. Each
+worker loads its own copy; a worker forked from a process that has already
+built the dashboard (DASH_BACKGROUND_LOAD=0) uses that one and only restarts
+warm-up.
+
+    /healthz    200 while the process is up, 500 if loading failed (restart it)
+    /readyz     200 once the data is loaded and warm-up has run, 503 before
+
+Until the build is done, requests never reach Flask: this module answers
+them itself, so the build can still register routes (Flask refuses new
+routes after its first request). Meanwhile callbacks get a "Loading data"
+figure for each figure output (e.g. a page served by a worker that is
+already up, calling one that just restarted), the layout and callback
+list wait for the build (only a page that is already open asks for them)
+and every other URL gets a 503 page that reloads itself.
+
+    DASH_BACKGROUND_LOAD=0  build during import instead (scripts and tools)
+"""
+import json
+import os
+import threading
+import time
+
+from werkzeug.wrappers import Request, Response
+
+import warmup
+
+_loaded = threading.Event()
+_done = threading.Event()
+_state = {"error": None, "seconds": None}
+_start_lock = threading.Lock()
+_started_in = None  # pid of the process the current build/warm-up threads run in
+
+# Dash's own requests of a page that is already open, and how long they may wait for the build
+SETUP_PATHS = ("/_dash-layout", "/_dash-dependencies")
+SETUP_WAIT = 30
+
+# Shown in every figure a callback asks for while the data is loading
+LOADING_FIGURE = {
+    "data": [],
+    "layout": {
+        "xaxis": {"visible": False},
+        "yaxis": {"visible": False},
+        "annotations": [{"text": "Loading data…", "showarrow": False, "font": {"size": 16, "color": "#6B7280"}}],
+    },
+}
+
+LOADING_PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><meta http-equiv="refresh" content="2"><title>Loading…</title></head>
+<body style="font-family: Inter, sans-serif; text-align: center; margin-top: 20vh; color: #4B5563">
+<h3>Loading data…</h3><p>The dashboard opens as soon as it is ready.</p></body></html>"""
+
+
+def _json(body, status):
+    return Response(json.dumps(body), status=status, mimetype="application/json")
+
+
+def healthz():
+    if _state["error"] is not None:
+        return _json({"status": "error", "error": _state["error"]}, 500)
+    return _json({"status": "ok"}, 200)
+
+
+def readyz():
+    warm = warmup.status()
+    ready = _loaded.is_set() and warm["ready"]
+    return _json({"ready": ready, "data": _loaded.is_set(), "load_seconds": _state["seconds"], "warmup": warm},
+                 200 if ready else 503)
+
+
+def _loading_callback(request):
+    """Dash callback response with LOADING_FIGURE in every figure output, or 204 if it has none."""
+    body = request.get_json(silent=True) or {}
+    outputs = body.get("outputs") or []
+    outputs = outputs if isinstance(outputs, list) else [outputs]
+    response = {}
+    for output in outputs:
+        if output.get("property") == "figure":
+            component_id = output["id"] if isinstance(output["id"], str) else json.dumps(output["id"], sort_keys=True, separators=(",", ":"))
+            response.setdefault(component_id, {})["figure"] = LOADING_FIGURE
+    if not response:
+        return Response(status=204)
+    return _json({"multi": True, "response": response}, 200)
+
+
+def _while_loading(request):
+    if request.path.endswith("/healthz"):
+        return healthz()
+    if request.path.endswith("/readyz"):
+        return readyz()
+    if request.path.endswith("/_dash-update-component"):
+        return _loading_callback(request)
+    return Response(LOADING_PAGE, status=503, mimetype="text/html", headers={"Retry-After": "2"})
+
+
+def _gate(wsgi_app, build):
+    def app(environ, start_response):
+        if _started_in != os.getpid():
+            _start(build)
+        if not _loaded.is_set():
+            request = Request(environ)
+            if not (request.path.endswith(SETUP_PATHS) and wait(SETUP_WAIT)):
+                return _while_loading(request)(environ, start_response)
+        return wsgi_app(environ, start_response)
+
+    return app
+
+
+def _build(build):
+    start = time.perf_counter()
+    try:
+        build()
+    except Exception as e:
+        _state["error"] = repr(e)
+        print(f"❌ Loading failed: {e!r}")
+        raise
+    else:
+        _state["seconds"] = round(time.perf_counter() - start, 3)
+        _loaded.set()
+    finally:
+        _done.set()
+
+
+def _start(build):
+    """Starts loading in this process, or only warm-up if it was forked from one that had loaded."""
+    global _started_in
+    with _start_lock:
+        if _started_in == os.getpid():
+            return
+        _started_in = os.getpid()
+        if _loaded.is_set():
+            warmup.start()
+        elif not _done.is_set():
+            threading.Thread(target=_build, args=(build,), name="load", daemon=True).start()
+
+
+def start(server, build, background=True):
+    """
+    Adds /healthz and /readyz to the Flask `server` and runs `build` (data
+    loading, components, layout): in a background thread started by the
+    first request of each process, or right away if `background` is false.
+    """
+    global _started_in
+    server.add_url_rule("/healthz", "healthz", healthz)
+    server.add_url_rule("/readyz", "readyz", readyz)
+    server.wsgi_app = _gate(server.wsgi_app, build)
+    if not background:
+        _started_in = os.getpid()
+        _build(build)
+
+
+def wait(timeout=None):
+    """Blocks until the build is done. False on timeout or if it failed."""
+    _done.wait(timeout)
+    return _loaded.is_set()
@@ -0,0 +1,245 @@
+"""
+Prerendered snapshot of every dashboard callback, for static hosting.
+
+The build enumerates the options of each callback's inputs (years, regions,
+indicator groups, and single countries for the multi-country pickers). It
+runs every combination in a pool of processes and writes each response as
+gzipped JSON into a bundle with a manifest.json:
+
+    python snapshot.py --out snapshot --workers 8
+
+A rebuild skips combinations whose fingerprint (dataset version, chart code,
+callback and inputs) is unchanged. Files are named by their content, so
+unchanged responses are never rewritten.
+
+Static mode: with DASH_SNAPSHOT set, app.py replaces those callbacks with
+clientside ones that fetch the prerendered responses, so interactions cost
+no Python compute. DASH_SNAPSHOT is either the URL the bundle is hosted at
+(it needs CORS if that is another origin) or a local bundle folder, served
+under /snapshot/.
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import inspect
+import itertools
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dash.dependencies import Input, Output, State
+from dash.exceptions import PreventUpdate
+from plotly.io.json import to_json_plotly
+
+from cache import code_version
+
+MANIFEST = "manifest.json"
+# Not shipped: what the files were built from, for the next incremental build
+BUILD_STATE = "build.json"
+
+
+def input_key(values):
+    """Lookup key of one combination of input values. Must match JSON.stringify in assets/snapshot.js."""
+    return json.dumps(values, separators=(",", ":"), ensure_ascii=False)
+
+
+def _outputs(spec):
+    output = spec["output"]
+    if output.startswith(".."):
+        return [part.rsplit(".", 1) for part in output.strip(".").split("...")]
+    return [output.rsplit(".", 1)]
+
+
+def snapshottable(spec):
+    """Server callbacks driven only by pickers (dropdown values) are prerendered."""
+    return not spec.get("clientside_function") and not spec.get("state") and all(
+        item["property"] == "value" for item in spec["inputs"]
+    )
+
+
+def snapshot_callbacks(dashboard):
+    """{output: (input ids, multi flags, combinations)} for every snapshottable callback."""
+    from loadtest import collect_components, option_values
+
+    components = collect_components(dashboard)
+    callbacks = {}
+    for spec in filter(snapshottable, dashboard.app._callback_list):
+        choices, multi = [], []
+        for item in spec["inputs"]:
+            component = components.get(item["id"])
+            values = option_values(component) if component is not None else None
+            if not values:
+                print(f"⚠️ Skipping {spec['output']}: no values to pick for {item['id']}")
+                break
+            is_multi = bool(getattr(component, "multi", False))
+            # Multi-selects are stored one value at a time (and empty); the browser merges them
+            choices.append([[v] for v in values] + [[]] if is_multi else values)
+            multi.append(is_multi)
+        else:
+            callbacks[spec["output"]] = (
+                [item["id"] for item in spec["inputs"]], multi, [list(c) for c in itertools.product(*choices)]
+            )
+    return callbacks
+
+
+# --- Build workers ---
+
+_app = None
+
+
+def _init_worker():
+    global _app
+    import app as dashboard
+
+    _app = dashboard.app
+
+
+def _render(task):
+    """Runs one combination and writes it into the bundle. Returns (output, key, file or None)."""
+    out_dir, output, values = task
+    func = inspect.unwrap(_app.callback_map[output]["callback"])
+    try:
+        result = func(*values)
+    except PreventUpdate:
+        return output, input_key(values), None
+
+    body = gzip.compress(to_json_plotly(result).encode("utf-8"), mtime=0)
+    file = hashlib.sha256(body).hexdigest()[:20] + ".json.gz"
+    path = os.path.join(out_dir, file)
+    if not os.path.exists(path):
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+    return output, input_key(values), file
+
+
+def _load(path, default):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def build(out_dir, workers=None, only=None):
+    # The build renders every combination itself; background warm-up would only compete
+    os.environ.setdefault("DASH_WARMUP", "0")
+    os.environ.setdefault("DASH_BACKGROUND_LOAD", "0")
+    import app as dashboard
+
+    os.makedirs(out_dir, exist_ok=True)
+    version = f"{dashboard.callback_cache.data_version}-{code_version()}"
+    previous = _load(os.path.join(out_dir, BUILD_STATE), {})
+    callbacks = snapshot_callbacks(dashboard)
+    if only:
+        callbacks = {output: spec for output, spec in callbacks.items() if only in output}
+
+    manifest = {"version": version, "callbacks": {}}
+    fingerprints, tasks = {}, []
+    for output, (inputs, multi, combinations) in callbacks.items():
+        entry = manifest["callbacks"][output] = {"inputs": inputs, "multi": multi, "files": {}}
+        for values in combinations:
+            key = input_key(values)
+            fingerprint = hashlib.sha256(input_key([version, output, values]).encode("utf-8")).hexdigest()[:16]
+            fingerprints[f"{output} {key}"] = fingerprint
+            done = previous.get(f"{output} {key}")
+            if done and done["fingerprint"] == fingerprint and (done["file"] is None or os.path.exists(os.path.join(out_dir, done["file"]))):
+                if done["file"]:
+                    entry["files"][key] = done["file"]
+                continue
+            tasks.append((out_dir, output, values))
+
+    total = sum(len(spec[2]) for spec in callbacks.values())
+    print(f"📦 {len(callbacks)} callbacks, {total} combinations, {len(tasks)} to render ({total - len(tasks)} unchanged)")
+
+    start = time.perf_counter()
+    rendered = {}
+    if tasks:
+        # fork reuses the app this process already built; elsewhere each worker imports it
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker) as pool:
+            for output, key, file in pool.map(_render, tasks, chunksize=8):
+                rendered[f"{output} {key}"] = file
+                if file:
+                    manifest["callbacks"][output]["files"][key] = file
+    print(f"⏱️ Rendered {len(tasks)} combinations in {time.perf_counter() - start:.1f} s")
+
+    state = {}
+    for name, fingerprint in fingerprints.items():
+        file = rendered[name] if name in rendered else previous[name]["file"]
+        state[name] = {"fingerprint": fingerprint, "file": file}
+
+    # Drop files nothing points to any more (unless this was a partial build)
+    if not only:
+        used = {entry["file"] for entry in state.values()}
+        for path in glob.glob(os.path.join(out_dir, "*.json.gz")):
+            if os.path.basename(path) not in used:
+                os.remove(path)
+    else:
+        state = {**previous, **state}
+        old = _load(os.path.join(out_dir, MANIFEST), {}).get("callbacks", {})
+        manifest["callbacks"] = {**old, **manifest["callbacks"]}
+
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, separators=(",", ":"))
+    with open(os.path.join(out_dir, BUILD_STATE), "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    size = sum(os.path.getsize(p) for p in glob.glob(os.path.join(out_dir, "*.json.gz")))
+    print(f"✅ Snapshot {version} in {out_dir}/ ({size / 1024 / 1024:.1f} MB)")
+
+
+# --- Static mode ---
+
+def serve_static(app, location):
+    """
+    Swaps every snapshottable callback for a clientside callback that
+    fetches its prerendered response (see assets/snapshot.js).
+    `location` is the bundle's URL, or a local folder served at /snapshot/.
+    """
+    if "://" in location:
+        base = location.rstrip("/")
+    else:
+        from flask import send_from_directory
+
+        folder = os.path.abspath(location)
+        app.server.add_url_rule(
+            "/snapshot/<path:file>", "snapshot_file",
+            lambda file: send_from_directory(folder, file, max_age=3600), methods=["GET"],
+        )
+        base = app.get_relative_path("/snapshot")
+
+    swapped = 0
+    for spec in list(filter(snapshottable, app._callback_list)):
+        output = spec["output"]
+        app._callback_list.remove(spec)
+        app.callback_map.pop(output, None)
+
+        targets = [Output(component_id, prop) for component_id, prop in _outputs(spec)]
+        app.clientside_callback(
+            "function(...values) { return window.dash_clientside.snapshot.respond(%s, %s, values); }"
+            % (json.dumps(base), json.dumps(output)),
+            targets if output.startswith("..") else targets[0],
+            [Input(item["id"], item["property"]) for item in spec["inputs"]],
+            [State(item["id"], item["property"]) for item in spec["state"]],
+            prevent_initial_call=spec["prevent_initial_call"],
+        )
+        swapped += 1
+    print(f"🗄️ Static mode: {swapped} callbacks read from {base}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prerender every callback response into a static bundle.")
+    parser.add_argument("--out", default="snapshot", help="bundle folder (default snapshot/)")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: one per CPU)")
+    parser.add_argument("--callback", default=None, help="only callbacks whose output contains this text")
+    args = parser.parse_args()
+    build(args.out, args.workers, args.callback)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+import time
+
+# Import this module first in app.py so "imports" covers everything else
+_start = time.perf_counter()
+_last = _start
+
+phases = []
+
+
+def mark(phase):
+    """Records the time since the previous mark (or since startup began) as `phase`."""
+    global _last
+    now = time.perf_counter()
+    phases.append((phase, now - _last))
+    _last = now
+
+
+def total():
+    return sum(seconds for _, seconds in phases)
+
+
+def report():
+    print("⏱️ Startup")
+    for phase, seconds in phases:
+        print(f"   {phase:<24} {seconds * 1000:>8.0f} ms")
+    print(f"   {'total':<24} {total() * 1000:>8.0f} ms")
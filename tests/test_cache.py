@@ -0,0 +1,193 @@
+import multiprocessing
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+from cache import CallbackCache
+
+
+def _hold_lease(path, key, value, started, release):
+    # Another worker: takes the lease, then stores `value` (unless None) and releases it
+    cache = CallbackCache(path)
+    cache._acquire(key)
+    started.set()
+    release.wait(10)
+    if value is not None:
+        cache.set(key, value)
+    cache._release(key)
+
+
+class CacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, "callbacks.sqlite")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+
+class TestKeys(CacheTestCase):
+    def test_key_changes_with_data_and_code_version(self):
+        cache = CallbackCache(self.path, code_version="a")
+        cache.data_version = "d1"
+        key = cache.make_key("f", [2024], {})
+        cache.data_version = "d2"
+        self.assertNotEqual(cache.make_key("f", [2024], {}), key)
+        cache.data_version = "d1"
+        cache.code_version = "b"
+        self.assertNotEqual(cache.make_key("f", [2024], {}), key)
+
+    def test_new_code_misses_entries_of_old_code(self):
+        calls = []
+
+        def render(year):
+            calls.append(year)
+            return year
+
+        old = CallbackCache(self.path, code_version="old").memoize("render")(render)
+        new = CallbackCache(self.path, code_version="new").memoize("render")(render)
+        old(2024)
+        new(2024)
+        self.assertEqual(calls, [2024, 2024])
+
+
+class TestCreation(CacheTestCase):
+    def test_nothing_is_created_before_the_first_lookup(self):
+        path = os.path.join(self.dir, "sub", "callbacks.sqlite")
+        cache = CallbackCache(path)
+        double = cache.memoize("double")(lambda x: x * 2)
+        self.assertFalse(os.path.exists(os.path.dirname(path)))
+
+        self.assertEqual(double(2), 4)
+        self.assertTrue(os.path.exists(path))
+
+
+class TestExpiry(CacheTestCase):
+    def test_entries_expire_after_ttl(self):
+        cache = CallbackCache(self.path, ttl=0.05)
+        cache.set("k", {"figure": 1})
+        self.assertEqual(cache.get("k"), (True, {"figure": 1}))
+        time.sleep(0.1)
+        self.assertEqual(cache.get("k"), (False, None))
+
+
+class TestEviction(CacheTestCase):
+    def test_least_recently_used_entries_go_first(self):
+        value = b"x" * 1000
+        cache = CallbackCache(self.path, max_bytes=2500)
+        cache.set("a", value)
+        time.sleep(0.01)
+        cache.set("b", value)
+        time.sleep(0.01)
+        cache.get("a")  # a is now more recent than b
+        time.sleep(0.01)
+        cache.set("c", value)
+
+        self.assertTrue(cache.get("a")[0])
+        self.assertFalse(cache.get("b")[0])
+        self.assertTrue(cache.get("c")[0])
+
+    def test_values_over_the_limit_are_not_stored(self):
+        cache = CallbackCache(self.path, max_bytes=100)
+        cache.set("big", b"x" * 1000)
+        self.assertFalse(cache.get("big")[0])
+
+
+class TestConnections(CacheTestCase):
+    def test_one_connection_per_thread(self):
+        cache = CallbackCache(self.path)
+        conns = []
+        thread = threading.Thread(target=lambda: conns.append(cache._connect()))
+        thread.start()
+        thread.join()
+
+        self.assertIs(cache._connect(), cache._connect())
+        self.assertIsNot(conns[0], cache._connect())
+
+    def test_threads_see_each_others_entries(self):
+        cache = CallbackCache(self.path)
+        thread = threading.Thread(target=cache.set, args=("k", 42))
+        thread.start()
+        thread.join()
+        self.assertEqual(cache.get("k"), (True, 42))
+
+
+class TestCoalescing(CacheTestCase):
+    def test_threads_share_one_computation(self):
+        cache = CallbackCache(self.path)
+        calls = []
+
+        @cache.memoize("slow")
+        def slow(x):
+            calls.append(x)
+            time.sleep(0.2)
+            return {"x": x}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(slow(1))) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, [1])
+        self.assertEqual(results, [{"x": 1}] * 6)
+        self.assertEqual(cache.stats()["slow"], {"hits": 0, "misses": 1, "coalesced": 5})
+
+    def _other_worker(self, func, value):
+        cache = CallbackCache(self.path)
+        wrapped = cache.memoize("f")(func)
+        key = cache.make_key("f", (1,), {})
+        started, release = multiprocessing.Event(), multiprocessing.Event()
+        worker = multiprocessing.Process(target=_hold_lease, args=(self.path, key, value, started, release))
+        worker.start()
+        self.assertTrue(started.wait(10))
+        threading.Timer(0.2, release.set).start()
+        try:
+            return cache, wrapped(1)
+        finally:
+            worker.join(10)
+
+    def test_waits_for_the_process_holding_the_lease(self):
+        calls = []
+        cache, result = self._other_worker(lambda x: calls.append(x) or "mine", "theirs")
+        self.assertEqual(result, "theirs")
+        self.assertEqual(calls, [])
+        self.assertEqual(cache.stats()["f"]["coalesced"], 1)
+
+    def test_computes_when_the_lease_is_released_without_a_result(self):
+        calls = []
+        cache, result = self._other_worker(lambda x: calls.append(x) or "mine", None)
+        self.assertEqual(result, "mine")
+        self.assertEqual(calls, [1])
+
+    def test_abandoned_lease_is_taken_over(self):
+        cache = CallbackCache(self.path)
+        other = CallbackCache(self.path, lease=0.1)
+        key = cache.make_key("f", (1,), {})
+        other._acquire(key)  # never released, e.g. the worker crashed
+
+        start = time.perf_counter()
+        self.assertEqual(cache.memoize("f")(lambda x: x * 2)(1), 2)
+        self.assertLess(time.perf_counter() - start, 5)
+
+
+    def test_lease_of_another_process_is_kept_when_polling_fails(self):
+        cache = CallbackCache(self.path)
+        key = cache.make_key("f", (1,), {})
+        self.assertTrue(CallbackCache(self.path)._acquire(key))  # held by another worker
+
+        def broken(key):
+            raise sqlite3.OperationalError("database is locked")
+
+        cache._await_other = broken
+        self.assertEqual(cache.memoize("f")(lambda x: x * 2)(1), 2)
+        self.assertFalse(cache._acquire(key))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+
+import pandas as pd
+
+from data_loader import fill_gaps, match_nearest
+
+
+def _panel(values, start=2000):
+    return pd.DataFrame({"country_id": 1, "country": "Finland", "year": range(start, start + len(values)), "x": values})
+
+
+class TestFillGaps(unittest.TestCase):
+    def _filled(self, values, max_span=3):
+        # {year: (value, imputed)}; years left empty have no row
+        out = fill_gaps(_panel(values), max_span)
+        return {row.year: (row.x, row.x_imputed) for row in out.itertuples()}
+
+    def test_short_interior_gaps_are_interpolated(self):
+        self.assertEqual(self._filled([1, None, None, 4]),
+                         {2000: (1, False), 2001: (2, True), 2002: (3, True), 2003: (4, False)})
+
+    def test_gaps_longer_than_max_span_stay_empty(self):
+        self.assertEqual(self._filled([1, None, None, None, None, 6]), {2000: (1, False), 2005: (6, False)})
+
+    def test_ends_are_carried_over_for_at_most_max_span_years(self):
+        self.assertEqual(self._filled([None, None, None, 5, None, None, None], max_span=2),
+                         {2001: (5, True), 2002: (5, True), 2003: (5, False), 2004: (5, True), 2005: (5, True)})
+
+
+
+class TestMatchNearest(unittest.TestCase):
+    def test_long_gaps_take_the_nearest_year_within_max_span(self):
+        panel = _panel([1, None, None, None, None, None, 7]).assign(y=range(7))
+        out = match_nearest(fill_gaps(panel, 2), 2).set_index("year")
+        self.assertEqual(out["x"].dropna().to_dict(), {2000: 1, 2001: 1, 2002: 1, 2004: 7, 2005: 7, 2006: 7})
+        self.assertEqual(out.loc[out["x_imputed"]].index.tolist(), [2001, 2002, 2004, 2005])
+        self.assertFalse(out["y_imputed"].any())
+
+
+if __name__ == "__main__":
+    unittest.main()
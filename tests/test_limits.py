@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from dash.exceptions import PreventUpdate
+
+from cache import CallbackCache
+from limits import Budget, degraded
+
+
+class BudgetTestCase(unittest.TestCase):
+    def hold(self, budget):
+        """Takes the budget's only slot in another thread. Returns a function that gives it back."""
+        entered, done = threading.Event(), threading.Event()
+
+        def work():
+            entered.set()
+            done.wait(10)
+
+        thread = threading.Thread(target=budget.run, args=(work,))
+        thread.start()
+        self.assertTrue(entered.wait(5))
+
+        def release():
+            done.set()
+            thread.join(10)
+
+        self.addCleanup(release)
+        return release
+
+
+class TestReject(BudgetTestCase):
+    def test_full_queue_is_rejected_at_once(self):
+        budget = Budget("test_full", concurrency=1, queue=0, timeout=5)
+        self.hold(budget)
+
+        start = time.perf_counter()
+        with self.assertRaises(PreventUpdate):
+            budget.run(lambda: "figure")
+        self.assertLess(time.perf_counter() - start, 1)
+        self.assertEqual(budget.stats()["rejected"], 1)
+
+    def test_waiting_too_long_is_rejected(self):
+        budget = Budget("test_timeout", concurrency=1, queue=1, timeout=0.1)
+        self.hold(budget)
+
+        start = time.perf_counter()
+        with self.assertRaises(PreventUpdate):
+            budget.run(lambda: "figure")
+        self.assertGreaterEqual(time.perf_counter() - start, 0.1)
+        self.assertEqual(budget.stats()["rejected"], 1)
+        self.assertEqual(budget.stats()["waiting"], 0)
+
+    def test_queued_call_runs_once_a_slot_frees(self):
+        budget = Budget("test_queued", concurrency=1, queue=1, timeout=5)
+        release = self.hold(budget)
+        threading.Timer(0.1, release).start()
+
+        self.assertEqual(budget.run(lambda: "figure"), "figure")
+        self.assertEqual(budget.stats()["admitted"], 2)
+
+
+class TestDegrade(BudgetTestCase):
+    def test_overloaded_call_runs_degraded(self):
+        budget = Budget("test_degrade", concurrency=1, queue=0, timeout=5, degrade=True)
+        self.hold(budget)
+
+        self.assertTrue(budget.run(degraded))
+        self.assertFalse(degraded())
+        self.assertEqual(budget.stats()["degraded"], 1)
+
+    def test_degraded_results_are_not_cached(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        cache = CallbackCache(os.path.join(directory, "callbacks.sqlite"))
+        budget = Budget("test_degrade_cache", concurrency=1, queue=0, timeout=5, degrade=True)
+        calls = []
+
+        @cache.memoize("scatter", limit=budget)
+        def scatter(year):
+            calls.append(degraded())
+            return {"year": year, "trendline": not degraded()}
+
+        release = self.hold(budget)
+        self.assertEqual(scatter(2024), {"year": 2024, "trendline": False})
+        release()
+        self.assertEqual(scatter(2024), {"year": 2024, "trendline": True})
+        self.assertEqual(scatter(2024), {"year": 2024, "trendline": True})
+        self.assertEqual(calls, [True, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
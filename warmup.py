@@ -0,0 +1,98 @@
+"""
+Fills the callback cache in the background after a deploy or reload, so
+the first users do not pay for every cold figure.
+
+Components queue the calls users make most with warm() while they are
+registered; app.py then calls start(), which runs the queue in order on a
+few daemon threads and returns at once, so the worker takes traffic
+straight away. Warm-up calls go through memoize like any other call:
+entries already cached are hits, and a user asking for a figure that is
+being warmed waits for it instead of computing it again.
+
+    DASH_WARMUP=0           skip warm-up
+    DASH_WARMUP_WORKERS=2   threads computing warm-up calls
+
+Progress is part of /readyz (see readiness.py).
+"""
+import os
+import threading
+import time
+
+enabled = os.environ.get("DASH_WARMUP", "1") != "0"
+
+_lock = threading.Lock()
+_tasks = []
+_state = {"total": 0, "done": 0, "failed": 0, "seconds": None, "running": False}
+_pid = None  # process the warm-up threads run in
+
+
+def _after_fork():
+    # A warm-up thread may have held the lock when the process forked; it does not exist in the child
+    global _lock
+    _lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_after_fork)
+
+
+def warm(func, calls):
+    """Queues func(*args) for every args tuple in `calls`, pass them the way Dash does (all positional)."""
+    with _lock:
+        _tasks.extend((func, tuple(args)) for args in calls)
+        _state["total"] = len(_tasks)
+
+
+def _worker(tasks):
+    while True:
+        with _lock:
+            if not tasks:
+                return
+            func, args = tasks.pop(0)
+        try:
+            func(*args)
+            field = "done"
+        except Exception as e:
+            # PreventUpdate included: an overloaded budget may turn warm-up calls away
+            print(f"⚠️ Warm-up of {func.__qualname__}{args} failed: {e!r}")
+            field = "failed"
+        with _lock:
+            _state[field] += 1
+
+
+def _run(workers):
+    start = time.perf_counter()
+    with _lock:
+        tasks = list(_tasks)
+    threads = [threading.Thread(target=_worker, args=(tasks,), daemon=True) for _ in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with _lock:
+        _state["seconds"] = round(time.perf_counter() - start, 3)
+        _state["running"] = False
+    print(f"🔥 Warm-up: {_state['done']} of {_state['total']} calls cached in {_state['seconds']} s")
+
+
+def start(workers=None):
+    """
+    Runs the queued calls in the background. Returns immediately. In a
+    process forked while warm-up was still running, whose threads did not
+    survive the fork, it starts over (calls already cached are hits).
+    """
+    global _pid
+    if not enabled or _state["seconds"] is not None or (_state["running"] and _pid == os.getpid()):
+        return
+    workers = workers or int(os.environ.get("DASH_WARMUP_WORKERS", 2))
+    _pid = os.getpid()
+    _state.update(done=0, failed=0, running=True)
+    threading.Thread(target=_run, args=(workers,), name="warmup", daemon=True).start()
+
+
+def status():
+    """Warm-up progress. `ready` once every queued call has run (or warm-up is off)."""
+    with _lock:
+        state = dict(_state)
+    state["ready"] = not enabled or state["seconds"] is not None
+    return state
+